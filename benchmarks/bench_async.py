@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import asyncio
+import concurrent.futures
+import os
+import time
+
+from inovonics.cloud.datastore import AsyncInoRedis, AsyncInoModelBase, InoRedis, InoModelBase, InoObjectBase
+
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+REQUEST_COUNT = 2000
+CONCURRENCY = 25
+
+# === FUNCTIONS ===
+def redis_settings():
+    # Uses the same environment variables as the tests; point them at a scratch redis-server.
+    return {'host': os.getenv('REDIS_HOST', 'localhost'), 'port': os.getenv('REDIS_PORT', 6379),
+            'db': os.getenv('REDIS_DB', 0)}
+
+async def threadpool_fetches(model, oids, concurrency):
+    # The setup used today: the synchronous model pushed onto a thread pool from the event loop.
+    loop = asyncio.get_running_loop()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*[loop.run_in_executor(executor, model.get, oid) for oid in oids])
+
+async def native_fetches(model, oids, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(oid):
+        async with semaphore:
+            return await model.get(oid)
+    await asyncio.gather(*[fetch(oid) for oid in oids])
+
+async def run_async(count, concurrency):
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(10)})
+    dstore = InoRedis(**redis_settings())
+    dstore.redis.flushdb()
+    sync_model = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    objects = [obj_class() for _ in range(100)]
+    sync_model.save_many(objects)
+    oids = [objects[i % len(objects)].oid for i in range(count)]
+
+    results = {}
+    start = time.perf_counter()
+    await threadpool_fetches(sync_model, oids, concurrency)
+    results['threadpool_requests_per_second'] = count / (time.perf_counter() - start)
+
+    async with AsyncInoRedis(**redis_settings()) as adstore:
+        async_model = type('BenchAsyncModel', (AsyncInoModelBase,), {'object_class': obj_class,
+                                                                       'key_prefix': sync_model.key_prefix})(adstore)
+        start = time.perf_counter()
+        await native_fetches(async_model, oids, concurrency)
+        results['async_requests_per_second'] = count / (time.perf_counter() - start)
+    dstore.redis.flushdb()
+    return results
+
+def run(count=REQUEST_COUNT, concurrency=CONCURRENCY):
+    return asyncio.run(run_async(count, concurrency))
+
+def main():
+    results = run()
+    print("{} fetches, concurrency {}".format(REQUEST_COUNT, CONCURRENCY))
+    print("threadpool {:>9.0f} req/s".format(results['threadpool_requests_per_second']))
+    print("async      {:>9.0f} req/s".format(results['async_requests_per_second']))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_async
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import os
+import time
+
+import redis
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase
+
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 500
+ROUND_TRIPS = {'count': 0, 'bytes': 0}
+
+# === FUNCTIONS ===
+def connect():
+    # Uses the same environment variables as the tests; point them at a scratch redis-server.
+    dstore = InoRedis(host=os.getenv('REDIS_HOST', 'localhost'), port=os.getenv('REDIS_PORT', 6379),
+                      db=os.getenv('REDIS_DB', 0))
+    # Swap in a connection class that counts the packets sent, i.e. the round trips, and their size.
+    dstore.redis.connection_pool.disconnect()
+    dstore.redis.connection_pool.connection_class = CountingConnection
+    return dstore
+
+def measure(func):
+    ROUND_TRIPS['count'] = 0
+    ROUND_TRIPS['bytes'] = 0
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start, ROUND_TRIPS['count']
+
+def run(count=OBJECT_COUNT):
+    dstore = connect()
+    dstore.redis.flushdb()
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(10)})
+    model = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    objects = [obj_class() for _ in range(count)]
+    oids = [obj.oid for obj in objects]
+
+    def naive_save():
+        for obj in objects:
+            obj._validate_fields()  # pylint: disable=protected-access
+            dstore.redis.hset(model._key(obj.oid), mapping=obj.get_hash())  # pylint: disable=protected-access
+
+    def naive_get():
+        return [obj_class.from_hash(dstore.redis.hgetall(model._key(oid))) for oid in oids]  # pylint: disable=W0212
+
+    results = {}
+    for label, func in (('naive_save', naive_save), ('bulk_save', lambda: model.save_many(objects)),
+                        ('naive_get', naive_get), ('bulk_get', lambda: model.get_many(oids))):
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(func)
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} objects".format(OBJECT_COUNT))
+    for label in ('naive_save', 'bulk_save', 'naive_get', 'bulk_get'):
+        print("{:<11} {:>5} round trips {:>9.2f} ms".format(
+            label, results['{}_round_trips'.format(label)], results['{}_seconds'.format(label)] * 1000))
+
+# === CLASSES ===
+class CountingConnection(redis.Connection):
+    def send_packed_command(self, command, check_health=True):
+        ROUND_TRIPS['count'] += 1
+        ROUND_TRIPS['bytes'] += len(command) if isinstance(command, bytes) else sum(len(part) for part in command)
+        super().send_packed_command(command, check_health)
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_bulk
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoChangeStream, InoModelBase, InoObjectBase
+
+from .bench_bulk import connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 500
+CHANGED_COUNT = 50  # Objects changed between the follower's reads
+
+# === FUNCTIONS ===
+def run(count=OBJECT_COUNT, changed_count=CHANGED_COUNT):
+    # The cost of the change events on saves, and a follower keeping up with changes by rescanning every object against
+    # reading the change stream
+    dstore = connect()
+    dstore.redis.flushdb()
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(10)})
+    plain = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    streamed = type('BenchStreamedModel', (InoModelBase,), {'object_class': obj_class,
+                                                            'change_stream': 'bench:changes'})(dstore)
+    objects = [obj_class() for _ in range(count)]
+    results = {}
+    for label, model in (('save', plain), ('save_streamed', streamed)):
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(
+            lambda model=model: model.save_many([obj_class(obj.get_dict()) for obj in objects]))
+    stream = InoChangeStream(dstore, 'bench:changes', 'bench', 'follower', count=count)
+    streamed.save_many(objects[:changed_count])
+
+    def follow():
+        changes = stream.read()
+        streamed.get_many([change.oid for change in changes])
+        stream.ack(changes)
+
+    for label, func in (('rescan', lambda: list(plain.iter_all())), ('follow', follow)):
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(func)
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} objects, {} changed".format(OBJECT_COUNT, CHANGED_COUNT))
+    for label in ('save', 'save_streamed', 'rescan', 'follow'):
+        print("{:<14} {:>5} round trips {:>9.2f} ms".format(
+            label, results['{}_round_trips'.format(label)], results['{}_seconds'.format(label)] * 1000))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_changes
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import sys
+import time
+import uuid
+
+import dateutil.parser
+
+from inovonics.cloud.datastore import fieldcodecs
+
+# === GLOBALS ===
+ROUND_TRIPS = 10 ** 6
+
+# The (encode, decode) pairs being compared for each type
+CODECS = {
+    'datetime': {
+        'legacy': (datetime.datetime.isoformat, dateutil.parser.parse),
+        'fast': (datetime.datetime.isoformat, fieldcodecs.parse_datetime),
+        'epoch_us': (fieldcodecs.datetime_to_epoch_us, fieldcodecs.parse_epoch_us)
+    },
+    'uuid': {
+        'legacy': (str, uuid.UUID),
+        'fast': (str, fieldcodecs.parse_uuid),
+        'bytes': (fieldcodecs.uuid_to_bytes, fieldcodecs.parse_uuid)
+    }
+}
+
+# === FUNCTIONS ===
+def round_trips(encode, decode, values, count):
+    # Time 'count' encode/decode round trips cycling through values
+    values = (values * (count // len(values) + 1))[:count]
+    start = time.perf_counter()
+    for value in values:
+        decode(encode(value))
+    return time.perf_counter() - start
+
+def run(count=ROUND_TRIPS, legacy_count=None):
+    # dateutil is slow enough that its round trips can be sampled with legacy_count and scaled up to 'count'.
+    samples = {
+        'datetime': [datetime.datetime.utcnow() - datetime.timedelta(seconds=i * 3607) for i in range(1000)],
+        'uuid': [uuid.uuid4() for _ in range(1000)]
+    }
+    results = {}
+    for field_type, codecs in CODECS.items():
+        for label, (encode, decode) in codecs.items():
+            runs = legacy_count if label == 'legacy' and legacy_count else count
+            elapsed = round_trips(encode, decode, samples[field_type], runs)
+            results['{}_{}_seconds'.format(field_type, label)] = elapsed * count / runs
+    return results
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ROUND_TRIPS
+    results = run(count)
+    print("{} round trips".format(count))
+    for field_type, codecs in CODECS.items():
+        legacy = results['{}_legacy_seconds'.format(field_type)]
+        for label in codecs:
+            elapsed = results['{}_{}_seconds'.format(field_type, label)]
+            print("{:<9}{:<9} {:>8.2f} s  {:>6.1f}x".format(field_type, label, elapsed, legacy / elapsed))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_codecs [round_trips]
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoObjectBase
+
+from .bench_schema import best_of, make_fields
+
+# === GLOBALS ===
+FIELD_COUNT = 30
+
+# === FUNCTIONS ===
+def run(number=2000, field_count=FIELD_COUNT):
+    fields = make_fields(field_count)
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': fields})
+    # The same fields with no defaults, as a class that only ever loads stored objects would declare them
+    bare_class = type('BareObject', (InoObjectBase,), {'fields': [dict(field, default=None) for field in fields]})
+    dictionary = obj_class().get_dict()
+    return {
+        'create_empty': best_of(obj_class, number),
+        'create_no_defaults': best_of(bare_class, number),
+        'create': best_of(lambda: obj_class(dictionary), number),
+        'load': best_of(lambda: obj_class(dictionary, load=True), number)
+    }
+
+def main():
+    number = 2000
+    results = run(number)
+    print("{} fields, {} iterations (usec per object)".format(FIELD_COUNT, number))
+    for case, baseline in (('create_empty', 'create_empty'), ('create_no_defaults', 'create_empty'),
+                           ('create', 'create'), ('load', 'create')):
+        print("{:<20} {:>7.2f}  speedup {:.2f}x".format(
+            case, results[case] / number * 1e6, results[baseline] / results[case]))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_defaults
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoModelBase, InoObjectBase
+
+from .bench_bulk import ROUND_TRIPS, connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 500
+FIELD_COUNT = 40
+
+# === FUNCTIONS ===
+def run(count=OBJECT_COUNT, field_count=FIELD_COUNT):
+    dstore = connect()
+    dstore.redis.flushdb()
+    fields = make_fields(field_count) + [{'name': 'online', 'type': 'bool'}]
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': fields})
+    model = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    objects = [obj_class() for _ in range(count)]
+    model.save_many(objects)
+
+    def heartbeat():
+        for obj in objects:
+            obj.online = not obj.online
+
+    def full_save():
+        # What every save wrote before dirty tracking: the whole hash
+        heartbeat()
+        with dstore.pipeline() as pipe:
+            for obj in objects:
+                pipe.hset(model._key(obj.oid), mapping=obj.get_hash())  # pylint: disable=protected-access
+        for obj in objects:
+            obj.clear_dirty()
+
+    def partial_save():
+        heartbeat()
+        model.save_many(objects)
+
+    results = {}
+    for label, func in (('full_save', full_save), ('partial_save', partial_save)):
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(func)
+        results['{}_bytes'.format(label)] = ROUND_TRIPS['bytes']
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} objects of {} fields, one bool changed per object".format(OBJECT_COUNT, FIELD_COUNT + 1))
+    for label in ('full_save', 'partial_save'):
+        print("{:<12} {:>9} bytes sent {:>9.2f} ms".format(
+            label, results['{}_bytes'.format(label)], results['{}_seconds'.format(label)] * 1000))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_dirty
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import time
+
+from inovonics.cloud.datastore import InoModelBase, InoObjectBase
+
+from .bench_bulk import connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 2000
+BATCH_SIZE = 200
+# Simulated per-batch processing time, which prefetching overlaps with the next read
+PROCESS_SECONDS = 0.005
+
+# === FUNCTIONS ===
+def run(count=OBJECT_COUNT, batch_size=BATCH_SIZE):
+    dstore = connect()
+    dstore.redis.flushdb()
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(10)})
+    model = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    model.save_many([obj_class() for _ in range(count)])
+
+    def keys_get():
+        # The KEYS plus individual fetch approach iter_all replaces
+        for i, key in enumerate(dstore.redis.keys(model.key_prefix + ':*'), 1):
+            obj_class.from_hash(dstore.redis.hgetall(key))
+            if not i % batch_size:
+                time.sleep(PROCESS_SECONDS)
+
+    def walk(prefetch):
+        for _, objects in model.iter_batches(batch_size, prefetch=prefetch):
+            time.sleep(PROCESS_SECONDS)
+            assert objects
+
+    results = {}
+    for label, func in (('keys_get', keys_get), ('iter_all', lambda: walk(False)),
+                        ('iter_all_prefetch', lambda: walk(True))):
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(func)
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} objects, batches of {}".format(OBJECT_COUNT, BATCH_SIZE))
+    for label in ('keys_get', 'iter_all', 'iter_all_prefetch'):
+        print("{:<17} {:>5} round trips {:>9.2f} ms".format(
+            label, results['{}_round_trips'.format(label)], results['{}_seconds'.format(label)] * 1000))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_iter
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoObjectBase
+
+from .bench_schema import best_of, make_fields
+
+# === GLOBALS ===
+FIELD_COUNT = 30
+# The fields a list endpoint typically reads
+PROJECTED = ('oid', 'field0', 'field1')
+
+# === FUNCTIONS ===
+def run(number=2000, field_count=FIELD_COUNT):
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(field_count)})
+    # The mapping as HGETALL returns it
+    mapping = {name.encode('utf-8'): value if isinstance(value, bytes) else str(value).encode('utf-8')
+               for name, value in obj_class().get_hash().items()}
+
+    def read(lazy):
+        obj = obj_class.from_hash(mapping, lazy=lazy)
+        return [getattr(obj, name) for name in PROJECTED]
+
+    def read_all(lazy):
+        return obj_class.from_hash(mapping, lazy=lazy).get_dict()
+
+    return {
+        'eager_projected': best_of(lambda: read(False), number),
+        'lazy_projected': best_of(lambda: read(True), number),
+        'eager_all': best_of(lambda: read_all(False), number),
+        'lazy_all': best_of(lambda: read_all(True), number)
+    }
+
+def main():
+    number = 2000
+    results = run(number)
+    print("{} fields, {} iterations (usec per object)".format(FIELD_COUNT, number))
+    for case, label in (('projected', "read {} fields".format(len(PROJECTED))), ('all', 'get_dict')):
+        eager = results['eager_{}'.format(case)]
+        lazy = results['lazy_{}'.format(case)]
+        print("{:<14} eager {:>7.2f}  lazy {:>7.2f}  speedup {:.2f}x".format(
+            label, eager / number * 1e6, lazy / number * 1e6, eager / lazy))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_lazy
+    main()
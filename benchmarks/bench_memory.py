@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import gc
+import tracemalloc
+import types
+
+from inovonics.cloud.datastore import InoObjectBase
+
+from .bench_schema import LegacyObjectBase, make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 10 ** 5
+FIELD_COUNT = 10
+
+# === FUNCTIONS ===
+def measure(obj_class, dictionary, count):
+    # Bytes allocated (and still alive) per object after building 'count' objects from the same dictionary.
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [obj_class(dictionary) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+def run(count=OBJECT_COUNT, field_count=FIELD_COUNT):
+    # Only the scalar types are used so the field values themselves are shared and the numbers show the per-object
+    # representation overhead.
+    fields = [field for field in make_fields(field_count * 2) if field['type'] in ('bool', 'int', 'str', 'uuid')]
+    fields = fields[:field_count]
+    legacy_class = type('LegacyObject', (LegacyObjectBase,), {'fields': fields})
+    regular_class = type('RegularObject', (InoObjectBase,), {'fields': fields})
+    compact_class = types.new_class('CompactObject', (InoObjectBase,), {'compact': True},
+                                    lambda namespace: namespace.update(fields=fields))
+    dictionary = {field['name']: value for field, value in zip(fields, regular_class().get_dict().values())}
+    return {
+        'legacy_bytes_per_object': measure(legacy_class, dictionary, count),
+        'regular_bytes_per_object': measure(regular_class, dictionary, count),
+        'compact_bytes_per_object': measure(compact_class, dictionary, count)
+    }
+
+def main():
+    results = run()
+    print("{} objects, {} fields".format(OBJECT_COUNT, FIELD_COUNT))
+    for label in ('legacy', 'regular', 'compact'):
+        print("{:<8} {:>8.1f} bytes/object".format(label, results['{}_bytes_per_object'.format(label)]))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_memory
+    main()
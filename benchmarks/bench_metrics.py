@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, InoMetrics
+
+from .bench_bulk import connect
+from .bench_schema import best_of, make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 500
+
+# === FUNCTIONS ===
+def run(count=OBJECT_COUNT):
+    dstore = connect()
+    dstore.redis.flushdb()
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(10)})
+    model_class = type('BenchModel', (InoModelBase,), {'object_class': obj_class})
+    objects = [obj_class() for _ in range(count)]
+    oids = [obj.oid for obj in objects]
+    results = {}
+    metrics = InoMetrics()
+    # The same connection pool, with and without a registry
+    metered = InoRedis(dstore.redis_host, connection_pool=dstore.connection_pool, metrics=metrics)
+    for label, datastore in (('disabled', dstore), ('enabled', metered)):
+        model = model_class(datastore)
+
+        def save_get():
+            for obj in objects:
+                obj.mark_dirty('str0')
+            model.save_many(objects)
+            model.get_many(oids)
+
+        results['{}_seconds'.format(label)] = best_of(save_get, 1)
+    results['prometheus_lines'] = len(metrics.to_prometheus().splitlines())
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("save_many + get_many of {} objects".format(OBJECT_COUNT))
+    for label in ('disabled', 'enabled'):
+        print("metrics {:<9} {:>9.2f} ms".format(label, results['{}_seconds'.format(label)] * 1000))
+    print("overhead {:.1%}, {} exported lines".format(
+        results['enabled_seconds'] / results['disabled_seconds'] - 1, results['prometheus_lines']))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_metrics
+    main()
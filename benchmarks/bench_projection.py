@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoModelBase, InoObjectBase
+
+from .bench_bulk import connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 500
+FIELD_COUNT = 40
+PROJECTED = ['field0', 'field1']
+
+# === FUNCTIONS ===
+def payload_size(reply):
+    # Bytes of field names and values in an HGETALL (dict) or HMGET (list) reply
+    if isinstance(reply, dict):
+        return sum(len(name) + len(value) for name, value in reply.items())
+    return sum(len(value) for value in reply if value is not None)
+
+def run(count=OBJECT_COUNT, field_count=FIELD_COUNT):
+    dstore = connect()
+    dstore.redis.flushdb()
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(field_count)})
+    model = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    objects = [obj_class() for _ in range(count)]
+    model.save_many(objects)
+    oids = [obj.oid for obj in objects]
+    fields = model._projection(PROJECTED)  # pylint: disable=protected-access
+
+    results = {}
+    for label, func in (('full', lambda: model.get_many(oids)),
+                        ('projected', lambda: model.get_many(oids, fields=PROJECTED))):
+        results['{}_seconds'.format(label)], _ = measure(func)
+    key = model._key(oids[0])  # pylint: disable=protected-access
+    results['full_bytes'] = payload_size(dstore.redis.hgetall(key)) * count
+    results['projected_bytes'] = payload_size(dstore.redis.hmget(key, fields)) * count
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} objects of {} fields, reading oid + {}".format(OBJECT_COUNT, FIELD_COUNT, ', '.join(PROJECTED)))
+    for label in ('full', 'projected'):
+        print("{:<10} {:>9} bytes received {:>9.2f} ms".format(
+            label, results['{}_bytes'.format(label)], results['{}_seconds'.format(label)] * 1000))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_projection
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoObjectBase
+
+from .bench_schema import best_of, make_fields
+
+# === GLOBALS ===
+FIELD_COUNT = 30
+ROW_COUNT = 1000
+
+# === FUNCTIONS ===
+def run(number=5, field_count=FIELD_COUNT, row_count=ROW_COUNT):
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': make_fields(field_count)})
+    # The mappings as HGETALL returns them
+    rows = [{name.encode('utf-8'): value if isinstance(value, bytes) else str(value).encode('utf-8')
+             for name, value in obj_class().get_hash().items()} for _ in range(row_count)]
+    return {
+        'from_hash': best_of(lambda: [obj_class.from_hash(row) for row in rows], number),
+        'from_rows': best_of(lambda: obj_class.from_rows(rows), number),
+        'columns_from_rows': best_of(lambda: obj_class.columns_from_rows(rows), number)
+    }
+
+def main():
+    number = 5
+    results = run(number)
+    print("{} fields, {} rows, {} iterations (usec per row)".format(FIELD_COUNT, ROW_COUNT, number))
+    baseline = results['from_hash']
+    for case in ('from_hash', 'from_rows', 'columns_from_rows'):
+        print("{:<18} {:>7.2f}  speedup {:.2f}x".format(
+            case, results[case] / number / ROW_COUNT * 1e6, baseline / results[case]))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_rows
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import logging
+import timeit
+import uuid
+
+import dateutil.parser
+
+from inovonics.cloud.datastore import InoObjectBase
+
+# === GLOBALS ===
+FIELD_COUNT = 30
+
+# === FUNCTIONS ===
+def make_fields(count):
+    # Build a representative field list cycling through the supported types.
+    types = ['bool', 'datetime', 'float', 'int', 'list', 'str', 'uuid']
+    fields = [{'name': 'oid', 'type': 'uuid'}]
+    for i in range(count - 1):
+        fields.append({'name': 'field{}'.format(i), 'type': types[i % len(types)]})
+    return fields
+
+def best_of(func, number, repeat=5):
+    # Take the fastest of several runs to keep scheduler noise out of the comparison.
+    return min(timeit.repeat(func, number=number, repeat=repeat))
+
+def run(number=2000, field_count=FIELD_COUNT):
+    fields = make_fields(field_count)
+    compiled_class = type('CompiledObject', (InoObjectBase,), {'fields': fields})
+    legacy_class = type('LegacyObject', (LegacyObjectBase,), {'fields': fields})
+    dictionary = compiled_class().get_dict()
+
+    results = {}
+    for label, obj_class in (('legacy', legacy_class), ('compiled', compiled_class)):
+        obj = obj_class(dictionary)
+        results['{}_init'.format(label)] = best_of(obj_class, number)
+        results['{}_set_fields'.format(label)] = best_of(lambda: obj.set_fields(dictionary), number)
+        results['{}_get_dict'.format(label)] = best_of(obj.get_dict, number)
+    return results
+
+def main():
+    number = 1000
+    results = run(number)
+    print("{} fields, {} iterations (usec per call)".format(FIELD_COUNT, number))
+    for operation in ('init', 'set_fields', 'get_dict'):
+        legacy = results['legacy_{}'.format(operation)]
+        compiled = results['compiled_{}'.format(operation)]
+        print("{:<12} legacy {:>9.2f}  compiled {:>9.2f}  speedup {:.2f}x".format(
+            operation, legacy / number * 1e6, compiled / number * 1e6, legacy / compiled))
+
+# === CLASSES ===
+class LegacyObjectBase:
+    # Verbatim copy of the pre-schema InoObjectBase hot paths, kept as the comparison baseline.
+    fields = [{'name': 'oid', 'type': 'uuid'}]
+
+    def __init__(self, dictionary=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        for field in self.fields:
+            if field['type'] == 'bool':
+                setattr(self, field['name'], False)
+            elif field['type'] == 'datetime':
+                setattr(self, field['name'], datetime.datetime.utcnow())
+            elif field['type'] == 'float':
+                setattr(self, field['name'], 0.0)
+            elif field['type'] == 'int':
+                setattr(self, field['name'], 0)
+            elif field['type'] == 'list':
+                setattr(self, field['name'], [])
+            elif field['type'] == 'str':
+                setattr(self, field['name'], '')
+            elif field['type'] == 'uuid':
+                setattr(self, field['name'], uuid.uuid4())
+            else:
+                raise TypeError
+        self.validation_methods = [self._validate_oid, self._validate_custom]
+        self.fields_custom = []
+        if dictionary:
+            self.set_fields(dictionary)
+
+    def get_dict(self):
+        dictionary = {}
+        for field in self.fields:
+            if field['type'] == 'datetime':
+                dictionary[field['name']] = getattr(self, field['name']).isoformat()
+            elif field['type'] == 'uuid':
+                dictionary[field['name']] = str(getattr(self, field['name']))
+            else:
+                dictionary[field['name']] = getattr(self, field['name'])
+        for field in self.fields_custom:
+            dictionary[field] = getattr(self, field)
+        return dictionary
+
+    def set_fields(self, dictionary):
+        if dictionary:
+            for field in dictionary:
+                self.logger.debug("field: %s", field)
+                if field in [i['name'] for i in self.fields]:
+                    field_entry = [i for i in self.fields if i['name'] == field][0]
+                    self.logger.debug("field_entry: %s", field_entry)
+                    if field_entry['type'] == 'datetime':
+                        setattr(self, field_entry['name'], dateutil.parser.parse(dictionary[field]))
+                    elif field_entry['type'] == 'uuid':
+                        setattr(self, field_entry['name'], uuid.UUID(dictionary[field]))
+                    else:
+                        setattr(self, field_entry['name'], dictionary[field])
+                elif field in self.fields_custom:
+                    setattr(self, field, dictionary[field])
+                elif field.startswith('custom_'):
+                    self.fields_custom.append(field)
+                    setattr(self, field, dictionary[field])
+        return self._validate_fields()
+
+    def _validate_fields(self):
+        errors = []
+        for v_method in self.validation_methods:
+            error = v_method()
+            if error is not None:
+                errors.append(error)
+        return errors
+
+    def _validate_oid(self):
+        if not isinstance(getattr(self, 'oid'), uuid.UUID):
+            return "oid not of type uuid.UUID"
+        return None
+
+    def _validate_custom(self):
+        for field in self.fields_custom:
+            if not isinstance(getattr(self, field), str):
+                return "{} not of type str".format(field)
+        return None
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_schema
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import threading
+
+from inovonics.cloud.datastore import InoModelBase, InoObjectBase
+
+from .bench_bulk import connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+THREAD_COUNT = 8
+HOT_COUNT = 5  # Objects every thread keeps saving
+SAVE_COUNT = 100  # Saves per thread
+
+# === FUNCTIONS ===
+def run(thread_count=THREAD_COUNT, hot_count=HOT_COUNT, save_count=SAVE_COUNT):
+    # Threads saving the same few indexed objects, with the save script and with WATCH/MULTI (scripted = False)
+    dstore = connect()
+    dstore.redis.flushdb()
+    fields = make_fields(10) + [{'name': 'site', 'type': 'str', 'index': 'hash'},
+                                {'name': 'level', 'type': 'int', 'index': 'sorted'}]
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': fields})
+    hot = [obj_class({'site': 'site0', 'level': 0}) for _ in range(hot_count)]
+    results = {}
+    for label, scripted in (('watch', False), ('script', True)):
+        model = type('BenchModel', (InoModelBase,), {'object_class': obj_class, 'scripted': scripted})(dstore)
+        model.save_many(hot)
+        errors = []
+
+        def worker(number):
+            objects = [obj_class(obj.get_dict()) for obj in hot]  # pylint: disable=cell-var-from-loop
+            for i in range(save_count):
+                obj = objects[i % hot_count]
+                obj.site = 'site{}'.format((number + i) % 3)
+                obj.level = i
+                errors.extend(model.save_many([obj]).values())  # pylint: disable=cell-var-from-loop
+
+        def contend():
+            threads = [threading.Thread(target=worker, args=(number,)) for number in range(thread_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(contend)
+        results['{}_errors'.format(label)] = len(errors)
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} threads saving {} objects {} times each".format(THREAD_COUNT, HOT_COUNT, SAVE_COUNT))
+    for label in ('watch', 'script'):
+        print("{:<6} {:>6} round trips {:>9.2f} ms {:>4} errors".format(
+            label, results['{}_round_trips'.format(label)], results['{}_seconds'.format(label)] * 1000,
+            results['{}_errors'.format(label)]))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_scripts
+    main()
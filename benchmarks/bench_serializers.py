@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import json
+import timeit
+
+from inovonics.cloud.datastore import InoObjectBase
+
+# === GLOBALS ===
+FIELDS = [{'name': 'oid', 'type': 'uuid'}, {'name': 'site_oid', 'type': 'uuid'}, {'name': 'name', 'type': 'str'},
+          {'name': 'serial', 'type': 'int'}, {'name': 'enabled', 'type': 'bool'}, {'name': 'battery', 'type': 'float'},
+          {'name': 'created', 'type': 'datetime'}, {'name': 'modified', 'type': 'datetime'},
+          {'name': 'tags', 'type': 'list'}]
+
+# === FUNCTIONS ===
+def hash_bytes(mapping):
+    # Approximate payload of an HSET: field names plus values as redis-py would encode them
+    return sum(len(name) + len(value if isinstance(value, bytes) else str(value).encode('utf-8'))
+               for name, value in mapping.items())
+
+def to_hash_bytes(mapping):
+    return {name.encode('utf-8'): value if isinstance(value, bytes) else str(value).encode('utf-8')
+            for name, value in mapping.items()}
+
+def run(number=5000):
+    obj_class = type('Device', (InoObjectBase,), {'fields': FIELDS})
+    obj = obj_class({'name': 'Front door sensor', 'serial': 123456789, 'enabled': True, 'battery': 2.95,
+                     'tags': ['door', 'entry', 'zone-3']})
+    stored_hash = to_hash_bytes(obj.get_hash())
+    stored = {
+        'json': json.dumps(obj.get_dict()).encode('utf-8'),
+        'msgpack': obj.to_bytes('msgpack'),
+        'struct': obj.to_bytes('struct')
+    }
+    encoders = {
+        'json': lambda: json.dumps(obj.get_dict()),
+        'hash': obj.get_hash,
+        'msgpack': lambda: obj.to_bytes('msgpack'),
+        'struct': lambda: obj.to_bytes('struct')
+    }
+    decoders = {
+        'json': lambda: obj_class(json.loads(stored['json'])),
+        'hash': lambda: obj_class.from_hash(stored_hash),
+        'msgpack': lambda: obj_class.from_bytes(stored['msgpack']),
+        'struct': lambda: obj_class.from_bytes(stored['struct'])
+    }
+    results = {'hash_bytes': hash_bytes(obj.get_hash())}
+    for label, data in stored.items():
+        results['{}_bytes'.format(label)] = len(data)
+    for label in encoders:
+        results['{}_encode_seconds'.format(label)] = min(timeit.repeat(encoders[label], number=number, repeat=3))
+        results['{}_decode_seconds'.format(label)] = min(timeit.repeat(decoders[label], number=number, repeat=3))
+    return results
+
+def main():
+    number = 5000
+    results = run(number)
+    print("{:<8} {:>6} {:>12} {:>12}".format('format', 'bytes', 'encode usec', 'decode usec'))
+    for label in ('json', 'hash', 'msgpack', 'struct'):
+        print("{:<8} {:>6} {:>12.2f} {:>12.2f}".format(
+            label, results['{}_bytes'.format(label)], results['{}_encode_seconds'.format(label)] / number * 1e6,
+            results['{}_decode_seconds'.format(label)] / number * 1e6))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_serializers
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import os
+
+from inovonics.cloud.datastore import InoShardedRedis, InoModelBase, InoObjectBase
+
+from .bench_bulk import CountingConnection, connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 2000
+NODE_COUNT = 4
+
+# === FUNCTIONS ===
+def connect_sharded(node_count=NODE_COUNT):
+    # Node i is the REDIS_HOST/REDIS_PORT server's database REDIS_DB + i, unless REDIS_NODES lists host:port pairs of
+    # separate servers (e.g. 'localhost:6379,localhost:6380')
+    host, port, db = os.getenv('REDIS_HOST', 'localhost'), os.getenv('REDIS_PORT', 6379), int(os.getenv('REDIS_DB', 0))
+    if os.getenv('REDIS_NODES'):
+        nodes = [tuple(node.split(':')) + (db,) for node in os.getenv('REDIS_NODES').split(',')]
+    else:
+        nodes = [(host, port, db + i) for i in range(node_count)]
+    dstore = InoShardedRedis(nodes)
+    for node in dstore.nodes:
+        node.redis.connection_pool.disconnect()
+        node.redis.connection_pool.connection_class = CountingConnection
+    return dstore
+
+def run(count=OBJECT_COUNT, node_count=NODE_COUNT):
+    fields = make_fields(10) + [{'name': 'level', 'type': 'int', 'index': 'sorted'}]
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': fields})
+    model_class = type('BenchModel', (InoModelBase,), {'object_class': obj_class})
+    results = {}
+    for label, dstore in (('single', connect()), ('sharded', connect_sharded(node_count))):
+        for node in dstore.nodes:
+            node.redis.flushdb()
+        model = model_class(dstore)
+        objects = [obj_class({'level': i}) for i in range(count)]
+        oids = [obj.oid for obj in objects]
+        for operation, func in (('save', lambda: model.save_many(objects)),  # pylint: disable=cell-var-from-loop
+                                ('get', lambda: model.get_many(oids)),  # pylint: disable=cell-var-from-loop
+                                ('range', lambda: model.range_by('level', count // 2, count // 2 + 99))):  # pylint: disable=W0640
+            results['{}_{}_seconds'.format(label, operation)], results['{}_{}_round_trips'.format(label, operation)] = \
+                measure(func)
+        for node in dstore.nodes:
+            node.redis.flushdb()
+        dstore.close()
+    return results
+
+def main():
+    results = run()
+    print("{} objects, {} nodes".format(OBJECT_COUNT, NODE_COUNT))
+    for label in ('single', 'sharded'):
+        for operation in ('save', 'get', 'range'):
+            key = '{}_{}'.format(label, operation)
+            print("{:<14} {:>5} round trips {:>9.2f} ms".format(
+                key, results[key + '_round_trips'], results[key + '_seconds'] * 1000))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_sharding
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+
+from inovonics.cloud.datastore import InoModelBase, InoObjectBase
+
+from .bench_bulk import connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+OBJECT_COUNT = 2000
+PAGE_SIZE = 50
+
+# === FUNCTIONS ===
+def run(count=OBJECT_COUNT, page_size=PAGE_SIZE):
+    # "The page of objects modified in the last hour, newest first": filtering iter_all in Python against range_by on a
+    # sorted index of the field
+    dstore = connect()
+    dstore.redis.flushdb()
+    fields = make_fields(10) + [{'name': 'modified', 'type': 'datetime', 'index': 'sorted', 'retention': 86400}]
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': fields})
+    model = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    now = datetime.datetime.utcnow()
+    # One object a minute, so the last hour holds 60 of them
+    model.save_many([obj_class({'modified': now - datetime.timedelta(minutes=i)}) for i in range(count)])
+    since = now - datetime.timedelta(hours=1)
+
+    def scan():
+        matches = [obj for obj in model.iter_all() if obj.modified >= since]
+        return sorted(matches, key=lambda obj: obj.modified, reverse=True)[:page_size]
+
+    results = {}
+    for label, func in (('scan', scan), ('range_by', lambda: model.range_by('modified', low=since, count=page_size,
+                                                                             reverse=True))):
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(func)
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} objects, newest {} modified in the last hour".format(OBJECT_COUNT, PAGE_SIZE))
+    for label in ('scan', 'range_by'):
+        print("{:<9} {:>5} round trips {:>9.2f} ms".format(
+            label, results['{}_round_trips'.format(label)], results['{}_seconds'.format(label)] * 1000))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_timeline
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import os
+import time
+
+from inovonics.cloud.datastore import InoObjectBase, InoProcessPool
+
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+FIELD_COUNT = 30
+ROW_COUNT = 50000
+
+# === FUNCTIONS ===
+def count_valid(objects, errors):  # pylint: disable=unused-argument
+    # The aggregate the map_rows case sends back instead of the objects
+    return len(objects)
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def run(row_count=ROW_COUNT, processes=None):
+    # The objects are pickled by reference to this module's class, so the workers can import it
+    rows = [{name.encode('utf-8'): value if isinstance(value, bytes) else str(value).encode('utf-8')
+             for name, value in BenchObject().get_hash().items()} for _ in range(row_count)]
+    with InoProcessPool(processes) as pool:
+        # Start the workers before timing
+        pool.map_rows(count_valid, BenchObject, rows[:1])
+        return {
+            'from_rows': timed(lambda: BenchObject.from_rows(rows)),
+            'pool_from_rows': timed(lambda: pool.from_rows(BenchObject, rows)),
+            'pool_map_rows': timed(lambda: pool.map_rows(count_valid, BenchObject, rows))
+        }
+
+def main():
+    results = run()
+    print("{} fields, {} rows, {} cores".format(FIELD_COUNT, ROW_COUNT, os.cpu_count()))
+    for case in ('from_rows', 'pool_from_rows', 'pool_map_rows'):
+        print("{:<15} {:>9.2f} ms  speedup {:.2f}x".format(
+            case, results[case] * 1000, results['from_rows'] / results[case]))
+
+# === CLASSES ===
+class BenchObject(InoObjectBase):
+    fields = make_fields(FIELD_COUNT)
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_workers
+    main()
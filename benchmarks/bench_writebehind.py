@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from inovonics.cloud.datastore import InoModelBase, InoObjectBase, InoWriteBehind
+
+from .bench_bulk import connect, measure
+from .bench_schema import make_fields
+
+# === GLOBALS ===
+DEVICE_COUNT = 200
+UPDATE_COUNT = 20  # Updates per device
+
+# === FUNCTIONS ===
+def run(device_count=DEVICE_COUNT, update_count=UPDATE_COUNT):
+    dstore = connect()
+    dstore.redis.flushdb()
+    fields = make_fields(10) + [{'name': 'level', 'type': 'int'}]
+    obj_class = type('BenchObject', (InoObjectBase,), {'fields': fields})
+    model = type('BenchModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    devices = [obj_class({'level': 0}) for _ in range(device_count)]
+    model.save_many(devices)
+
+    def updates():
+        # Interleaved updates, as they'd arrive from many devices reporting in
+        for level in range(1, update_count + 1):
+            for obj in devices:
+                obj.level = level
+                yield obj
+
+    def direct_save():
+        for obj in updates():
+            model.save(obj)
+
+    writer = InoWriteBehind(model, max_delay=60)
+
+    def write_behind():
+        for obj in updates():
+            writer.put(obj)
+        writer.flush()
+
+    results = {}
+    for label, func in (('direct_save', direct_save), ('write_behind', write_behind)):
+        results['{}_seconds'.format(label)], results['{}_round_trips'.format(label)] = measure(func)
+    writer.close()
+    results.update(('write_behind_{}'.format(key), value) for key, value in writer.get_stats().items())
+    dstore.redis.flushdb()
+    return results
+
+def main():
+    results = run()
+    print("{} devices, {} updates each".format(DEVICE_COUNT, UPDATE_COUNT))
+    for label in ('direct_save', 'write_behind'):
+        print("{:<13} {:>5} round trips {:>9.2f} ms".format(
+            label, results['{}_round_trips'.format(label)], results['{}_seconds'.format(label)] * 1000))
+    print("coalesced {} of {} puts into {} flushes, max flush {:.2f} ms".format(
+        results['write_behind_coalesced'], results['write_behind_queued'], results['write_behind_flushes'],
+        results['write_behind_max_flush_seconds'] * 1000))
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with: python3 -m benchmarks.bench_writebehind
+    main()
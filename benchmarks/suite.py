@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import redis
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+from inovonics.cloud.datastore import InoModelBase, InoObjectBase
+
+from .bench_bulk import connect, measure
+from .bench_schema import best_of, make_fields
+
+# === GLOBALS ===
+# The regression suite: the InoObjectBase hot paths for a range of field counts (mixed types) and for each field type,
+# and the model's bulk reads and writes against a Redis server.  Timings are per call; the model cases also record the
+# round trips a call takes, which don't vary between machines.  --compare checks the round trips only, since timings
+# are only comparable with a baseline saved on the same machine and server; add --timings to check those too.
+FIELD_COUNTS = (5, 20, 50)
+FIELD_TYPES = ('bool', 'datetime', 'float', 'int', 'list', 'str', 'uuid')
+TYPED_FIELD_COUNT = 20
+OBJECT_NUMBER = 200  # Calls per timing of an object case
+MODEL_OBJECT_COUNT = 500
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+THRESHOLD = 0.25
+
+# === FUNCTIONS ===
+def typed_fields(field_type, count):
+    return [{'name': 'oid', 'type': 'uuid'}] + [{'name': 'field{}'.format(i), 'type': field_type}
+                                                for i in range(count - 1)]
+
+def object_cases():
+    # (name, function, calls per timing) for each object shape
+    shapes = [('mixed{}'.format(count), make_fields(count)) for count in FIELD_COUNTS]
+    shapes.extend(('{}{}'.format(field_type, TYPED_FIELD_COUNT), typed_fields(field_type, TYPED_FIELD_COUNT))
+                  for field_type in FIELD_TYPES)
+    cases = []
+    for shape, fields in shapes:
+        obj_class = type('Suite{}'.format(shape.capitalize()), (InoObjectBase,), {'fields': fields})
+        obj = obj_class()
+        dictionary = obj.get_dict()
+        mapping = obj.get_hash()
+        cases.extend([
+            ('object.{}.init'.format(shape), obj_class),
+            ('object.{}.set_fields'.format(shape), lambda obj=obj, dictionary=dictionary: obj.set_fields(dictionary)),
+            ('object.{}.get_dict'.format(shape), obj.get_dict),
+            ('object.{}.validate'.format(shape), obj.validate),
+            ('object.{}.from_hash'.format(shape), lambda obj_class=obj_class, mapping=mapping:
+             obj_class.from_hash(mapping)),
+            ('object.{}.get_hash'.format(shape), obj.get_hash)])
+    return [(name, func, OBJECT_NUMBER) for name, func in cases]
+
+def model_cases(dstore):
+    # (name, function, calls per timing) for the model's bulk calls on MODEL_OBJECT_COUNT stored objects
+    obj_class = type('SuiteObject', (InoObjectBase,), {'fields': make_fields(10)})
+    model = type('SuiteModel', (InoModelBase,), {'object_class': obj_class})(dstore)
+    objects = [obj_class() for _ in range(MODEL_OBJECT_COUNT)]
+    oids = [obj.oid for obj in objects]
+    names = obj_class().get_loaded_fields()
+    model.save_many(objects)
+
+    def save_full():
+        for obj in objects:
+            obj.mark_dirty(*names)
+        model.save_many(objects)
+
+    def save_partial():
+        for obj in objects:
+            obj.mark_dirty('field0')
+        model.save_many(objects)
+
+    return [
+        ('model.save_many', save_full, 1),
+        ('model.save_many_partial', save_partial, 1),
+        ('model.get_many', lambda: model.get_many(oids), 1),
+        ('model.get_many_lazy', lambda: model.get_many(oids, lazy=True), 1),
+        ('model.get_many_projected', lambda: model.get_many(oids, fields=['field0']), 1),
+        ('model.iter_all', lambda: list(model.iter_all()), 1)]
+
+def run(server='env'):
+    # Returns case name -> {'seconds': per call[, 'round_trips': per call]}
+    stop = start_server(server)
+    try:
+        results = {}
+        for name, func, number in object_cases():
+            func()  # Warm up caches (the compiled validators, codecs) before timing
+            results[name] = {'seconds': best_of(func, number) / number}
+        dstore = connect()
+        dstore.redis.flushdb()
+        for name, func, number in model_cases(dstore):
+            results[name] = {'seconds': best_of(func, number) / number, 'round_trips': measure(func)[1]}
+        dstore.redis.flushdb()
+        dstore.close()
+        return results
+    finally:
+        stop()
+
+def start_server(kind):
+    # Point REDIS_HOST/REDIS_PORT (read by bench_bulk.connect) at the server to benchmark against and return a function
+    # that stops it.  'env' uses the server the environment already names, 'fake' runs fakeredis in-process and 'spawn'
+    # starts a scratch redis-server.
+    if kind == 'env':
+        return lambda: None
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    if kind == 'fake':
+        if fakeredis is None:
+            raise ImportError("--server fake requires the fakeredis package")
+        server = fakeredis.TcpFakeServer(('127.0.0.1', port), server_type='redis')
+        threading.Thread(target=server.serve_forever, name='fakeredis', daemon=True).start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+    else:
+        process = subprocess.Popen(['redis-server', '--port', str(port), '--save', '', '--appendonly', 'no'],
+                                   stdout=subprocess.DEVNULL)
+
+        def stop():
+            process.terminate()
+            process.wait()
+    os.environ.update({'REDIS_HOST': '127.0.0.1', 'REDIS_PORT': str(port), 'REDIS_DB': '0'})
+    client = redis.StrictRedis(host='127.0.0.1', port=port)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            client.ping()
+            break
+        except redis.ConnectionError:
+            if time.monotonic() > deadline:
+                stop()
+                raise
+            time.sleep(0.05)
+    client.close()
+    return stop
+
+def compare(results, baseline, threshold=None):
+    # The regressions in results against baseline: (case, metric, baseline value, value) for any increase in round
+    # trips and, given a threshold, for timings more than threshold slower
+    regressions = []
+    for name, values in sorted(results.items()):
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if threshold is not None and values['seconds'] > old['seconds'] * (1 + threshold):
+            regressions.append((name, 'seconds', old['seconds'], values['seconds']))
+        if 'round_trips' in old and values.get('round_trips', 0) > old['round_trips']:
+            regressions.append((name, 'round_trips', old['round_trips'], values['round_trips']))
+    return regressions
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)['results']
+
+def save_baseline(path, results, server):
+    data = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'server': server,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(data, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the datastore benchmark suite.")
+    parser.add_argument('--server', choices=('env', 'fake', 'spawn'), default='env',
+                        help="Redis to run the model cases against (default: REDIS_HOST/REDIS_PORT)")
+    parser.add_argument('--baseline', default=BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument('--save', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--compare', action='store_true',
+                        help="compare the round trips with the baseline; exit 1 on regressions")
+    parser.add_argument('--timings', action='store_true',
+                        help="with --compare, also flag timings (only meaningful against a baseline from this machine)")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="fraction a timing may slow down before it's flagged (default: %(default)s)")
+    args = parser.parse_args()
+
+    results = run(args.server)
+    baseline = load_baseline(args.baseline) if args.compare else {}
+    for name, values in sorted(results.items()):
+        line = "{:<36} {:>11.2f} usec".format(name, values['seconds'] * 1e6)
+        if 'round_trips' in values:
+            line += " {:>5} round trips".format(values['round_trips'])
+        if name in baseline:
+            line += " {:>+7.1%}".format(values['seconds'] / baseline[name]['seconds'] - 1)
+        print(line)
+    if args.save:
+        save_baseline(args.baseline, results, args.server)
+        print("Saved baseline to {}".format(args.baseline))
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold if args.timings else None)
+        for name, metric, old, new in regressions:
+            print("REGRESSION {} {}: {:.6g} -> {:.6g}".format(name, metric, old, new))
+        if regressions:
+            sys.exit(1)
+        if args.timings:
+            print("No regressions beyond {:.0%}".format(args.threshold))
+        else:
+            print("No round trip regressions")
+
+# === CLASSES ===
+
+# === MAIN ===
+if __name__ == '__main__':
+    # Run from the base directory of the package with:
+    # python3 -m benchmarks.suite [--server fake] [--save|--compare [--timings]]
+    main()
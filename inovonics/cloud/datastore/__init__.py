@@ -3,9 +3,19 @@
 # === IMPORTS ===
 from .__version__ import __version__
 
-from .exceptions import DuplicateException, ExistsException, InvalidDataException, NotExistsException, UnauthorizedException, ForbiddenException
+from .exceptions import ConflictException, DuplicateException, ExistsException, InvalidDataException, \
+    NotExistsException, NotLoadedException, UnauthorizedException, ForbiddenException, ValidationException
 from .inoredis import InoRedis
-from .bases import InoModelBase, InoObjectBase
+from .sharding import InoShardedRedis
+from .bases import InoModelBase, InoObjectBase, InoObjectMeta
+from .asyncinoredis import AsyncInoRedis
+from .asyncbases import AsyncInoModelBase
+from .cache import InoObjectCache
+from .changes import InoChange, InoChangeStream
+from .metrics import InoMetrics
+from .validation import FieldError
+from .writebehind import InoWriteBehind
+from .workers import InoProcessPool
 
 # === GLOBALS ===
 
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+# The asyncio model mirrors InoModelBase's I/O line for line, only awaited
+# pylint: disable=duplicate-code
+
+# === IMPORTS ===
+import asyncio
+import redis
+
+from .bases import _InoModelCore
+from .indexes import index_value, score_limit
+from .metrics import timed_operation
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class AsyncInoModelBase(_InoModelCore):
+    # The asyncio counterpart of InoModelBase.  The datastore should be an AsyncInoRedis; the settings, keys,
+    # serialization and validation are shared with the synchronous model (see _InoModelCore), only the I/O is awaited.
+    # The chunks of a bulk call are sent as separate pipelines concurrently (asyncio.gather) instead of one after
+    # another.  Indexes and version_field are maintained and checked as InoModelBase does with WATCH/MULTI; the save
+    # script isn't used.  iter_all is an async generator, and iter_batches, the prefetching and the primary arguments
+    # (an AsyncInoRedis has no replicas) have no counterparts.
+    async def get(self, oid, lazy=False, fields=None):
+        objects, errors = await self.get_many([oid], lazy=lazy, fields=fields)
+        if errors:
+            raise errors[oid]
+        return objects[0]
+
+    async def save(self, obj):
+        errors = await self.save_many([obj])
+        if errors:
+            raise errors[obj.oid]
+
+    async def delete(self, oid):
+        errors = await self.delete_many([oid])
+        if errors:
+            raise errors[oid]
+
+    @timed_operation
+    async def get_many(self, oids, chunk_size=None, lazy=False, fields=None):
+        # pylint: disable=too-many-locals
+        oids = list(oids)
+        fields = self._projection(fields)
+        found = self._get_cached(oids)
+        chunks = list(self._chunks([oid for oid in oids if oid not in found], chunk_size))
+        since = self._cache_sequence()
+        results = await asyncio.gather(*[self._get_chunk(chunk, fields) for chunk in chunks])
+        errors = {}
+        for chunk, raws in zip(chunks, results):
+            with self._timed('hydrate', len(chunk)):
+                loaded, failed = self._hydrate_many(zip(chunk, raws), lazy, fields)
+            errors.update(failed)
+            for oid, obj in loaded:
+                found[oid] = obj
+                if fields is None:
+                    self._cache_put(obj, since)
+        return [found[oid] for oid in oids if oid in found], errors
+
+    @timed_operation
+    async def get_columns(self, oids, fields=None, chunk_size=None):
+        self._check_columns()
+        oids = list(oids)
+        fields = self._projection(fields)
+        chunks = list(self._chunks(oids, chunk_size))
+        results = await asyncio.gather(*[self._get_chunk(chunk, fields) for chunk in chunks])
+        found = {}
+        errors = {}
+        for chunk, raws in zip(chunks, results):
+            self._collect_rows(zip(chunk, raws), fields, found, errors)
+        return self._columns(oids, found), errors
+
+    async def create(self, obj):
+        errors = await self.create_many([obj])
+        if errors:
+            raise errors[obj.oid]
+
+    async def update(self, obj):
+        errors = await self.update_many([obj])
+        if errors:
+            raise errors[obj.oid]
+
+    @timed_operation
+    async def save_many(self, objects, chunk_size=None):
+        return await self._save_many(objects, chunk_size, 'save')
+
+    @timed_operation
+    async def create_many(self, objects, chunk_size=None):
+        return await self._save_many(objects, chunk_size, 'create')
+
+    @timed_operation
+    async def update_many(self, objects, chunk_size=None):
+        return await self._save_many(objects, chunk_size, 'update')
+
+    @timed_operation
+    async def delete_many(self, oids, chunk_size=None):
+        results = await asyncio.gather(*[self._delete_chunk(chunk) for chunk in self._chunks(oids, chunk_size)])
+        errors = {}
+        for failed in results:
+            errors.update(failed)
+        return errors
+
+    async def iter_all(self, batch_size=None, lazy=False, fields=None):
+        # Yield every stored object, reading batch_size (default chunk_size) at a time, as InoModelBase.iter_all does
+        fields = self._projection(fields)
+        cursor = 0
+        while True:
+            cursor, oids = await self._scan(cursor, batch_size or self.chunk_size)
+            if oids:
+                for obj in self._hydrate_batch(list(zip(oids, await self._get_chunk(oids, fields))), lazy, fields):
+                    yield obj
+            if cursor == 0:
+                return
+
+    @timed_operation
+    async def find_by(self, field, value, offset=0, count=None):
+        kind, field_type = self.indexes.kinds[field]
+        if kind == 'unique':
+            oid = await self.datastore.redis.hget(self.indexes.key(field), index_value(field_type, value))
+            oids = [oid] if oid is not None and offset == 0 and count != 0 else []
+        elif kind == 'hash':
+            stop = -1 if count is None else offset + count - 1
+            oids = [] if count == 0 else await self.datastore.redis.zrange(self.indexes.key(field, value), offset, stop)
+        else:
+            return await self.range_by(field, value, value, offset, count)
+        return await self._get_indexed([oid.decode('utf-8') for oid in oids])
+
+    @timed_operation
+    async def range_by(self, field, low=None, high=None, offset=0, count=None, reverse=False):
+        # pylint: disable=too-many-arguments
+        key, low, high = self.indexes.score_range(field, low, high)
+        if count == 0:
+            return []
+        start, num = score_limit(offset, count)
+        if reverse:
+            oids = await self.datastore.redis.zrevrangebyscore(key, high, low, start=start, num=num)
+        else:
+            oids = await self.datastore.redis.zrangebyscore(key, low, high, start=start, num=num)
+        return await self._get_indexed([oid.decode('utf-8') for oid in oids])
+
+    @timed_operation
+    async def trim_indexes(self):
+        if not self.indexes or not self.indexes.retention:
+            return 0
+        pipe = self.datastore.pipeline()
+        self.indexes.queue_trim(pipe)
+        return sum(await pipe.execute())
+
+    async def _get_indexed(self, oids):
+        objects, _ = await self.get_many(oids)
+        return objects
+
+    async def _scan(self, cursor, batch_size):
+        # One SCAN (or SSCAN on members_key) step: the next cursor and the oids found
+        if self.members_key is not None:
+            cursor, members = await self.datastore.redis.sscan(self.members_key, cursor, count=batch_size)
+            return cursor, [member.decode('utf-8') for member in members]
+        cursor, keys = await self.datastore.redis.scan(cursor, match=self.key_prefix + ':*', count=batch_size)
+        return cursor, self._scanned_oids(keys)
+
+    async def _get_chunk(self, oids, fields=None):
+        pipe = self.datastore.pipeline()
+        for oid in oids:
+            self._queue_read(pipe, oid, fields)
+        return await pipe.execute()
+
+    async def _save_many(self, objects, chunk_size, mode):
+        errors = {}
+        valid = self._validate_many(objects, errors)
+        await asyncio.gather(*[self._save_chunk(chunk, errors, mode) for chunk in self._chunks(valid, chunk_size)])
+        return errors
+
+    async def _save_chunk(self, objects, errors, mode):
+        if mode != 'save' or self.indexes or self.version_field is not None:
+            await self._save_checked(objects, errors, mode)
+            return
+        pipe = self.datastore.pipeline()
+        with self._timed('serialize', len(objects)):
+            for obj in objects:
+                self._write(pipe, obj)
+                self._publish_invalidation(pipe, obj.oid)
+        await pipe.execute()
+        self._written(objects)
+
+    async def _save_checked(self, objects, errors, mode='save'):
+        # InoModelBase._save_checked: the object keys and unique index hashes are WATCHed while the stored values are
+        # read and checked, and the objects that pass are written with their index changes in a MULTI/EXEC, checked
+        # again if a watched key changed in between
+        names = self._checked_names(mode)
+        for _ in range(self.conflict_retries):
+            async with self.datastore.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(*self._watch_keys(objects))
+                checked, chunk_errors = self._check_mode(*await self._check_chunk(objects, names), mode)
+                pipe.multi()
+                versions = self._queue_checked(pipe, checked)
+                try:
+                    await pipe.execute()
+                except redis.WatchError:
+                    self._restore_versions(checked, versions)
+                    continue
+            self._written([obj for obj, _ in checked])
+            errors.update(chunk_errors)
+            return
+        for obj in objects:
+            errors[obj.oid] = self._changing_error(obj.oid, 'saved')
+
+    async def _check_chunk(self, objects, names):
+        # Read the stored values and unique index owners of objects in one round trip and check the objects against
+        # them (see InoModelBase._check_stored)
+        oids = [obj.oid for obj in objects]
+        claims = self._unique_claims(objects)
+        pipe = self.datastore.pipeline()
+        for oid in oids:
+            self._queue_stored(pipe, oid, names)
+        for _, name, value in claims:
+            pipe.hget(self.indexes.key(name), value)
+        replies = await pipe.execute()
+        return self._check_stored(objects, self._decode_stored(oids, names, replies[:len(oids)]), claims,
+                                  replies[len(oids):])
+
+    async def _delete_chunk(self, oids):
+        # InoModelBase._delete_oids: with indexes, the object keys are WATCHed while the old indexed values are read
+        # and the deletes made in a MULTI/EXEC.  Returns (oid, exception) pairs for the oids that couldn't be deleted.
+        if not self.indexes:
+            pipe = self.datastore.pipeline()
+            self._queue_delete(pipe, oids)
+            return self._deleted(oids, (await pipe.execute())[:len(oids)])
+        names = self.indexes.names
+        for _ in range(self.conflict_retries):
+            async with self.datastore.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(*[self._key(oid) for oid in oids])
+                reads = self.datastore.pipeline()
+                for oid in oids:
+                    self._queue_stored(reads, oid, names)
+                old_values = self._decode_stored(oids, names, await reads.execute())
+                pipe.multi()
+                self._queue_delete(pipe, oids, old_values)
+                try:
+                    counts = (await pipe.execute())[:len(oids)]
+                except redis.WatchError:
+                    continue
+            return self._deleted(oids, counts)
+        return [(oid, self._changing_error(oid, 'deleted')) for oid in oids]
+
+# === MAIN ===
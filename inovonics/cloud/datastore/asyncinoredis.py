@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import redis.asyncio
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class AsyncInoRedis:
+    # The asyncio counterpart of InoRedis, for use with AsyncInoModelBase.  There is no redpipe equivalent for
+    # redis.asyncio, so pipelines come straight from the client.  With metrics (an InoMetrics), the models record their
+    # timings; Redis commands aren't instrumented.
+    hash_tags = False
+
+    def __init__(self, host, port=6379, db=0, metrics=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.info("Initiallizing asyncio Redis connection.")
+        # Initialize redis connection
+        self.redis_host = host
+        self.redis_port = port
+        self.redis_db = db
+        self.metrics = metrics
+        self.redis = redis.asyncio.StrictRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        self.nodes = [self]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def pipeline(self, transaction=False):
+        # Commands are queued synchronously and sent with 'await pipe.execute()'.
+        return self.redis.pipeline(transaction=transaction)
+
+    async def close(self):
+        self.logger.info("Closing asyncio Redis connection.")
+        # redis-py 5 renamed close() to aclose()
+        close = getattr(self.redis, 'aclose', None) or self.redis.close
+        await close()
+
+# === MAIN ===
@@ -1,35 +1,439 @@
 #!/usr/bin/env python3
 
 # === IMPORTS ===
-import datetime
+import abc
 import logging
-#import redis
-#import redpipe
-import uuid
+import queue
 import sys
-import re
-
-import dateutil.parser
+import threading
+import types
+import uuid
 
-from inovonics.cloud.datastore import InvalidDataException
+from .columns import InoColumns, decode_columns, rows_to_columns
+from .exceptions import InvalidDataException, NotLoadedException, ValidationException
+from .indexes import InoIndexes
+from .metrics import NULL_TIMER, timed_operation
+from .modelindexes import _IndexQueriesMixin
+from .modelreads import _ModelReadsMixin
+from .modelscripts import _ScriptedSavesMixin
+from .modelwrites import _CheckedWritesMixin, _ModelWritesMixin
+from .schema import InoSchema
+from .validation import FieldError, check_message, compile_check
+from . import serializers
 
 # === GLOBALS ===
+# The hot paths below assign fields with this instead of setattr, skipping _tracking_setattr, and update the dirty set
+# themselves.
+_set_attribute = object.__setattr__
 
 # === FUNCTIONS ===
+def _tracking_setattr(self, name, value):
+    # __setattr__ for compact InoObjectBase subclasses.  Assignments to fields and 'custom_*' fields are recorded in the
+    # object's dirty set (see InoObjectBase.get_dirty_dict), and custom fields are kept in the side dict.  Plain
+    # subclasses keep the default __setattr__ and find the fields assigned by comparison (see _dirty_names); the ones
+    # derived from a compact class inherit this, and keep their custom fields as attributes.
+    # pylint: disable=protected-access
+    if name.startswith('custom_'):
+        if self._compact:
+            self._set_custom(name, value)
+        else:
+            object.__setattr__(self, name, value)
+    else:
+        object.__setattr__(self, name, value)
+        if name not in self._schema.index:
+            return
+    try:
+        dirty = self._dirty
+        raw = self._raw
+        loaded = self._loaded
+    except AttributeError:
+        return
+    if raw:
+        # The assigned value replaces any undecoded one
+        raw.pop(name, None)
+    if loaded is not None and name not in loaded:
+        object.__setattr__(self, '_loaded', loaded | {name})
+    if dirty is not None:
+        dirty.add(name)
+
+def _rebind(method, old_self, new_self):
+    # Rebind a bound method of old_self to new_self; anything else is returned as is.
+    if getattr(method, '__self__', None) is old_self:
+        return types.MethodType(method.__func__, new_self)
+    return method
+
+def _snapshot(value):
+    # The copy of a field value kept to find plain objects' changed fields (see InoObjectBase._dirty_names).  Lists and
+    # dicts are copied, so changing them in place still shows up as a change.
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
 
 # === CLASSES ===
-class InoModelBase:
-    # pylint: disable=too-few-public-methods
-    def __init__(self, datastore):
-        self.datastore = datastore  # Should be of type InoRedis or a derivative.
+class _InoModelCore(_ModelReadsMixin, _ModelWritesMixin):
+    # The parts of InoModelBase and AsyncInoModelBase that do no I/O: the model settings, keys and validation, plus the
+    # read and write helpers of the mixins (encoding and decoding, and queueing the commands of reads and writes on a
+    # pipeline).  Each model runs the commands on its own kind of datastore.
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    # Override object_class with the InoObjectBase subclass the model stores.  Each object is kept in a Redis hash at
+    # '<key_prefix>:<oid>'; key_prefix defaults to the lowercased object class name.
+    object_class = None
+    key_prefix = None
+    # Number of objects handled per pipeline round trip by the bulk methods
+    chunk_size = 100
+    # Set serializer to 'msgpack' or 'struct' to store each object as a single binary string (InoObjectBase.to_bytes)
+    # instead of a hash.  Reads accept any of the binary formats, so the setting can be changed on live data once all
+    # objects have been rewritten from hashes.
+    serializer = None
+    # Set cache_channel to a pub/sub channel name to publish the oids of saved/deleted objects so other processes'
+    # caches can drop them (see InoObjectCache.subscribe).  Models without a cache publish too, so a process that only
+    # writes keeps the readers' caches fresh.
+    cache_channel = None
+    # Set members_key to the name of a Redis set to keep the oids of all saved objects in it.  iter_all then walks the
+    # set with SSCAN instead of SCANning the whole keyspace for '<key_prefix>:*'.
+    members_key = None
+    # Set version_field to the name of an int field to save with optimistic concurrency: a save fails with
+    # ConflictException unless the stored version still matches the object's, and increments it.  Checked saves
+    # (version_field or indexes) WATCH the keys they read and retry up to conflict_retries times if they change.
+    version_field = None
+    conflict_retries = 5
+    # Checked saves, create_many and update_many run the server-side save script (scripts.SAVE) for each object, making
+    # the checks and writes atomically in a single round trip per chunk.  Set scripted to False to use WATCH/MULTI
+    # instead.  Models with a serializer, or with 'hash'/'unique' indexed fields stored in a compact encoding, always
+    # use WATCH/MULTI, as does AsyncInoModelBase.
+    scripted = True
+    # Set change_stream to the name of a Redis stream to append an event to it for every object saved or deleted, in the
+    # same pipeline (or save script) as the write, so other services can follow the changes (see InoChangeStream)
+    # instead of polling.  The events have the entries 'op' ('save' or 'delete'), 'model' (the key prefix), 'oid',
+    # 'fields' (the names of the fields written, comma separated; not set for serialized models, which write all of
+    # them) and, with a version_field, 'version' (the version saved).  Deleting an oid that doesn't exist still adds an
+    # event.  The stream is trimmed to about change_stream_maxlen events.  On an InoShardedRedis each node has a stream
+    # with the events of its objects.
+    change_stream = None
+    change_stream_maxlen = 10000
+
+    def __init__(self, datastore, cache=None):
+        self.datastore = datastore  # InoRedis, InoShardedRedis or a derivative (AsyncInoRedis for AsyncInoModelBase)
+        self.cache = cache  # An optional InoObjectCache
         self.logger = logging.getLogger(type(self).__name__)
+        if self.key_prefix is None and self.object_class is not None:
+            self.key_prefix = self.object_class.__name__.lower()
+        # The datastore's InoMetrics, if any, and the labels this model's timings are recorded under
+        self.metrics = datastore.metrics
+        self.metric_labels = (('class', getattr(self.object_class, '__name__', None)),)
+        # Secondary indexes declared with 'index' entries in the object class's fields
+        self.indexes = None
+        if self.object_class is not None:
+            self.indexes = InoIndexes(self.key_prefix, self.object_class._schema)  # pylint: disable=protected-access
+        self._scripted = self.scripted and self.serializer is None and (not self.indexes or self.indexes.scriptable)
+        if self.indexes and len(datastore.nodes) > 1 and any(kind == 'unique' for _, kind, _ in self.indexes.fields):
+            raise ValueError("{} has unique indexes, which can't be enforced across {} nodes".format(
+                type(self).__name__, len(datastore.nodes)))
+
+    def _key(self, oid):
+        if self.datastore.hash_tags:
+            return "{}:{{{}}}".format(self.key_prefix, oid)
+        return "{}:{}".format(self.key_prefix, oid)
+
+    def _validate_many(self, objects, errors):
+        # The objects that pass validation; the others are added to errors as oid -> ValidationException
+        with self._timed('validate', len(objects)):
+            invalid = InoObjectBase.validate_many(objects)
+        for oid, field_errors in invalid.items():
+            errors[oid] = ValidationException(field_errors)
+        return [obj for obj in objects if obj.oid not in invalid]
+
+    def _timed(self, stage, count):
+        # A context manager recording the time a stage of handling count objects takes (see InoMetrics.timer)
+        if self.metrics is None:
+            return NULL_TIMER
+        return self.metrics.timer(stage, self.metric_labels, count)
+
+    def _chunks(self, items, chunk_size=None):
+        chunk_size = chunk_size or self.chunk_size
+        items = list(items)
+        for i in range(0, len(items), chunk_size):
+            yield items[i:i + chunk_size]
+
+class InoModelBase(_IndexQueriesMixin, _ScriptedSavesMixin, _CheckedWritesMixin, _InoModelCore):
+    # A model storing object_class objects in an InoRedis or InoShardedRedis (see _InoModelCore for the settings).  The
+    # index queries, scripted saves and WATCH/MULTI writes are in the mixins of modelindexes, modelscripts and
+    # modelwrites.
+    def get(self, oid, lazy=False, fields=None, primary=False):
+        objects, errors = self.get_many([oid], lazy=lazy, fields=fields, primary=primary)
+        if errors:
+            raise errors[oid]
+        return objects[0]
+
+    def save(self, obj):
+        errors = self.save_many([obj])
+        if errors:
+            raise errors[obj.oid]
+
+    def delete(self, oid):
+        errors = self.delete_many([oid])
+        if errors:
+            raise errors[oid]
+
+    @timed_operation
+    def get_many(self, oids, chunk_size=None, lazy=False, fields=None, primary=False):
+        # Load the objects for the given oids, one pipeline round trip per chunk.  Returns a list of the objects found
+        # (in the order requested) and a dict of oid -> exception for the ones that could not be loaded.  With
+        # lazy=True, fields are only decoded when they're read (see InoObjectBase.from_hash).  Pass a list of field
+        # names as fields to read only those (plus oid) with HMGET; the other fields of the objects returned raise
+        # NotLoadedException.  Projected objects aren't cached, and serialized objects are always read in full.
+        # Reads go to the datastore's replicas, if it has any; pass primary=True to read from the primary, e.g. to see
+        # a write just made (see InoRedis.read).  The other read methods take primary too.
+        # Objects read from a replica aren't cached either, as they may not have the latest writes yet.
+        # pylint: disable=too-many-locals
+        oids = list(oids)
+        fields = self._projection(fields)
+        found = self._get_cached(oids)
+        errors = {}
+        cached = fields is None and self._cacheable(primary)
+        for chunk in self._chunks([oid for oid in oids if oid not in found], chunk_size):
+            since = self._cache_sequence()
+            results = self._map_nodes(lambda node, part: self._read_oids(node, part, fields, primary), chunk)
+            with self._timed('hydrate', len(results)):
+                loaded, failed = self._hydrate_many([(oid, result.result) for oid, result in results], lazy, fields)
+            errors.update(failed)
+            for oid, obj in loaded:
+                found[oid] = obj
+                if cached:
+                    self._cache_put(obj, since)
+        return [found[oid] for oid in oids if oid in found], errors
+
+    @timed_operation
+    def get_columns(self, oids, fields=None, chunk_size=None, primary=False):
+        # Read the objects for the given oids into an InoColumns (their field values by column, see
+        # InoObjectBase.columns_from_rows) instead of building objects, e.g. for analytics over many objects.  Pass
+        # field names as fields to read only those (plus oid).  Returns the columns, with a row for each object found in
+        # the order requested, and a dict of oid -> NotExistsException for the others.  The cache isn't used.
+        self._check_columns()
+        oids = list(oids)
+        fields = self._projection(fields)
+        found = {}
+        errors = {}
+        for chunk in self._chunks(oids, chunk_size):
+            results = self._map_nodes(lambda node, part: self._read_oids(node, part, fields, primary), chunk)
+            self._collect_rows([(oid, result.result) for oid, result in results], fields, found, errors)
+        return self._columns(oids, found), errors
+
+    def create(self, obj):
+        errors = self.create_many([obj])
+        if errors:
+            raise errors[obj.oid]
 
-class InoObjectBase:
+    def update(self, obj):
+        errors = self.update_many([obj])
+        if errors:
+            raise errors[obj.oid]
+
+    @timed_operation
+    def save_many(self, objects, chunk_size=None):
+        # Validate and write the given objects, one pipeline round trip per chunk.  Objects that fail validation are
+        # skipped and returned in a dict of oid -> exception.  Objects that were loaded or saved before only have their
+        # changed fields written (see InoObjectBase.get_dirty_dict).  With indexes or a version_field, each chunk is
+        # checked as it's written (see scripted).
+        return self._save_many(objects, chunk_size, 'save')
+
+    @timed_operation
+    def create_many(self, objects, chunk_size=None):
+        # save_many for new objects: the ones whose oid is already stored are skipped with an ExistsException
+        return self._save_many(objects, chunk_size, 'create')
+
+    @timed_operation
+    def update_many(self, objects, chunk_size=None):
+        # save_many for stored objects: the ones whose oid isn't stored are skipped with a NotExistsException
+        return self._save_many(objects, chunk_size, 'update')
+
+    def _save_many(self, objects, chunk_size, mode):
+        errors = {}
+        for chunk in self._chunks(objects, chunk_size):
+            valid = self._validate_many(chunk, errors)
+            self._map_nodes(lambda node, part: self._save_chunk(node, part, errors, mode), valid,
+                            lambda obj: self._key(obj.oid))
+        return errors
+
+    def _save_chunk(self, node, objects, errors, mode):
+        # Write objects to node, adding the ones that fail the checks to errors
+        if mode != 'save' or self.indexes or self.version_field is not None:
+            if self._scripted:
+                self._save_scripted(node, objects, errors, mode)
+            else:
+                self._save_checked(node, objects, errors, mode)
+            return
+        with node.pipeline() as pipe:
+            with self._timed('serialize', len(objects)):
+                for obj in objects:
+                    self._write(pipe, obj)
+                    self._publish_invalidation(pipe, obj.oid)
+        self._written(objects)
+
+    @timed_operation
+    def delete_many(self, oids, chunk_size=None):
+        # Delete the objects for the given oids, one pipeline round trip per chunk (two with indexes, which need the old
+        # indexed values first).  Returns a dict of oid -> exception for the oids that didn't exist (or, with indexes,
+        # kept changing while being deleted).
+        errors = {}
+        for chunk in self._chunks(oids, chunk_size):
+            errors.update(self._map_nodes(self._delete_oids, chunk))
+        return errors
+
+    def iter_all(self, batch_size=None, cursor=0, prefetch=False, lazy=False, fields=None, primary=False):
+        # Yield every stored object, reading batch_size (default chunk_size) at a time so memory stays bounded.  See
+        # iter_batches for cursor and prefetch, and get_many for lazy, fields and primary.
+        # pylint: disable=too-many-arguments
+        for _, objects in self.iter_batches(batch_size, cursor, prefetch, lazy, fields, primary):
+            yield from objects
+
+    def iter_batches(self, batch_size=None, cursor=0, prefetch=False, lazy=False, fields=None, primary=False):
+        # Yield (cursor, objects) for every stored object, a batch at a time, using SCAN (or SSCAN on members_key) so
+        # Redis is never blocked enumerating the whole keyspace.  Once a batch has been processed, its cursor can be
+        # saved and passed back in to resume after it; a cursor of 0 means the walk is complete.  As with SCAN itself,
+        # objects saved or deleted during the walk may or may not be seen, and an object can occasionally be seen twice.
+        # With prefetch=True the next batch is read on a background thread while the current one is being processed.
+        # The cache is bypassed so a full walk doesn't flush it.  SCAN cursors are only valid on the server that
+        # returned them, so the keys are always listed on the primary; the batches are read from a replica.
+        # pylint: disable=too-many-arguments
+        batches = self._scan_batches(batch_size or self.chunk_size, cursor, lazy, self._projection(fields), primary)
+        if prefetch:
+            batches = self._prefetch(batches)
+        for batch_cursor, objects in batches:
+            if objects:
+                yield batch_cursor, objects
+
+    def _map_nodes(self, func, items, key=None):
+        # Call func(node, items) for the items on each of the datastore's nodes (in parallel on an InoShardedRedis) and
+        # return the lists it returns joined together.  key maps an item to its Redis key (default: an oid's).
+        results = self.datastore.map_nodes(func, items, key or self._key)
+        return [item for result in results if result for item in result]
+
+    def _scan_batches(self, batch_size, cursor, lazy, fields, primary=False):
+        # The nodes are walked one after another.  The cursors handed out combine the node's SCAN cursor and its
+        # position, node cursor * node count + position, so a single node's cursors are passed through unchanged.
+        nodes = self.datastore.nodes
+        position, cursor = cursor % len(nodes), cursor // len(nodes)
+        while True:
+            node = nodes[position]
+            cursor, oids = self._scan_node(node, cursor, batch_size)
+            if cursor == 0:
+                position += 1
+            combined = 0 if position == len(nodes) else cursor * len(nodes) + position
+            yield combined, self._read_batch(node, oids, lazy, fields, primary)
+            if combined == 0:
+                return
+
+    def _scan_node(self, node, cursor, batch_size):
+        # One SCAN (or SSCAN on members_key) step on node: the next cursor and the oids found
+        if self.members_key is not None:
+            cursor, members = node.redis.sscan(self.members_key, cursor, count=batch_size)
+            return cursor, [member.decode('utf-8') for member in members]
+        cursor, keys = node.redis.scan(cursor, match=self.key_prefix + ':*', count=batch_size)
+        return cursor, self._scanned_oids(keys)
+
+    def _read_oids(self, node, oids, fields=None, primary=False):
+        # Read oids from node (or a replica of it) in one pipeline round trip: (oid, result) pairs
+        return node.read(lambda pipe: [(oid, self._queue_read(pipe, oid, fields)) for oid in oids], primary)
+
+    def _read_batch(self, node, oids, lazy, fields, primary=False):
+        # Load oids from node in one pipeline round trip, skipping objects deleted since they were listed
+        results = self._read_oids(node, oids, fields, primary)
+        return self._hydrate_batch([(oid, result.result) for oid, result in results], lazy, fields)
+
+    def _prefetch(self, batches):
+        # Run the batches generator on a background thread, one batch ahead of the consumer
+        results = queue.Queue(maxsize=1)
+        stop = threading.Event()
+
+        def put(item):
+            # Block until there's room for item, or give up once the consumer has gone
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for batch in batches:
+                    if not put((batch, None)):
+                        return
+                put((None, None))
+            except Exception as ex:  # pylint: disable=broad-except
+                put((None, ex))
+
+        producer = threading.Thread(target=produce, name='{}.iter_all'.format(type(self).__name__), daemon=True)
+        producer.start()
+        try:
+            while True:
+                batch, error = results.get()
+                if error is not None:
+                    raise error
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            stop.set()
+            producer.join()
+
+class InoObjectMeta(abc.ABCMeta):
+    # Metaclass for InoObjectBase.  It compiles the 'fields' list into an InoSchema once per class and, for classes
+    # declared with 'compact=True', generates __slots__ from the fields so instances don't carry a __dict__.  As
+    # InoObjectBase instances have one, compact classes are built on the slotted _InoObjectCore instead and registered
+    # as InoObjectBase subclasses.
+    def __new__(mcs, name, bases, namespace, compact=False):
+        if compact:
+            bases = tuple(_InoObjectCore if base is InoObjectBase else base for base in bases)
+            namespace.setdefault('__setattr__', _tracking_setattr)
+        if compact and '__slots__' not in namespace:
+            fields = namespace.get('fields')
+            if fields is None:
+                fields = next(base.fields for base in bases if hasattr(base, 'fields'))
+            inherited = set()
+            for base in bases:
+                for klass in base.__mro__:
+                    inherited.update(getattr(klass, '__slots__', ()))
+            namespace['__slots__'] = tuple(field['name'] for field in fields if field['name'] not in inherited)
+        return super().__new__(mcs, name, bases, namespace)
+
+    def __init__(cls, name, bases, namespace, compact=False):
+        super().__init__(name, bases, namespace)
+        if compact and cls.__dictoffset__ != 0:
+            raise TypeError("{} cannot be compact, a base class provides __dict__".format(name))
+        # Instances without a __dict__ keep custom fields in a side dict and share the class level tables.
+        cls._compact = cls.__dictoffset__ == 0
+        # Compile the field list once per class so instances don't have to walk 'fields' on every access.
+        cls._schema = InoSchema(cls.fields)
+        cls._validator_table = tuple(getattr(cls, v_name) for v_name in cls.validators)
+        cls._slot_names = tuple(slot for klass in cls.__mro__ for slot in klass.__dict__.get('__slots__', ())
+                                if slot not in ('__dict__', '__weakref__'))
+        # Lazy loading can skip __init__ unless a subclass overrides it (to add validation methods, for example).
+        cls._plain_init = all('__init__' not in klass.__dict__ for klass in cls.__mro__[:-2])
+        cls.logger = logging.getLogger(name)
+        if compact and not issubclass(cls, InoObjectBase):
+            InoObjectBase.register(cls)
+
+class _InoObjectCore(metaclass=InoObjectMeta):
+    # The implementation of InoObjectBase, without a __dict__ so compact classes can be built on it.
     # Override fields to give objects attributes
     # Each field should be specified in the 'fields' list by a dictionary containing two entries: 'name' and 'type'.
     # - 'name' can be a string and will be used as the label in the database.  This should match the names/labels used
     # in the DB* objects.
     # - 'type' should be one of the following: 'bool', 'datetime', 'int', 'str', 'uuid'
+    # - 'encoding' is optional and selects a compact storage form for the Redis hash: 'epoch_us' for datetime fields
+    # (microseconds since the epoch) or 'bytes' for uuid fields (16 raw bytes).
+    # - 'index' is optional and has the model maintain a secondary index on the field: 'hash', 'sorted' or 'unique'.
+    # - 'default' is optional and replaces the type's default for new objects (a new uuid4 for uuid fields, utcnow() for
+    # datetime fields, an empty value for the rest): a callable is called for each object, any other value is used as
+    # is (lists and dicts are copied), so 'default': None leaves the field unset.
+    # - Constraints are optional and are checked on validation: 'required' (default True; None is rejected), 'min' and
+    # 'max' (value range for int/float, length for str, minimum items for list), 'regex' (str must match fully),
+    # 'email' and 'phone' (str format checks).  Fields without constraints aren't validated.
 
     # A field with name 'oid' is the object's unique identifier.  This had be named to prevents collisions with the id()
     # method.
@@ -37,251 +441,560 @@ class InoObjectBase:
 
     allowed_types = ['bool', 'datetime', 'float', 'int', 'list', 'str', 'uuid']
 
-    def __init__(self, dictionary=None):
-        self.logger = logging.getLogger(type(self).__name__)
-        # Setup all of the attributes so they can be written directly
-        for field in self.fields:
-            if field['type'] == 'bool':
-                setattr(self, field['name'], False)
-            elif field['type'] == 'datetime':
-                setattr(self, field['name'], datetime.datetime.utcnow())
-            elif field['type'] == 'float':
-                setattr(self, field['name'], 0.0)
-            elif field['type'] == 'int':
-                setattr(self, field['name'], 0)
-            elif field['type'] == 'list':
-                setattr(self, field['name'], [])
-            elif field['type'] == 'str':
-                setattr(self, field['name'], '')
-            elif field['type'] == 'uuid':
-                setattr(self, field['name'], uuid.uuid4())
-            else:
-                raise TypeError
-        # Setup the base validation methods.  Any validation methods should be added here.
-        self.validation_methods = [self._validate_oid, self._validate_custom]
-        # Setup the custom fields list
-        self.fields_custom = []
+    # Names of the validation methods run by _validate_fields.  Subclasses can extend this tuple, or append bound
+    # methods to self.validation_methods in __init__ (non-compact classes only: compact instances have no per-instance
+    # lists, so their validation_methods and fields_custom are read-only tuples built from the class and the custom
+    # fields set, and appending to them raises AttributeError).
+    validators = ('_validate_oid', '_validate_custom')
+
+    # Subclasses declared as 'class Foo(InoObjectBase, compact=True)' get __slots__ generated from their fields.  The
+    # logger and validation table are then shared at class level and 'custom_*' fields are kept in a side dict that is
+    # only created when the first custom field is set.  Their assignments go through _tracking_setattr; plain
+    # instances keep a __dict__ and the default __setattr__.
+    __slots__ = ('_custom', '_dirty', '_raw', '_loaded', '_clean', '__weakref__')
+
+    def __init__(self, dictionary=None, load=False):
+        # With load=True the object is built from stored values (as get_dict returns them), so the fields in dictionary
+        # don't get defaults and the object starts clean (see clear_dirty).
+        self._setup(present=(dictionary or ()) if load else None)
         # If a dictionary was passed in, pass it to set_fields
         if dictionary:
             self.set_fields(dictionary)
+        if load:
+            self.clear_dirty()
+
+    def _setup(self, raw=None, loaded=None, present=None):
+        # The names of the fields assigned since the object was loaded or saved, or None for an object that has never
+        # been stored (everything is written).
+        _set_attribute(self, '_dirty', None)
+        # Raw hash values of the fields a lazy load hasn't decoded yet (see from_hash); they're left unset until read.
+        _set_attribute(self, '_raw', raw)
+        # The names of the fields a projected load included, or None when the object has all of its fields.  The
+        # others are left unset.
+        _set_attribute(self, '_loaded', loaded)
+        # For plain instances, the fields as they were when the object was last loaded or saved (see _dirty_names)
+        _set_attribute(self, '_clean', None)
+        # Setup all of the attributes so they can be written directly.  Fields in present are about to be assigned (the
+        # load constructors) and don't get a default.
+        if raw is None and loaded is None and present is None:
+            for name, factory in self._schema.defaults:
+                _set_attribute(self, name, factory())
+        else:
+            # pylint: disable=too-many-boolean-expressions
+            for name, factory in self._schema.defaults:
+                if (raw is None or name not in raw) and (loaded is None or name in loaded) and \
+                        (present is None or name not in present):
+                    _set_attribute(self, name, factory())
+        if not self._compact:
+            # Setup the base validation methods.  Any validation methods should be added here.
+            _set_attribute(self, 'validation_methods',
+                           [types.MethodType(v_method, self) for v_method in self._validator_table])
+            # Setup the custom fields list
+            _set_attribute(self, 'fields_custom', [])
+
+    def __getattr__(self, name):
+        # Only called when normal lookup fails.  This is how lazily loaded objects decode a field the first time it's
+        # read, and how compact instances expose the per-instance attributes they don't store.
+        try:
+            raw = object.__getattribute__(self, '_raw')
+        except AttributeError:
+            raw = None
+        if raw and name in raw:
+            return self._decode_raw(name)
+        try:
+            loaded = object.__getattribute__(self, '_loaded')
+        except AttributeError:
+            loaded = None
+        if loaded is not None and name in self._schema.index and name not in loaded:
+            raise NotLoadedException("Field {} of {} was not loaded".format(name, type(self).__name__))
+        if self._compact:
+            # Tuples rather than lists, so an append that would be lost with the copy fails instead
+            if name == 'validation_methods':
+                return tuple(types.MethodType(v_method, self) for v_method in self._validator_table)
+            if name == 'fields_custom':
+                return tuple(self._get_custom())
+            if name.startswith('custom_') and name in self._get_custom():
+                return self._get_custom()[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
 
     def __repr__(self):
         return "<{}: {}>".format(type(self), getattr(self, 'oid'))
 
     def get_dict(self):
         # Get all fields in the object as a dict (excluding hidden fields)
+        self._sync_assigned()
+        if self._raw:
+            self._decode_all()
         dictionary = {}
-        for field in self.fields:
-            if field['type'] == 'datetime':
-                dictionary[field['name']] = getattr(self, field['name']).isoformat()
-            elif field['type'] == 'uuid':
-                dictionary[field['name']] = str(getattr(self, field['name']))
+        encoders = self._schema.encoders
+        if self._loaded is not None:
+            # Only the fields a projected load included
+            encoders = [(name, encoder) for name, encoder in encoders if name in self._loaded]
+        for name, encoder in encoders:
+            value = getattr(self, name)
+            if encoder is None or value is None:
+                dictionary[name] = value
             else:
-                dictionary[field['name']] = getattr(self, field['name'])
-        for field in self.fields_custom:
-            dictionary[field] = getattr(self, field)
+                dictionary[name] = encoder(value)
+        dictionary.update(self._custom_items())
         return dictionary
 
+    def get_dirty_dict(self):
+        # The get_dict entries for the fields assigned since the object was loaded or saved (all of them for an object
+        # that has never been stored).  Changes made in place, like appending to a list field, aren't seen; call
+        # mark_dirty for those.  On plain objects, a field assigned back the value it had when loaded isn't dirty.
+        dirty = self._dirty_names()
+        if dirty is None:
+            return self.get_dict()
+        dictionary = {}
+        for name, encoder in self._schema.encoders:
+            if name in dirty:
+                dictionary[name] = getattr(self, name) if encoder is None else encoder(getattr(self, name))
+        dictionary.update(item for item in self._custom_items() if item[0] in dirty)
+        return dictionary
+
+    def get_loaded_fields(self):
+        # The names of the fields the object has: all of them unless it came from a projected load
+        self._sync_assigned()
+        if self._loaded is None:
+            return list(self._schema.names)
+        return [name for name in self._schema.names if name in self._loaded]
+
+    def clear_dirty(self):
+        # Mark the object as matching its stored form.  Models call this after loading or saving an object.
+        _set_attribute(self, '_dirty', set())
+        if not self._compact:
+            self._sync_assigned()
+            _set_attribute(self, '_clean', {name: _snapshot(value) for name, value in self.__dict__.items()})
+
+    def mark_dirty(self, *names):
+        if self._dirty is not None:
+            self._dirty.update(names)
+
     def set_fields(self, dictionary):
         if dictionary:
-            for field in dictionary:
-                self.logger.debug("field: %s", field)
-                if field in [i['name'] for i in self.fields]:
-                    field_entry = [i for i in self.fields if i['name'] == field][0]
-                    self.logger.debug("field_entry: %s", field_entry)
-                    if field_entry['type'] == 'datetime':
-                        setattr(self, field_entry['name'], dateutil.parser.parse(dictionary[field]))
-                    elif field_entry['type'] == 'uuid':
-                        setattr(self, field_entry['name'], uuid.UUID(dictionary[field]))
-                    else:
-                        setattr(self, field_entry['name'], dictionary[field])
-                elif field in self.fields_custom:
-                    setattr(self, field, dictionary[field])
+            if self._raw:
+                for field in dictionary:
+                    self._raw.pop(field, None)
+            if self._loaded is not None:
+                _set_attribute(self, '_loaded', self._loaded.union(dictionary))
+            decoders = self._schema.decoders
+            dirty = self._dirty
+            for field, value in dictionary.items():
+                if field in decoders:
+                    decoder = decoders[field]
+                    _set_attribute(self, field, value if decoder is None or value is None else decoder(value))
+                    if dirty is not None:
+                        dirty.add(field)
+                elif field.startswith('custom_'):
+                    self._set_custom_field(field, value)
+        return self._validate_fields()
+
+    def copy(self):
+        # A cheap copy for caches: field values are carried over without decoding or validation.  List fields and the
+        # custom fields are copied so the copies can be modified independently; other values are immutable.
+        # Fields a lazy load hasn't decoded yet are copied raw, so copying doesn't decode them.
+        self._sync_assigned()
+        obj = type(self).__new__(type(self))
+        for slot in self._slot_names:
+            try:
+                object.__setattr__(obj, slot, object.__getattribute__(self, slot))
+            except AttributeError:
+                pass
+        if self._dirty is not None:
+            object.__setattr__(obj, '_dirty', set(self._dirty))
+        if self._raw:
+            object.__setattr__(obj, '_raw', dict(self._raw))
+        if self._clean is not None:
+            object.__setattr__(obj, '_clean', dict(self._clean))
+        if self._compact:
+            if self._get_custom():
+                object.__setattr__(obj, '_custom', dict(self._get_custom()))
+        else:
+            obj.__dict__.update(self.__dict__)
+            _set_attribute(obj, 'validation_methods',
+                           [_rebind(v_method, self, obj) for v_method in self.validation_methods])
+            _set_attribute(obj, 'fields_custom', list(self.fields_custom))
+        # pylint: disable=protected-access
+        for name, field in self._schema.index.items():
+            if field['type'] == 'list' and not (obj._raw and name in obj._raw) and getattr(obj, name, None) is not None:
+                object.__setattr__(obj, name, list(getattr(obj, name)))
+        return obj
+
+    @classmethod
+    def from_bytes(cls, data):
+        # Create an object from the output of to_bytes (any format, see serializers)
+        obj = serializers.loads(cls, data)
+        obj.clear_dirty()
+        return obj
+
+    def to_bytes(self, fmt='msgpack'):
+        # Get the object as bytes in a binary format: 'msgpack' (needs the msgpack package) or 'struct'
+        return serializers.dumps(self, fmt)
+
+    @classmethod
+    def from_hash(cls, mapping, lazy=False, fields=None):
+        # Create an object from a Redis hash mapping (as returned by HGETALL).  With lazy=True the declared fields are
+        # kept as the raw values and each is only decoded when it's first read (get_dict decodes them all), and
+        # validation is left until the object is saved or validate() is called.  Pass fields for a mapping holding only
+        # some of the fields (as read with HMGET): the object then only has those and isn't validated either.
+        if not lazy and fields is None:
+            mapping = {field.decode('utf-8') if isinstance(field, bytes) else field: value
+                       for field, value in mapping.items()}
+            obj = cls._new_loaded(mapping)
+            obj.set_hash_fields(mapping)
+            obj.clear_dirty()
+            return obj
+        decoders = cls._schema.hash_decoders
+        raw = {}
+        custom = []
+        for field, value in mapping.items():
+            if isinstance(field, bytes):
+                field = field.decode('utf-8')
+            if field in decoders:
+                raw[field] = value
+            elif field.startswith('custom_'):
+                custom.append((field, value.decode('utf-8') if isinstance(value, bytes) else value))
+        loaded = None if fields is None else frozenset(fields)
+        if cls._plain_init:
+            obj = cls.__new__(cls)
+            obj._setup(raw, loaded)  # pylint: disable=protected-access
+        else:
+            obj = cls()
+            for name in cls._schema.names:
+                if name in raw or (loaded is not None and name not in loaded):
+                    object.__delattr__(obj, name)
+            _set_attribute(obj, '_raw', raw)
+            _set_attribute(obj, '_loaded', loaded)
+        for field, value in custom:
+            obj._set_custom_field(field, value)  # pylint: disable=protected-access
+        if not lazy:
+            obj._decode_all()  # pylint: disable=protected-access
+        obj.clear_dirty()
+        return obj
+
+    @classmethod
+    def _new_loaded(cls, present):
+        # A new object for loading the stored values of the fields in present into.  Classes that keep the base
+        # __init__ skip it, so those fields don't get defaults; others are constructed as usual.
+        if cls._plain_init:
+            obj = cls.__new__(cls)
+            obj._setup(present=present)  # pylint: disable=protected-access
+            return obj
+        return cls()
+
+    @classmethod
+    def from_rows(cls, rows):
+        # Create a batch of objects from Redis hash mappings (as returned by HGETALL), see from_columns
+        rows = list(rows)
+        return cls.from_columns(rows_to_columns(rows), len(rows))
+
+    @classmethod
+    def from_columns(cls, columns, count=None):
+        # Create a batch of objects from columns of raw hash values: a dict of field name -> list with a value per row
+        # (bytes or str, None where the row doesn't have the field), as columns.rows_to_columns builds them.  Each
+        # column is decoded in one pass, the objects only get defaults for the fields their row doesn't have, and the
+        # batch is validated in one go.  Returns the objects made (in row order) and a dict of row index ->
+        # InvalidDataException (ValidationException for a row that doesn't validate) for the other rows.
+        # pylint: disable=protected-access,too-many-locals,too-many-branches
+        decoded, custom, count, errors = decode_columns(cls._schema, columns, count)
+        names = frozenset(decoded)
+        # Row index -> the fields the row doesn't have, for the rows missing any
+        missing = {}
+        for name in names:
+            values = columns[name]
+            if None in values:
+                for index, value in enumerate(values):
+                    if value is None:
+                        missing.setdefault(index, []).append(name)
+        objects = [None] * count
+        for index in range(count):
+            if index not in errors:
+                objects[index] = cls._new_loaded(names.difference(missing[index]) if index in missing else names)
+        for name, values in decoded.items():
+            for obj, raw, value in zip(objects, columns[name], values):
+                if obj is not None and raw is not None:
+                    _set_attribute(obj, name, value)
+        for name, values in custom.items():
+            for obj, value in zip(objects, values):
+                if obj is not None and value is not None:
+                    obj._set_custom_field(name, value)
+        # The field checks run a column at a time, then each object's validation methods
+        failed = {}
+        for name, check in cls._schema.validators:
+            for index, obj in enumerate(objects):
+                if obj is not None:
+                    error = check(getattr(obj, name))
+                    if error is not None:
+                        failed.setdefault(index, []).append(error)
+        for index, obj in enumerate(objects):
+            if obj is not None:
+                method_errors = obj._method_errors()
+                if method_errors:
+                    failed.setdefault(index, []).extend(method_errors)
+        for index, field_errors in failed.items():
+            errors[index] = ValidationException(field_errors)
+        loaded = []
+        for index, obj in enumerate(objects):
+            if obj is not None and index not in failed:
+                obj.clear_dirty()
+                loaded.append(obj)
+        return loaded, errors
+
+    @classmethod
+    def columns_from_rows(cls, rows):
+        # Decode Redis hash mappings into an InoColumns (the field values by column, see columns.InoColumns) for callers
+        # that don't need objects
+        rows = list(rows)
+        return InoColumns(cls._schema, rows_to_columns(rows), len(rows))
+
+    def get_hash(self, dirty_only=False, fields=None):
+        # Get all fields in the object as a dict suitable for storing in a Redis hash.  With dirty_only=True, only the
+        # fields get_dirty_dict would return; with a list of field names as fields, only those.
+        self._sync_assigned()
+        wanted = self._dirty_names() if dirty_only else None
+        if fields is not None:
+            wanted = set(fields) if wanted is None else wanted & set(fields)
+        if wanted is None and self._raw:
+            self._decode_all()
+        loaded = self._loaded
+        mapping = {}
+        for name, encoder in self._schema.hash_encoders:
+            if (wanted is not None and name not in wanted) or (loaded is not None and name not in loaded):
+                continue
+            value = getattr(self, name)
+            if encoder is None or value is None:
+                mapping[name] = value
+            else:
+                mapping[name] = encoder(value)
+        if wanted is None:
+            mapping.update(self._custom_items())
+        else:
+            mapping.update(item for item in self._custom_items() if item[0] in wanted)
+        return mapping
+
+    def set_hash_fields(self, mapping):
+        # The set_fields counterpart for a Redis hash mapping: keys and values may be bytes.
+        if mapping:
+            decoders = self._schema.hash_decoders
+            dirty = self._dirty
+            raw = self._raw
+            if self._loaded is not None:
+                _set_attribute(self, '_loaded', self._loaded.union(
+                    field.decode('utf-8') if isinstance(field, bytes) else field for field in mapping))
+            for field, value in mapping.items():
+                if isinstance(field, bytes):
+                    field = field.decode('utf-8')
+                if field in decoders:
+                    if raw:
+                        raw.pop(field, None)
+                    _set_attribute(self, field, decoders[field](value))
+                    if dirty is not None:
+                        dirty.add(field)
                 elif field.startswith('custom_'):
-                    self.fields_custom.append(field)
-                    setattr(self, field, dictionary[field])
+                    self._set_custom_field(field, value.decode('utf-8') if isinstance(value, bytes) else value)
         return self._validate_fields()
 
+    def validate(self):
+        # Raise ValidationException if the object doesn't validate.  For a lazily loaded object, this also decodes any
+        # fields that haven't been read yet, so bad stored data shows up here.
+        if self._raw:
+            self._decode_all()
+        self._validate_fields()
+
+    def _decode_raw(self, name):
+        value = self._raw.pop(name)
+        try:
+            value = self._schema.hash_decoders[name](value)
+        except (TypeError, ValueError) as ex:
+            raise InvalidDataException("Field {} could not be decoded: {}".format(name, ex)) from ex
+        _set_attribute(self, name, value)
+        if self._clean is not None:
+            self._clean[name] = _snapshot(value)
+        return value
+
+    def _decode_all(self):
+        for name in list(self._raw):
+            self._decode_raw(name)
+
+    def _dirty_names(self):
+        # The names of the fields assigned since the object was loaded or saved, or None for an object never stored.
+        # Compact instances record them as they're assigned; for plain ones, the fields whose values differ from the
+        # ones clear_dirty kept are added to the ones set_fields and mark_dirty recorded.
+        dirty = self._dirty
+        clean = self._clean
+        if dirty is None or clean is None:
+            return dirty
+        names = set(dirty)
+        index = self._schema.index
+        for name, value in self.__dict__.items():
+            if name in index or name.startswith('custom_'):
+                if name not in clean:
+                    names.add(name)
+                else:
+                    old = clean[name]
+                    if old is not value and old != value:
+                        names.add(name)
+        return names
+
+    def _sync_assigned(self):
+        # Plain instances don't see their fields being assigned, so a field assigned over an undecoded one (see
+        # from_hash) or one a projected load left out is only taken into _raw and _loaded here.
+        if self._compact or (not self._raw and self._loaded is None):
+            return
+        assigned = self.__dict__.keys() & self._schema.index.keys()
+        if self._raw:
+            for name in assigned.intersection(self._raw):
+                del self._raw[name]
+        if self._loaded is not None and not assigned.issubset(self._loaded):
+            _set_attribute(self, '_loaded', self._loaded.union(assigned))
+
+    def _custom_items(self):
+        # (name, value) pairs for the custom fields set on this object
+        if self._compact:
+            return list(self._get_custom().items())
+        return [(field, getattr(self, field)) for field in self.fields_custom]
+
+    def _set_custom_field(self, name, value):
+        if self._compact:
+            setattr(self, name, value)
+        elif name in self.fields_custom:
+            setattr(self, name, value)
+        else:
+            self.fields_custom.append(name)
+            setattr(self, name, value)
+
+    def _get_custom(self):
+        # The custom field side dict of a compact instance (empty if no custom fields have been set)
+        try:
+            return object.__getattribute__(self, '_custom')
+        except AttributeError:
+            return {}
+
+    def _set_custom(self, name, value):
+        try:
+            object.__getattribute__(self, '_custom')[name] = value
+        except AttributeError:
+            object.__setattr__(self, '_custom', {name: value})
+
+    @classmethod
+    def validate_many(cls, objects):
+        # Validate a batch of objects without raising.  Returns a dict of oid -> list of errors (FieldErrors from the
+        # declared constraints, or strings from validation methods) for the objects that failed.
+        invalid = {}
+        for obj in objects:
+            errors = obj._collect_errors()  # pylint: disable=protected-access
+            if errors:
+                invalid[obj.oid] = errors
+        return invalid
+
     def _validate_fields(self):
-        # This calls each of the methods listed in the validation_methods list.  Each listed method should check a value
-        # and return a validation error.  If an error (not None) is returned, it's added to the list of errors, which is
-        # returned from this function.
+        # Run the field constraints and validation methods, raising ValidationException (an InvalidDataException) with
+        # the list of errors if any failed.
+        errors = self._collect_errors()
+        if errors:
+            raise ValidationException(errors)
+
+    def _collect_errors(self):
+        # The compiled checks for the fields that declare constraints run first, then each of the methods listed in
+        # the validation_methods list.  Each check or method should return a validation error, or None if the value
+        # is valid.
+        self._sync_assigned()
         errors = []
-        self.logger.debug("self.validation_methods: %s", self.validation_methods)
-        for v_method in self.validation_methods:
-            error = v_method()
+        loaded = self._loaded
+        for name, check in self._schema.validators:
+            if loaded is not None and name not in loaded:
+                continue
+            error = check(getattr(self, name))
             if error is not None:
                 errors.append(error)
-        self.logger.debug("errors: %s", errors)
-        if errors:
-            raise InvalidDataException("Validation Error List: {}".format(errors))
+        errors.extend(self._method_errors())
+        return errors
+
+    def _method_errors(self):
+        # The errors from the validation methods (see _collect_errors)
+        if self._loaded is not None:
+            return self._projected_method_errors()
+        errors = []
+        if self._compact:
+            for v_method in self._validator_table:
+                error = v_method(self)
+                if error is not None:
+                    errors.append(error)
+        else:
+            for v_method in self.validation_methods:
+                error = v_method()
+                if error is not None:
+                    errors.append(error)
+        return errors
+
+    def _projected_method_errors(self):
+        # _method_errors for an object from a projected load: a method reading a field that wasn't loaded (and so isn't
+        # being written) is skipped rather than failing the object
+        if self._compact:
+            methods = [types.MethodType(v_method, self) for v_method in self._validator_table]
+        else:
+            methods = self.validation_methods
+        errors = []
+        for v_method in methods:
+            try:
+                error = v_method()
+            except NotLoadedException:
+                continue
+            if error is not None:
+                errors.append(error)
+        return errors
 
     def _validate_oid(self):
         # Verify the oid is a UUID type variable
-        if not isinstance(getattr(self, 'oid'), uuid.UUID):
-            return "oid not of type uuid.UUID but type {}, value {}".format(
-                type(getattr(self, 'oid')), getattr(self, 'oid'))
+        oid = getattr(self, 'oid')
+        if not isinstance(oid, uuid.UUID):
+            return FieldError('oid', 'type', oid, {'expected': 'uuid.UUID'}).message
         return None
 
     def _validate_custom(self):
         # Verify the custom fields are type string
-        for field in self.fields_custom:
-            if not isinstance(getattr(self, field), str):
-                return "{} not of type str but type {}, value {}".format(
-                    field, type(getattr(self, field)), getattr(self, field))
-            if len(getattr(self, field)) > 4096:
-                return "Length of field {} greater than 4096.".format(field)
+        for field, value in self._custom_items():
+            if not isinstance(value, str):
+                return FieldError(field, 'type', value, {'expected': 'str'}).message
+            if len(value) > 4096:
+                return FieldError(field, 'too_long', value, {'max': 4096}).message
         return None
 
+    # The helpers below are kept for validation methods written before fields could declare constraints.  Each runs the
+    # compiled check a field declaring the same constraints gets (see validation.compile_check), returning its message.
+    # pylint: disable=redefined-builtin
     def _validate_str(self, field_name, min=0, max=4096, required=True):
         # String >= min chars and <= max chars
-
-        attr = getattr(self, field_name)
-        # Check for empty
-        if attr is None and not required:
-            return None
-
-        # Check if it is a string
-        if not isinstance(attr, str):
-            return "{} not of type str but type {}, value {}".format(field_name, type(attr), attr)
-
-        # Recheck if it is empty string
-        if len(attr) == 0 and not required:
-            return None
-
-        # Check for permissible lenght if attribute is present
-        if len(attr) < min or len(attr) > max:
-            return "{} must be between {} and {} chars".format(field_name, min, max)
-        return None
+        return check_message(compile_check(field_name, 'str', min, max, required), getattr(self, field_name))
 
     def _validate_email(self, field_name, max=4096, required=True):
-
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
-
-        # Check if it is a string
-        str_check = self._validate_str(field_name, 0, max, required)
-        if str_check is not None:
-            return str_check
-
-        # Recheck if it is emtpy and not required
-        if len(attr) == 0 and not required:
-            return None
-
-        # Check for the format
-        if re.match('^[A-Za-z0-9\.\+_-]+@[A-Za-z0-9\._-]+\.[a-zA-Z]*$', attr) is None:
-            return "{} must be a valid email".format(field_name)
-
-        return None
+        return check_message(compile_check(field_name, 'str', 0, max, required, email=True), getattr(self, field_name))
 
     def _validate_int(self, field_name, min=-sys.maxsize-1, max=sys.maxsize, required=True):
-
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
-
-        # Do an int check
-        if not isinstance(attr, int):
-            return "{} not of type int but type {}, value {}".format(
-                field_name, type(attr), attr)
-
-        # Finally, do a range check
-        if attr < min or attr > max:
-            return "{} must be between {} and {}".format(field_name, min, max)
-        return None
+        return check_message(compile_check(field_name, 'int', min, max, required), getattr(self, field_name))
 
     def _validate_float(self, field_name, min=-sys.float_info.max, max=sys.float_info.max, required=True):
-
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
-
-        # Do an float check
-        if not isinstance(attr, float):
-            return "{} not of type float but type {}, value {}".format(
-                field_name, type(attr), attr)
-
-        # Finally, do a range check
-        if attr < min or attr > max:
-            return "{} must be between {} and {}".format(field_name, min, max)
-        return None
+        return check_message(compile_check(field_name, 'float', min, max, required), getattr(self, field_name))
 
     def _validate_datetime(self, field_name, required=True):
-
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
-
-        # Do a datetime check
-        if not isinstance(attr, datetime.datetime):
-            return "{} not of type datetime but type {}, value {}".format(
-                field_name, type(attr), attr)
-
-        return None
+        return check_message(compile_check(field_name, 'datetime', required=required), getattr(self, field_name))
 
     def _validate_bool(self, field_name, required=True):
-
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
-
-        # Type check
-        if not isinstance(attr, bool):
-            return "{} not of type bool but type {}, value {}".format(
-                field_name, type(attr), attr)
-        return None
+        return check_message(compile_check(field_name, 'bool', required=required), getattr(self, field_name))
 
     def _validate_list(self, field_name, min=1, required=True):
-
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
-
-        # Ensure field_name is present and a list
-        if not isinstance(attr, list):
-            return "{} not of type list but type {}, value {}".format(
-                field_name, type(attr), attr)
-
-        # Recheck for empty when not required
-        if len(attr) == 0 and not required:
-            return None
-
-        # Finally check for min length
-        if len(attr) < min:
-            return "{} should have at least {} elements".format(field_name, min)
-        return None
+        return check_message(compile_check(field_name, 'list', min, required=required), getattr(self, field_name))
 
     def _validate_phone(self, field_name, required=True):
-
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
-
-        # Check if it is a string
-        str_check=self._validate_str(field_name, min=0, max=30, required=required)
-
-        if str_check is not None:
-            return str_check
-
-        # Check for the length
-        if len(attr) == 0 and not required:
-            return None
-
-        # Check the regex....
-        val = re.match('[0123456789.()#*wp \-+]*', attr)
-        if  val is None or val.start() != 0 or val.end() != len(attr):
-            return "{} has illegal chars, value {}".format(field_name, attr)
-
-        return None
+        return check_message(compile_check(field_name, 'str', 0, 30, required, phone=True), getattr(self, field_name))
 
     def _validate_uuid(self, field_name, required=True):
+        return check_message(compile_check(field_name, 'uuid', required=required), getattr(self, field_name))
 
-        attr = getattr(self, field_name)
-        if attr is None and not required:
-            return None
+class InoObjectBase(_InoObjectCore):
+    # The base class for stored objects (see _InoObjectCore for the fields list and the methods).  Instances have a
+    # __dict__, so subclasses can add attributes of their own; 'compact=True' subclasses don't (see InoObjectMeta).
+    pass
 
-        if not isinstance(attr, uuid.UUID):
-            return "{} not of type uuid but type {}, value {}".format(
-                field_name, type(attr), attr)
 # === MAIN ===
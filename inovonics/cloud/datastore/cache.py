@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import collections
+import logging
+import threading
+import time
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class InoObjectCache:
+    # An in-process read-through cache of hydrated InoObjectBase objects, keyed by oid, for use with InoModelBase.
+    # - max_size: the least recently used entries are evicted past this many objects.
+    # - ttl: seconds an entry stays valid after it was stored (None to keep entries until evicted or invalidated).
+    # - copy: return copies (InoObjectBase.copy) so callers can't modify the cached objects.
+    # A read racing a write can get the old value after the writer invalidated the entry.  Readers take sequence()
+    # before reading and pass it to put, which then skips objects invalidated since.
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, max_size=1024, ttl=60, copy=True):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.copy = copy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()  # str(oid) -> (expiry, obj)
+        self._sequence = 0  # Incremented by every invalidation
+        # str(oid) -> sequence of its last invalidation, for max_size oids
+        self._invalidated = collections.OrderedDict()
+        self._forgotten = 0  # The newest sequence dropped from _invalidated
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, oid):
+        # The cached object for oid, or None on a miss
+        key = str(oid)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[1].copy() if self.copy else entry[1]
+
+    def sequence(self):
+        # The invalidation sequence number to pass to put for an object about to be read
+        return self._sequence
+
+    def put(self, obj, since=None):
+        # Cache obj, unless since (the sequence() taken before obj was read) is given and it was invalidated since
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+        key = str(obj.oid)
+        obj = obj.copy() if self.copy else obj
+        with self._lock:
+            if since is not None and self._invalidated.get(key, self._forgotten) > since:
+                return
+            self._entries[key] = (expiry, obj)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, oid):
+        key = str(oid)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._sequence += 1
+            self._invalidated[key] = self._sequence
+            self._invalidated.move_to_end(key)
+            if len(self._invalidated) > self.max_size:
+                self._forgotten = self._invalidated.popitem(last=False)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def subscribe(self, datastore, channel):
+        # Invalidate entries when other processes publish oids on channel (see InoModelBase.cache_channel).  The
+        # subscription runs on a daemon thread until stop() is called.
+        pubsub = datastore.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(channel)
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, args=(pubsub,), name='InoObjectCache', daemon=True)
+        self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join()
+            self._listener = None
+
+    def _listen(self, pubsub):
+        try:
+            while not self._stop.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None and message['type'] == 'message':
+                    self.invalidate(message['data'].decode('utf-8'))
+        finally:
+            pubsub.close()
+
+# === MAIN ===
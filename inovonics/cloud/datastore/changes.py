@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+
+import redis
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class InoChange:
+    # One change event read from a change stream (see InoModelBase.change_stream).  fields is the list of field names
+    # written (None for a delete, or a serialized model's save) and version the version saved (None without a
+    # version_field).  node is the datastore node whose stream it came from.
+    # pylint: disable=too-few-public-methods
+    __slots__ = ('node', 'event_id', 'op', 'model', 'oid', 'fields', 'version')
+
+    def __init__(self, node, event_id, entries):
+        self.node = node
+        self.event_id = event_id
+        self.op = entries[b'op'].decode('utf-8')
+        self.model = entries[b'model'].decode('utf-8')
+        self.oid = entries[b'oid'].decode('utf-8')
+        fields = entries.get(b'fields')
+        self.fields = None if fields is None else [name for name in fields.decode('utf-8').split(',') if name]
+        version = entries.get(b'version')
+        self.version = None if version is None else int(version)
+
+    def __repr__(self):
+        return "<InoChange {} {} {} {}>".format(self.event_id.decode('utf-8'), self.op, self.model, self.oid)
+
+class InoChangeStream:
+    # Reads the change events models append to a stream (see InoModelBase.change_stream) as consumer of a Redis consumer
+    # group: every event is delivered to one consumer of the group and stays pending until it's acknowledged, so a
+    # consumer that restarts gets back the events it hadn't finished.  A typical consumer updates its cache from each
+    # batch read and then acks it.  On an InoShardedRedis every node's stream is read.
+    # - start: where a new group starts in the stream: '$' for the events added from now on, '0' for all of them.
+    # - count: the most events read from each node at a time.
+    def __init__(self, datastore, stream, group, consumer, start='$', count=100):
+        # pylint: disable=too-many-arguments
+        self.logger = logging.getLogger(type(self).__name__)
+        self.datastore = datastore
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.count = count
+        # Per node: the ID after which this consumer's pending events (read before but not acknowledged) are read again,
+        # or None once they have been
+        self._pending = {node: '0' for node in datastore.nodes}
+        for node in datastore.nodes:
+            self._create_group(node, start)
+
+    def read(self, count=None, block=None):
+        # The next events for this consumer, up to count (default self.count) from each node: first the ones it had
+        # read but not acknowledged, then new ones.  With block (milliseconds), wait up to that long for new events when
+        # there are none; the nodes are waited on in parallel.
+        count = count or self.count
+        results = self.datastore.map_all(lambda node: self._read_node(node, count, block))
+        return [change for changes in results for change in changes]
+
+    def ack(self, changes):
+        # Acknowledge changes (as read returns them) once they've been handled, so they're not delivered again
+        by_node = {}
+        for change in changes:
+            by_node.setdefault(change.node, []).append(change.event_id)
+        for node, ids in by_node.items():
+            node.redis.xack(self.stream, self.group, *ids)
+
+    def claim(self, min_idle_time, count=None):
+        # Take over the events other consumers of the group read more than min_idle_time milliseconds ago but haven't
+        # acknowledged (e.g. a consumer that went away), up to count from each node, and return them
+        count = count or self.count
+        changes = []
+        for node in self.datastore.nodes:
+            reply = node.redis.xautoclaim(self.stream, self.group, self.consumer, min_idle_time, count=count)
+            changes.extend(self._changes(node, reply[1]))
+        return changes
+
+    def _create_group(self, node, start):
+        # Create the group on node unless it's there already.  Another consumer may create it in between, which is fine.
+        if node.redis.exists(self.stream):
+            if any(group['name'].decode('utf-8') == self.group for group in node.redis.xinfo_groups(self.stream)):
+                return
+        try:
+            node.redis.xgroup_create(self.stream, self.group, id=start, mkstream=True)
+        except redis.ResponseError as ex:
+            if 'BUSYGROUP' not in str(ex):
+                raise
+
+    def _read_node(self, node, count, block):
+        if self._pending[node] is not None:
+            reply = node.redis.xreadgroup(self.group, self.consumer, {self.stream: self._pending[node]}, count=count)
+            entries = reply[0][1] if reply else []
+            if entries:
+                self._pending[node] = entries[-1][0]
+                return self._changes(node, entries)
+            self._pending[node] = None
+        reply = node.redis.xreadgroup(self.group, self.consumer, {self.stream: '>'}, count=count, block=block)
+        return self._changes(node, reply[0][1] if reply else [])
+
+    def _changes(self, node, entries):
+        # InoChanges for (id, entries) stream entries.  Events trimmed from the stream while pending come back without
+        # entries; they're acknowledged and left out.
+        changes = []
+        trimmed = []
+        for event_id, entries_read in entries:
+            if entries_read:
+                changes.append(InoChange(node, event_id, entries_read))
+            else:
+                trimmed.append(event_id)
+        if trimmed:
+            self.logger.warning("%s events were trimmed from %s before being handled", len(trimmed), self.stream)
+            node.redis.xack(self.stream, self.group, *trimmed)
+        return changes
+
+# === MAIN ===
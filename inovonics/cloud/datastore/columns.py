@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from .exceptions import InvalidDataException
+
+# === GLOBALS ===
+# Field types InoColumns holds as numpy arrays (when numpy is installed), and the dtype each gets
+ARRAY_DTYPES = {
+    'bool': 'bool',
+    'float': 'float64',
+    'int': 'int64'
+}
+
+# === FUNCTIONS ===
+def rows_to_columns(rows):
+    # Transpose rows (Redis hash mappings as returned by HGETALL, keys bytes or str) into a dict of field name -> list
+    # of the rows' values, with None where a row doesn't have the field
+    rows = list(rows)
+    columns = {}
+    names = {}
+    for index, row in enumerate(rows):
+        for field, value in row.items():
+            name = names.get(field)
+            if name is None:
+                name = names[field] = field.decode('utf-8') if isinstance(field, bytes) else field
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [None] * len(rows)
+            column[index] = value
+    return columns
+
+def decode_column(decoder, values):
+    # Decode a column of raw hash values in one pass.  Returns the decoded values (None where a value is missing or
+    # can't be decoded) and a dict of row index -> exception for the values that can't be decoded.
+    try:
+        if None in values:
+            return [None if value is None else decoder(value) for value in values], {}
+        return list(map(decoder, values)), {}
+    except (TypeError, ValueError):
+        pass
+    # Go over the column again one value at a time to find the bad rows
+    decoded = []
+    failed = {}
+    for index, value in enumerate(values):
+        try:
+            decoded.append(None if value is None else decoder(value))
+        except (TypeError, ValueError) as ex:
+            decoded.append(None)
+            failed[index] = ex
+    return decoded, failed
+
+def decode_columns(schema, columns, count=None):
+    # Decode the columns (field name -> list of raw hash values, see rows_to_columns) of an InoSchema's fields and the
+    # 'custom_*' fields; other names are ignored.  Returns the decoded field columns, the custom columns (as str), the
+    # number of rows and a dict of row index -> InvalidDataException for the rows with a value that can't be decoded.
+    if count is None:
+        count = max((len(values) for values in columns.values()), default=0)
+    decoded = {}
+    custom = {}
+    errors = {}
+    for name, values in columns.items():
+        if len(values) != count:
+            raise ValueError("Column {} has {} values, expected {}".format(name, len(values), count))
+        if name in schema.hash_decoders:
+            decoded[name], failed = decode_column(schema.hash_decoders[name], values)
+            for index, ex in failed.items():
+                errors.setdefault(index, InvalidDataException("Field {} could not be decoded: {}".format(name, ex)))
+        elif name.startswith('custom_'):
+            custom[name] = [value.decode('utf-8') if isinstance(value, bytes) else value for value in values]
+    return decoded, custom, count, errors
+
+# === CLASSES ===
+class InoColumns:
+    # The decoded field values of a batch of rows, held by column, for callers that want the values rather than objects
+    # (see InoObjectBase.columns_from_rows).  columns[name] is the column of a field: with numpy installed, bool, int
+    # and float columns with a value in every row are numpy arrays; everything else is a list with None for the rows
+    # that don't have the field.  errors is a dict of row index -> InvalidDataException for the rows with a value that
+    # couldn't be decoded (None in every column).  Rows aren't validated.
+    def __init__(self, schema, columns, count=None):
+        decoded, _, self.count, self.errors = decode_columns(schema, columns, count)
+        for index in self.errors:
+            for values in decoded.values():
+                values[index] = None
+        self.columns = {}
+        for name, values in decoded.items():
+            dtype = ARRAY_DTYPES.get(schema.index[name]['type'])
+            if numpy is not None and dtype is not None and None not in values:
+                try:
+                    values = numpy.array(values, dtype=dtype)
+                except OverflowError:
+                    # ints that don't fit in 64 bits stay Python ints
+                    pass
+            self.columns[name] = values
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def keys(self):
+        return self.columns.keys()
+
+# === MAIN ===
@@ -7,6 +7,9 @@
 # === FUNCTIONS ===
 
 # === CLASSES ===
+class ConflictException(Exception):
+    pass
+
 class DuplicateException(Exception):
     pass
 
@@ -19,6 +22,21 @@ class InvalidDataException(Exception):
 class NotExistsException(Exception):
     pass
 
+class NotLoadedException(AttributeError):
+    # Raised on reading a field a projected load (fields=[...]) didn't include.  It's an AttributeError, so hasattr()
+    # and getattr() with a default treat the field as absent.
+    pass
+
+class ValidationException(InvalidDataException):
+    # Raised when an object fails validation.  'errors' holds the individual failures (FieldErrors, or strings from
+    # custom validation methods); the message is only built when the exception is displayed.
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self):
+        return "Validation Error List: {}".format(self.errors)
+
 class UnauthorizedException(Exception):
     pass
 
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import string
+import uuid
+
+import dateutil.parser
+
+# === GLOBALS ===
+EPOCH = datetime.datetime(1970, 1, 1)
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+_new_object = object.__new__
+_set_attribute = object.__setattr__
+_UUID = uuid.UUID
+_fromisoformat = datetime.datetime.fromisoformat
+_SAFE_UNKNOWN = uuid.SafeUUID.unknown
+_HEX_DIGITS = frozenset(string.hexdigits)
+
+# === FUNCTIONS ===
+# Decoders.  These accept every representation the package has written for a type (so old and new encodings can
+# coexist) and take a fast path for the forms InoObjectBase emits itself.
+def parse_datetime(value):
+    # isoformat() strings (str or bytes), epoch-microsecond integers or datetimes.  Anything fromisoformat can't read
+    # goes through dateutil, which is slow but handles the legacy formats (including all-digit ones like '20200102', so
+    # digit strings are only read as epoch microseconds by parse_epoch_us).
+    if value.__class__ is not str:
+        if isinstance(value, datetime.datetime):
+            return value
+        if isinstance(value, int):
+            return epoch_us_to_datetime(value)
+        value = value.decode('utf-8')
+    try:
+        return _fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return dateutil.parser.parse(value)
+    except OverflowError as ex:
+        raise ValueError("Datetime out of range: {}".format(value)) from ex
+
+def parse_epoch_us(value):
+    # The decoder for datetime fields stored with the 'epoch_us' encoding: signed epoch-microsecond integers (str or
+    # bytes), falling back to parse_datetime for values written before the field was switched over.
+    if value.__class__ is bytes or value.__class__ is str:
+        try:
+            micros = int(value)
+        except ValueError:
+            return parse_datetime(value)
+        return epoch_us_to_datetime(micros)
+    return parse_datetime(value)
+
+def parse_uuid(value):
+    # UUID strings (str or bytes), 16 byte raw UUIDs or UUIDs.  Strings are parsed here rather than by uuid.UUID, which
+    # hands the digits to int() and so also takes a '0x' or sign, underscores and whitespace; only hex digits and
+    # dashes are accepted, with the optional 'urn:uuid:' prefix and braces uuid.UUID allows.
+    if value.__class__ is not str:
+        if isinstance(value, uuid.UUID):
+            return value
+        if len(value) == 16:
+            return _make_uuid(int.from_bytes(value, 'big'))
+        value = value.decode('utf-8')
+    hex_digits = value.replace('-', '')
+    if len(hex_digits) != 32:
+        hex_digits = value.replace('urn:', '').replace('uuid:', '').strip('{}').replace('-', '')
+    if len(hex_digits) != 32 or not _HEX_DIGITS.issuperset(hex_digits):
+        raise ValueError("Badly formed hexadecimal UUID string: {!r}".format(value))
+    return _make_uuid(int(hex_digits, 16))
+
+def epoch_us_to_datetime(value):
+    try:
+        return EPOCH + datetime.timedelta(microseconds=value)
+    except OverflowError as ex:
+        raise ValueError("Epoch microseconds out of range: {}".format(value)) from ex
+
+# Compact encoders, selected per field with the 'encoding' entry.
+def datetime_to_epoch_us(value):
+    # Microseconds since the epoch.  Naive datetimes are taken as UTC (as produced by utcnow()); aware ones are
+    # converted to UTC, and come back naive.
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // ONE_MICROSECOND
+
+def uuid_to_bytes(value):
+    return value.bytes
+
+def _make_uuid(value):
+    # Equivalent to uuid.UUID(int=value) for a value already known to be in range, without the argument checks.
+    obj = _new_object(_UUID)
+    _set_attribute(obj, 'int', value)
+    _set_attribute(obj, 'is_safe', _SAFE_UNKNOWN)
+    return obj
+
+# === CLASSES ===
+
+# === MAIN ===
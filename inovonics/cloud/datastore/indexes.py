@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import time
+
+from . import fieldcodecs
+
+# === GLOBALS ===
+# Index kinds a field can declare with its 'index' entry:
+# - 'hash': exact match lookups.  One sorted set per value ('<prefix>:_idx:<field>:<value>') with every member scored
+# 0, so the oids come back in a stable order and can be paged with ZRANGE.
+# - 'sorted': range lookups on numeric, bool and datetime fields.  One sorted set per field ('<prefix>:_sorted:<field>')
+# scored by the value (datetimes as epoch seconds).
+# - 'unique': exact match lookups that also reject duplicates.  One hash per field ('<prefix>:_unique:<field>') mapping
+# value -> oid.
+# A datetime field with a 'sorted' index can also declare a 'retention' in seconds: entries older than that are left out
+# of range queries and trimmed from the index as objects are saved (or by InoModelBase.trim_indexes), so the index of a
+# field like 'modified' stays bounded.  The objects themselves are kept.
+INDEX_TYPES = ('hash', 'sorted', 'unique')
+SORTABLE_TYPES = ('bool', 'datetime', 'float', 'int')
+
+# === FUNCTIONS ===
+def index_value(field_type, value):
+    # The string a value is indexed under for 'hash' and 'unique' indexes
+    if field_type == 'datetime':
+        return value.isoformat()
+    return str(value)
+
+def index_score(field_type, value):
+    # The score a value is indexed with for 'sorted' indexes
+    if field_type == 'datetime':
+        return fieldcodecs.datetime_to_epoch_us(value) / 1e6
+    return float(value)
+
+def score_limit(start, num):
+    # The start and num a ZRANGEBYSCORE is paged with.  Its LIMIT needs both an offset and a count; a negative count
+    # means all.
+    if start or num is not None:
+        return start, -1 if num is None else num
+    return None, None
+
+def check_index(field):
+    # Raise TypeError for an 'index' (or 'retention') entry that can't be maintained for the field
+    if 'retention' in field:
+        if field.get('index') != 'sorted' or field['type'] != 'datetime':
+            raise TypeError("Field {} can't have a retention, only datetime fields with a sorted index can".format(
+                field['name']))
+        if not field['retention'] > 0:
+            raise TypeError("Field {} has a retention of {}, it must be positive".format(
+                field['name'], field['retention']))
+    if field['index'] not in INDEX_TYPES:
+        raise TypeError("Field {} has unsupported index {}".format(field['name'], field['index']))
+    if field['type'] == 'list':
+        raise TypeError("Field {} is a list and can't be indexed".format(field['name']))
+    if field['index'] == 'sorted' and field['type'] not in SORTABLE_TYPES:
+        raise TypeError("Field {} of type {} can't have a sorted index".format(field['name'], field['type']))
+
+# === CLASSES ===
+class InoIndexes:
+    # Maintains the secondary indexes declared in an object class's fields for one model.  The queue_* methods only add
+    # commands to a pipeline so the index changes go out (and, in a transaction, apply) with the object write.
+    def __init__(self, key_prefix, schema):
+        self.key_prefix = key_prefix
+        # (name, kind, type) for each indexed field
+        self.fields = [(name, field['index'], field['type']) for name, field in schema.index.items()
+                       if field.get('index')]
+        self.names = [name for name, _, _ in self.fields]
+        self.kinds = {name: (kind, field_type) for name, kind, field_type in self.fields}
+        # name -> seconds the index entries are kept, for the fields with a retention
+        self.retention = {name: schema.index[name]['retention'] for name in self.names
+                          if 'retention' in schema.index[name]}
+        # The save script reads the old index values from the stored hash, so it can't be used when 'hash' or 'unique'
+        # fields are stored in a compact encoding that differs from their index value
+        self.scriptable = not any(schema.index[name].get('encoding') for name, kind, _ in self.fields
+                                  if kind != 'sorted')
+
+    def __bool__(self):
+        return bool(self.fields)
+
+    def key(self, name, value=None):
+        kind, field_type = self.kinds[name]
+        if kind == 'hash':
+            return self._hash_prefix(name) + index_value(field_type, value)
+        if kind == 'sorted':
+            return "{}:_sorted:{}".format(self.key_prefix, name)
+        return "{}:_unique:{}".format(self.key_prefix, name)
+
+    def cutoff(self, name, now=None):
+        # The lowest score name's index keeps (now, in epoch seconds, less the retention), or None without a retention
+        if name not in self.retention:
+            return None
+        return (time.time() if now is None else now) - self.retention[name]
+
+    def score_range(self, name, low=None, high=None):
+        # (key, min, max) of a range query on name's sorted index between low and high (None for unbounded), leaving
+        # out the entries older than its retention
+        kind, field_type = self.kinds[name]
+        if kind != 'sorted':
+            raise TypeError("Field {} does not have a sorted index".format(name))
+        low = None if low is None else index_score(field_type, low)
+        cutoff = self.cutoff(name)
+        if cutoff is not None and (low is None or low < cutoff):
+            low = cutoff
+        low = '-inf' if low is None else low
+        high = '+inf' if high is None else index_score(field_type, high)
+        return self.key(name), low, high
+
+    def queue_trim(self, pipe, now=None):
+        # Queue the removal of the entries older than their field's retention, returning what pipe returns for each
+        return [pipe.zremrangebyscore(self.key(name), '-inf', '({}'.format(self.cutoff(name, now)))
+                for name in self.retention]
+
+    def unique_values(self, values):
+        # (name, index value) for the unique fields set in values (name -> field value)
+        return [(name, index_value(field_type, values[name])) for name, kind, field_type in self.fields
+                if kind == 'unique' and values.get(name) is not None]
+
+    def script_args(self, values):
+        # The index arguments of the save script (see scripts.SAVE) for the fields in values (name -> field value, None
+        # for no entry).  Indexed fields not in values keep their entries.
+        args = []
+        count = 0
+        for name, kind, field_type in self.fields:
+            if name not in values:
+                continue
+            value = values[name]
+            key = self._hash_prefix(name) if kind == 'hash' else self.key(name)
+            if value is None:
+                args.extend([name, kind, int(field_type == 'bool'), key, 0, '', ''])
+            else:
+                score = index_score(field_type, value) if kind == 'sorted' else ''
+                args.extend([name, kind, int(field_type == 'bool'), key, 1, index_value(field_type, value), score])
+            count += 1
+        return [count] + args
+
+    def script_keys(self, values):
+        # The index keys the save script writes for the fields in values (as for script_args), apart from the 'hash'
+        # index entries of the old values, which only the script knows
+        keys = []
+        for name, kind, _ in self.fields:
+            if name in values and (kind != 'hash' or values[name] is not None):
+                keys.append(self.key(name, values[name]))
+        return keys
+
+    def queue_update(self, pipe, oid, old_values, new_values):
+        # Move oid's index entries from old_values to new_values (name -> field value; None or missing for no entry)
+        oid = str(oid)
+        for name, kind, field_type in self.fields:
+            old = old_values.get(name)
+            new = new_values.get(name)
+            if old is not None and (new is None or index_value(field_type, old) != index_value(field_type, new)):
+                self._queue_remove(pipe, oid, name, kind, field_type, old)
+            if new is not None:
+                self._queue_add(pipe, oid, name, kind, field_type, new)
+
+    def queue_remove(self, pipe, oid, old_values):
+        self.queue_update(pipe, oid, old_values, {})
+
+    def _hash_prefix(self, name):
+        return "{}:_idx:{}:".format(self.key_prefix, name)
+
+    def _queue_add(self, pipe, oid, name, kind, field_type, value):
+        # pylint: disable=too-many-arguments
+        if kind == 'hash':
+            pipe.zadd(self.key(name, value), {oid: 0})
+        elif kind == 'sorted':
+            pipe.zadd(self.key(name), {oid: index_score(field_type, value)})
+        else:
+            pipe.hset(self.key(name), index_value(field_type, value), oid)
+
+    def _queue_remove(self, pipe, oid, name, kind, field_type, value):
+        # pylint: disable=too-many-arguments
+        if kind == 'hash':
+            pipe.zrem(self.key(name, value), oid)
+        elif kind == 'sorted':
+            pipe.zrem(self.key(name), oid)
+        else:
+            pipe.hdel(self.key(name), index_value(field_type, value))
+
+# === MAIN ===
@@ -1,30 +1,310 @@
 #!/usr/bin/env python3
 
 # === IMPORTS ===
+import hashlib
+import itertools
 import logging
+import os
+import time
 import redis
+import redis.client
+import redis.sentinel
 import redpipe
+from .metrics import SIZE_BUCKETS
+from .replicas import InoReplica, InoReplicaSet
+from .scripts import SCRIPTS
 
 # === GLOBALS ===
+# Used to give every InoRedis its own redpipe connection name
+_REDPIPE_IDS = itertools.count(1)
 
 # === FUNCTIONS ===
+def _record_round_trip(metrics, commands, kind, elapsed):
+    for command in commands:
+        metrics.incr('redis_commands_total', (('command', str(command).upper()),))
+    metrics.observe('redis_seconds', elapsed, (('command', kind),))
 
 # === CLASSES ===
+class MeteredRedis(redis.StrictRedis):
+    # The client InoRedis uses when given metrics: commands and pipelines report their counts and latencies
+    # pylint: disable=abstract-method,too-many-ancestors
+    metrics = None
+
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _record_round_trip(self.metrics, [args[0]], args[0], time.perf_counter() - start)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = MeteredPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+        pipe.metrics = self.metrics
+        return pipe
+
+class MeteredPipeline(redis.client.Pipeline):
+    # pylint: disable=abstract-method,too-many-ancestors
+    metrics = None
+
+    def execute(self, raise_on_error=True):
+        commands = [args[0] for args, _ in self.command_stack]
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            if commands:
+                self.metrics.observe('redis_pipeline_size', len(commands), buckets=SIZE_BUCKETS)
+                kind = 'MULTI' if self.transaction or self.explicit_transaction else 'PIPELINE'
+                _record_round_trip(self.metrics, commands, kind, time.perf_counter() - start)
+
+    def immediate_execute_command(self, *args, **options):
+        # WATCH and the reads between it and MULTI go straight to the server
+        start = time.perf_counter()
+        try:
+            return super().immediate_execute_command(*args, **options)
+        finally:
+            _record_round_trip(self.metrics, [args[0]], args[0], time.perf_counter() - start)
+
 class InoRedis:
-    # pylint: disable=too-few-public-methods
-    def __init__(self, host, port=6379, db=0):
+    # Connection settings:
+    # - connection_pool: an existing redis.ConnectionPool to share between datastores.  When given, the other pool
+    # settings are ignored and close() leaves the pool alone.
+    # - max_connections/blocking/pool_timeout: size of the pool built otherwise.  With blocking=True callers wait up to
+    # pool_timeout seconds for a free connection instead of failing when max_connections is reached.
+    # - socket_timeout/socket_connect_timeout/socket_keepalive/health_check_interval: passed to the connections.
+    # - redpipe_name: the name this datastore's connection is registered under with redpipe.  Defaults to a name unique
+    # to the instance so several datastores can coexist in one process.
+    # - metrics: an InoMetrics to record command counts and latencies in, and the models' timings (see InoMetrics).
+    # - replicas: (host, port[, db]) of read replicas of this server.  The models' reads go to them (see read), picked
+    # by replica_selection, 'round_robin' or 'latency'.  A replica that can't be reached, or whose replication is more
+    # than max_replica_lag seconds behind the primary, is left out for replica_retry_interval seconds and its reads go
+    # to the primary.  Replicas are checked at most every replica_check_interval seconds.  They use the same pool
+    # settings as the primary.  See from_sentinel to find the primary and replicas with Sentinel.
+    # A datastore can be made before forking (gunicorn's preload_app, multiprocessing): the first time a child process
+    # uses it, it drops the connections inherited from the parent, without closing them, and opens its own.
+    # pylint: disable=too-many-arguments,too-many-instance-attributes,too-many-locals
+    # Object keys don't need hash tags ('<prefix>:{<oid>}') on a single server (see InoShardedRedis)
+    hash_tags = False
+
+    def __init__(self, host, port=6379, db=0, connection_pool=None, max_connections=None, blocking=False,
+                 pool_timeout=20, socket_timeout=None, socket_connect_timeout=None, socket_keepalive=False,
+                 health_check_interval=0, redpipe_name=None, metrics=None, replicas=None,
+                 replica_selection='round_robin', max_replica_lag=None, replica_check_interval=1.0,
+                 replica_retry_interval=5.0):
         self.logger = logging.getLogger(type(self).__name__)
         self.logger.info("Initiallizing Redis and Redpipe connections.")
         # Initialize redis connection
         self.redis_host = host
         self.redis_port = port
         self.redis_db = db
-        self.redis = redis.StrictRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        self._owns_pool = connection_pool is None
+        pool_kwargs = {
+            'max_connections': max_connections,
+            'socket_timeout': socket_timeout,
+            'socket_connect_timeout': socket_connect_timeout,
+            'socket_keepalive': socket_keepalive,
+            'health_check_interval': health_check_interval
+        }
+        if blocking:
+            pool_kwargs['timeout'] = pool_timeout
+        pool_class = redis.BlockingConnectionPool if blocking else redis.ConnectionPool
+        if connection_pool is None:
+            connection_pool = pool_class(host=self.redis_host, port=self.redis_port, db=self.redis_db, **pool_kwargs)
+        self.connection_pool = connection_pool
+        self.metrics = metrics
+        self._redis = self._client(self.connection_pool)
+        # The process the connections belong to (see _check_pid)
+        self._pid = os.getpid()
         # Initialize redpipe connection
-        redpipe.connect_redis(self.redis)
+        self.redpipe_name = redpipe_name or "inoredis-{}".format(next(_REDPIPE_IDS))
+        redpipe.connect_redis(self.redis, name=self.redpipe_name)
+        redpipe.connect_redis(self.redis, name=self._transaction_name, transaction=True)
+        # Read replicas, each registered with redpipe under its own name
+        self.replicas = None
+        if replicas:
+            members = []
+            for i, replica in enumerate(replicas):
+                host, port, replica_db = (tuple(replica) + (self.redis_db,))[:3]
+                client = self._client(pool_class(host=host, port=port, db=replica_db, **pool_kwargs))
+                members.append(InoReplica(client, "{}:replica{}".format(self.redpipe_name, i)))
+                redpipe.connect_redis(client, name=members[-1].redpipe_name)
+            self.replicas = InoReplicaSet(members, replica_selection, max_replica_lag, replica_check_interval,
+                                          replica_retry_interval, primary=self._redis)
+        # Lua scripts by name: (source, SHA1).  They're loaded into Redis when first run.
+        self.scripts = {}
+        self._scripts_loaded = False
+        for name, source in SCRIPTS.items():
+            self.register_script(name, source)
+        # The servers the models' data is spread over: just this one (see InoShardedRedis)
+        self.nodes = [self]
+        self.closed = False
+
+    @classmethod
+    def from_sentinel(cls, sentinels, service_name, db=0, **kwargs):
+        # A datastore on the primary Sentinel reports for service_name, reading from the replicas it reports at the
+        # time.  sentinels is a list of (host, port) of Sentinel servers.  The primary connections follow failovers.
+        sentinel = redis.sentinel.Sentinel(sentinels)
+        host, port = sentinel.discover_master(service_name)
+        pool = redis.sentinel.SentinelConnectionPool(service_name, sentinel, db=db)
+        replicas = [(replica_host, replica_port, db) for replica_host, replica_port in
+                    sentinel.discover_slaves(service_name)]
+        datastore = cls(host, port, db, connection_pool=pool, replicas=replicas, **kwargs)
+        datastore._owns_pool = True  # pylint: disable=protected-access
+        return datastore
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def redis(self):
+        # The redis-py client for the primary
+        if self._pid != os.getpid():
+            self._after_fork()
+        return self._redis
+
+    @property
+    def _transaction_name(self):
+        return self.redpipe_name + ':transaction'
+
+    def pipeline(self, pipe=None, autoexec=True, transaction=False):
+        # A redpipe pipeline on this datastore's connection.  Passing an existing pipeline nests into it.  With
+        # transaction=True the commands are wrapped in MULTI/EXEC so they apply atomically.
+        if self._pid != os.getpid():
+            self._after_fork()
+        name = self._transaction_name if transaction else self.redpipe_name
+        return redpipe.pipeline(pipe, name=name, autoexec=autoexec)
+
+    def map_nodes(self, func, items, key):  # pylint: disable=unused-argument
+        # Call func(node, items) for the items on each node and return the results.  A single server holds every key.
+        items = list(items)
+        return [func(self, items)] if items else []
+
+    def read(self, func, primary=False, pipeline=True):
+        # Run a read on a replica, or on the primary if there are none, none is usable or primary is True (to read
+        # your own writes).  func(pipe) queues the commands on a redpipe pipeline executed once it returns; with
+        # pipeline=False, func(client) runs them on a redis-py client.  Returns what func returns.  If the replica
+        # fails, it's left out (see InoReplicaSet) and func is run again on the primary, so it must be safe to repeat.
+        if self._pid != os.getpid():
+            self._after_fork()
+        replica = None if primary or self.replicas is None else self.replicas.pick()
+        if replica is not None:
+            try:
+                return self._read_on(func, replica.client, replica.redpipe_name, pipeline)
+            except (redis.ConnectionError, redis.TimeoutError) as ex:
+                self.replicas.mark_down(replica, ex)
+        return self._read_on(func, self._redis, self.redpipe_name, pipeline)
+
+    def map_all(self, func):
+        # Call func(node) for every node and return the results
+        return [func(self)]
+
+    def register_script(self, name, source):
+        # Add a Lua script to the registry, to be run with evalsha/execute_scripts
+        self.scripts[name] = (source, hashlib.sha1(source.encode('utf-8')).hexdigest())
+        self._scripts_loaded = False
+
+    def load_scripts(self):
+        # SCRIPT LOAD every registered script.  Done once before they're first run, and again after Redis reports one
+        # missing (NOSCRIPT), e.g. after a restart or SCRIPT FLUSH.
+        for source, _ in self.scripts.values():
+            self.redis.script_load(source)
+        self._scripts_loaded = True
+
+    def evalsha(self, name, keys=(), args=(), pipe=None):
+        # Run the registered script name with EVALSHA.  With a redis-py pipeline the command is only queued on it; run
+        # the pipeline with execute_scripts so a NOSCRIPT reply is handled.
+        sha = self.scripts[name][1]
+        if pipe is not None:
+            return pipe.evalsha(sha, len(keys), *keys, *args)
+        if not self._scripts_loaded:
+            self.load_scripts()
+        try:
+            return self.redis.evalsha(sha, len(keys), *keys, *args)
+        except (redis.exceptions.NoScriptError, redis.ConnectionError) as ex:
+            if not self._lost_scripts(ex):
+                raise
+            self._reload_scripts()
+            return self.redis.evalsha(sha, len(keys), *keys, *args)
+
+    def execute_scripts(self, queue_commands):
+        # Call queue_commands(pipe) on a new (non-transactional) redis-py pipeline and execute it in one round trip,
+        # returning the replies.  If Redis has lost the scripts, they're loaded again and the pipeline is rerun, so
+        # queue_commands must only queue commands that are safe to repeat.
+        if not self._scripts_loaded:
+            self.load_scripts()
+        for attempt in range(2):
+            with self.redis.pipeline(transaction=False) as pipe:
+                queue_commands(pipe)
+                try:
+                    return pipe.execute()
+                except (redis.exceptions.NoScriptError, redis.ConnectionError) as ex:
+                    if attempt or not self._lost_scripts(ex):
+                        raise
+                    self._reload_scripts()
+        return None
+
+    def _lost_scripts(self, ex):
+        # Whether ex, raised running scripts, means Redis has lost them.  Some servers close the connection after a
+        # NOSCRIPT reply instead of going on, so after a connection error the scripts are looked up: if they're missing,
+        # none of them ran.
+        if isinstance(ex, redis.exceptions.NoScriptError):
+            return True
+        return not all(self.redis.script_exists(*[sha for _, sha in self.scripts.values()]))
+
+    def _reload_scripts(self):
+        # load_scripts after Redis lost them.  The connection the NOSCRIPT reply came on may since have been closed by
+        # the server (see _lost_scripts), in which case the first try fails on it.
+        try:
+            self.load_scripts()
+        except redis.ConnectionError:
+            self.load_scripts()
+
+    def _after_fork(self):
+        # The first use in a forked child.  Its pools still hold the parent's sockets: they're forgotten rather than
+        # closed (closing them would shut the parent's connections down) and the child connects on its own.  The redpipe
+        # names stay bound to the same clients, which then use the new connections.
+        self.logger.info("Process %s was forked from %s, dropping the inherited connections.", os.getpid(), self._pid)
+        self._pid = os.getpid()
+        self.connection_pool.reset()
+        if self.replicas is not None:
+            for replica in self.replicas.replicas:
+                replica.client.connection_pool.reset()
+            self.replicas.after_fork()
+
+    def _client(self, connection_pool):
+        if self.metrics is None:
+            return redis.StrictRedis(connection_pool=connection_pool)
+        client = MeteredRedis(connection_pool=connection_pool)
+        client.metrics = self.metrics
+        return client
+
+    @staticmethod
+    def _read_on(func, client, redpipe_name, pipeline):
+        if not pipeline:
+            return func(client)
+        with redpipe.pipeline(name=redpipe_name, autoexec=True) as pipe:
+            result = func(pipe)
+        return result
 
-    def __del__(self):
-        self.logger.info("Destructing Redis and Redpipe connections.")
-        redpipe.reset()
+    def close(self):
+        # Unregister this datastore from redpipe and, if the pool isn't shared, close its connections.  Other
+        # datastores in the process are unaffected.
+        if self.closed:
+            return
+        if self._pid != os.getpid():
+            # Only close this process's connections
+            self._after_fork()
+        self.logger.info("Closing Redis and Redpipe connections.")
+        redpipe.disconnect(self.redpipe_name)
+        redpipe.disconnect(self._transaction_name)
+        if self._owns_pool:
+            self.connection_pool.disconnect()
+        for replica in self.replicas.replicas if self.replicas is not None else []:
+            redpipe.disconnect(replica.redpipe_name)
+            replica.client.connection_pool.disconnect()
+        self.closed = True
 
 # === MAIN ===
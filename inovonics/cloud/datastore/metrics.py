@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import asyncio
+import contextlib
+import functools
+import threading
+import time
+
+# === GLOBALS ===
+# Histogram bucket upper bounds for latencies in seconds, and for pipeline sizes in commands
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# What timed() returns when metrics are disabled
+NULL_TIMER = contextlib.nullcontext()
+
+# === FUNCTIONS ===
+def timed_operation(method):
+    # Decorator for InoModelBase methods: with metrics enabled on the model, records the call's duration in the
+    # 'operation_seconds' histogram, labelled with the object class and method name.  Works on coroutine methods too.
+    operation = method.__name__
+
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            if self.metrics is None:
+                return await method(self, *args, **kwargs)
+            with self.metrics.timer('operation', self.metric_labels + (('operation', operation),)):
+                return await method(self, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.metrics is None:
+            return method(self, *args, **kwargs)
+        with self.metrics.timer('operation', self.metric_labels + (('operation', operation),)):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _series_key(item):
+    # Sort key for the (name, labels) -> value items of the registry: label values can be None or of mixed types, which
+    # don't compare, so they're compared as strings (None as '')
+    (name, labels), _ = item
+    return name, tuple((key, '' if value is None else str(value)) for key, value in labels)
+
+def _escape_label(value):
+    # A label value escaped for the Prometheus text format
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# === CLASSES ===
+class InoMetrics:
+    # A registry of counters and histograms, filled in by the datastores and models it's passed to
+    # (InoRedis(metrics=...)):
+    # - redis_commands_total{command}: commands sent, counting each command in a pipeline
+    # - redis_seconds{command}: round trip latency, with command 'PIPELINE' or 'MULTI' for pipelines
+    # - redis_pipeline_size: commands per pipeline
+    # - operation_seconds{class,operation}: duration of the model's bulk calls (get_many, save_many, ...)
+    # - hydrate_seconds/serialize_seconds/validate_seconds{class}: time spent building objects from Redis replies,
+    # encoding them for writes and validating them, per batch, with the matching *_objects_total counters
+    # Labels are tuples of (name, value) pairs.  Callbacks added with add_callback are called as callback(name, labels,
+    # value) for every increment and observation, to forward them elsewhere.  Nothing is recorded, and the instrumented
+    # code paths are skipped, when a datastore has no metrics.
+    def __init__(self, prefix='inodatastore'):
+        self.prefix = prefix
+        self.callbacks = []
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [buckets, bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def incr(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        for callback in self.callbacks:
+            callback(name, labels, amount)
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [buckets, [0] * len(buckets), 0, 0]
+            counts = histogram[1]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            histogram[2] += value
+            histogram[3] += 1
+        for callback in self.callbacks:
+            callback(name, labels, value)
+
+    @contextlib.contextmanager
+    def timer(self, stage, labels=(), count=None):
+        # Observe the time the block takes as '<stage>_seconds', and add count to '<stage>_objects_total' if given
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage + '_seconds', time.perf_counter() - start, labels)
+            if count is not None:
+                self.incr(stage + '_objects_total', labels, count)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def get_stats(self):
+        # The current values as a dict of series name (Prometheus style, e.g. 'redis_seconds{command="GET"}') -> value
+        # for counters, or -> {'count', 'sum', 'buckets': {upper bound: cumulative count}} for histograms
+        stats = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                stats[self._series(name, labels)] = value
+            for (name, labels), (buckets, counts, total, count) in self._histograms.items():
+                cumulative = {}
+                running = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    running += bucket_count
+                    cumulative[bound] = running
+                stats[self._series(name, labels)] = {'count': count, 'sum': total, 'buckets': cumulative}
+        return stats
+
+    def to_prometheus(self):
+        # The current values in the Prometheus text exposition format
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items(), key=_series_key)
+            histograms = sorted(self._histograms.items(), key=_series_key)
+        typed = set()
+        for (name, labels), value in counters:
+            name = '{}_{}'.format(self.prefix, name)
+            if name not in typed:
+                typed.add(name)
+                lines.append("# TYPE {} counter".format(name))
+            lines.append("{} {}".format(self._series(name, labels), value))
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            name = '{}_{}'.format(self.prefix, name)
+            if name not in typed:
+                typed.add(name)
+                lines.append("# TYPE {} histogram".format(name))
+            running = 0
+            for bound, bucket_count in zip(buckets, counts):
+                running += bucket_count
+                lines.append("{} {}".format(self._series(name + '_bucket', labels + (('le', bound),)), running))
+            lines.append("{} {}".format(self._series(name + '_bucket', labels + (('le', '+Inf'),)), count))
+            lines.append("{} {}".format(self._series(name + '_sum', labels), total))
+            lines.append("{} {}".format(self._series(name + '_count', labels), count))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _series(name, labels):
+        if not labels:
+            return name
+        return '{}{{{}}}'.format(name, ','.join('{}="{}"'.format(key, _escape_label(value)) for key, value in labels))
+
+# === MAIN ===
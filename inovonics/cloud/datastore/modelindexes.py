@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import heapq
+import itertools
+
+from .indexes import index_value, score_limit
+from .metrics import timed_operation
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class _IndexQueriesMixin:
+    # The secondary index queries of InoModelBase (see indexes.InoIndexes for the index kinds).  Reads take primary as
+    # InoModelBase.get_many does; with several nodes, each node's index is queried and the pages merged.
+    @timed_operation
+    def find_by(self, field, value, offset=0, count=None, primary=False):
+        # The objects whose indexed field equals value, paged by offset/count (ordered by oid for 'hash' indexes).
+        kind, field_type = self.indexes.kinds[field]
+        if kind == 'unique':
+            # Models with unique indexes are on a single node
+            key = self.indexes.key(field)
+            oid = self.datastore.nodes[0].read(lambda client: client.hget(key, index_value(field_type, value)),
+                                               primary, pipeline=False)
+            oids = [oid] if oid is not None and offset == 0 and count != 0 else []
+        elif kind == 'hash':
+            key = self.indexes.key(field, value)
+
+            def query(client, start, num):
+                return client.zrange(key, start, -1 if num is None else start + num - 1, withscores=True)
+            oids = self._query_nodes(query, offset, count, primary=primary)
+        else:
+            return self.range_by(field, value, value, offset, count, primary=primary)
+        return self._get_indexed([oid.decode('utf-8') for oid in oids], primary)
+
+    @timed_operation
+    def range_by(self, field, low=None, high=None, offset=0, count=None, reverse=False, primary=False):
+        # The objects whose 'sorted' indexed field is between low and high (inclusive, None for unbounded), in value
+        # order (descending with reverse=True, e.g. newest first), paged by offset/count.  For a field with a
+        # retention, entries older than it are left out even before they're trimmed.
+        # pylint: disable=too-many-arguments
+        key, low, high = self.indexes.score_range(field, low, high)
+
+        def query(client, start, num):
+            start, num = score_limit(start, num)
+            if reverse:
+                return client.zrevrangebyscore(key, high, low, start=start, num=num, withscores=True)
+            return client.zrangebyscore(key, low, high, start=start, num=num, withscores=True)
+        oids = self._query_nodes(query, offset, count, reverse, primary)
+        return self._get_indexed([oid.decode('utf-8') for oid in oids], primary)
+
+    @timed_operation
+    def trim_indexes(self):
+        # Remove the sorted index entries older than their field's retention on every node, as saves do, e.g. from a
+        # periodic job for models that aren't saved often.  Returns the number of entries removed.
+        if not self.indexes or not self.indexes.retention:
+            return 0
+
+        def trim(node):
+            with node.pipeline() as pipe:
+                results = self.indexes.queue_trim(pipe)
+            return sum(result.result for result in results)
+        return sum(self.datastore.map_all(trim))
+
+    def _query_nodes(self, query, offset, count, reverse=False, primary=False):
+        # The members of one page of an index query.  query(client, start, num) returns (member, score) pairs from one
+        # node's index, num None for all of them.  With several nodes, each is asked for its first offset + count
+        # entries and those are merged in (score, member) order before paging.
+        if count == 0:
+            return []
+        nodes = self.datastore.nodes
+        if len(nodes) == 1:
+            page = nodes[0].read(lambda client: query(client, offset, count), primary, pipeline=False)
+            return [member for member, _ in page]
+        stop = None if count is None else offset + count
+        pages = self.datastore.map_all(lambda node: node.read(lambda client: query(client, 0, stop), primary,
+                                                              pipeline=False))
+        merged = heapq.merge(*pages, key=lambda entry: (entry[1], entry[0]), reverse=reverse)
+        return [member for member, _ in itertools.islice(merged, offset, stop)]
+
+    def _get_indexed(self, oids, primary=False):
+        # Load the objects an index pointed at; entries for objects that have since gone are skipped.
+        objects, _ = self.get_many(oids, primary=primary)
+        return objects
+
+# === MAIN ===
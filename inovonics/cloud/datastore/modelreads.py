@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from .exceptions import InvalidDataException, NotExistsException, ValidationException
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class _ModelReadsMixin:
+    # The read helpers InoModelBase and AsyncInoModelBase share: the cache, queueing the reads of stored objects on a
+    # pipeline and building objects (or columns) from the replies.  None of them do I/O.
+    # pylint: disable=too-few-public-methods
+    def _get_cached(self, oids):
+        # oid -> object for the oids found in the cache
+        found = {}
+        if self.cache is not None:
+            for oid in oids:
+                obj = self.cache.get(oid)
+                if obj is not None:
+                    found[oid] = obj
+        return found
+
+    def _cache_put(self, obj, since=None):
+        if self.cache is not None:
+            self.cache.put(obj, since)
+
+    def _cache_sequence(self):
+        # The cache's sequence number before a read (see InoObjectCache.put)
+        return None if self.cache is None else self.cache.sequence()
+
+    def _cacheable(self, primary):
+        # Whether reads can be cached: they're from the primary, or the datastore has no replicas
+        return primary or all(getattr(node, 'replicas', None) is None for node in self.datastore.nodes)
+
+    def _projection(self, fields):
+        # The field names a projected read fetches: the requested ones plus oid, which identifies the object
+        if fields is None or self.serializer is not None:
+            return None
+        return ['oid'] + [name for name in fields if name != 'oid']
+
+    def _queue_read(self, pipe, oid, fields=None):
+        # Queue the command that reads the stored form of oid on pipe
+        if self.serializer is not None:
+            return pipe.get(self._key(oid))
+        if fields is not None:
+            return pipe.hmget(self._key(oid), fields)
+        return pipe.hgetall(self._key(oid))
+
+    def _hydrate(self, oid, raw, lazy=False, fields=None):
+        # Build an object from a raw HGETALL, HMGET (with fields) or GET (with a serializer) result.  Serialized objects
+        # are always decoded in full.
+        raw = self._raw_mapping(raw, fields)
+        if not raw:
+            raise NotExistsException("{} {} does not exist".format(self.key_prefix, oid))
+        try:
+            if isinstance(raw, bytes):
+                return self.object_class.from_bytes(raw)
+            return self.object_class.from_hash(raw, lazy, fields)
+        except (TypeError, ValueError) as ex:
+            raise InvalidDataException("{} {} could not be decoded: {}".format(self.key_prefix, oid, ex)) from ex
+
+    def _hydrate_many(self, results, lazy=False, fields=None):
+        # Build objects from (oid, raw) pairs as _hydrate does, returning (oid, object) pairs for the ones that loaded
+        # and a dict of oid -> exception for the others.  Full hash reads are built together with from_rows, which
+        # decodes them a field at a time.
+        loaded = []
+        errors = {}
+        if lazy or fields is not None or self.serializer is not None:
+            for oid, raw in results:
+                try:
+                    loaded.append((oid, self._hydrate(oid, raw, lazy, fields)))
+                except (NotExistsException, InvalidDataException) as ex:
+                    errors[oid] = ex
+            return loaded, errors
+        found = []
+        for oid, raw in results:
+            if raw:
+                found.append((oid, raw))
+            else:
+                errors[oid] = NotExistsException("{} {} does not exist".format(self.key_prefix, oid))
+        objects, failed = self.object_class.from_rows([raw for _, raw in found])
+        for index, ex in failed.items():
+            oid = found[index][0]
+            errors[oid] = ex if isinstance(ex, ValidationException) else \
+                InvalidDataException("{} {}: {}".format(self.key_prefix, oid, ex))
+        loaded.extend(zip([oid for index, (oid, _) in enumerate(found) if index not in failed], objects))
+        return loaded, errors
+
+    @staticmethod
+    def _raw_mapping(raw, fields=None):
+        # The mapping of a raw read: HMGET (with fields) replies are turned into a dict of the fields found
+        if fields is not None and raw is not None and not isinstance(raw, bytes):
+            return {name: value for name, value in zip(fields, raw) if value is not None}
+        return raw
+
+    def _hydrate_batch(self, results, lazy=False, fields=None):
+        # The objects built from the (oid, raw) pairs of a batch being walked.  Objects deleted since they were listed
+        # are skipped, as are (with a warning) ones that can't be decoded.
+        with self._timed('hydrate', len(results)):
+            loaded, errors = self._hydrate_many(results, lazy, fields)
+        for oid, ex in errors.items():
+            if not isinstance(ex, NotExistsException):
+                self.logger.warning("Skipping %s: %s", oid, ex)
+        return [obj for _, obj in loaded]
+
+    def _scanned_oids(self, keys):
+        # The oids of the object keys among the keys a SCAN for '<key_prefix>:*' returned
+        prefix = self.key_prefix + ':'
+        names = (key.decode('utf-8')[len(prefix):] for key in keys)
+        if self.datastore.hash_tags:
+            return [name[1:-1] for name in names if name.startswith('{') and name.endswith('}')]
+        # Skip the index keys and anything else nested under the prefix
+        return [name for name in names if not name.startswith('_') and ':' not in name]
+
+    def _check_columns(self):
+        if self.serializer is not None:
+            raise TypeError("{} stores serialized objects, which can't be read by column".format(type(self).__name__))
+
+    def _collect_rows(self, results, fields, found, errors):
+        # Add the raw mappings of (oid, raw) read results to found (oid -> mapping), and the missing oids to errors
+        for oid, raw in results:
+            raw = self._raw_mapping(raw, fields)
+            if raw:
+                found[oid] = raw
+            else:
+                errors[oid] = NotExistsException("{} {} does not exist".format(self.key_prefix, oid))
+
+    def _columns(self, oids, found):
+        # The InoColumns of the rows found for oids, in their order
+        with self._timed('hydrate', len(found)):
+            return self.object_class.columns_from_rows([found[oid] for oid in oids if oid in found])
+
+# === MAIN ===
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+from .exceptions import ConflictException, DuplicateException
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class _ScriptedSavesMixin:
+    # InoModelBase's checked saves using the server-side save script (see scripted and scripts.SAVE)
+    # pylint: disable=too-few-public-methods
+    def _save_scripted(self, node, objects, errors, mode):
+        # The checked save path using the save script: one EVALSHA per object, all sent in a single pipeline round
+        # trip.  The existence (for mode 'create' or 'update'), version and unique index checks and the writes for each
+        # object happen atomically on the server.  Objects changing a 'hash' indexed value are sent again with the keys
+        # of their old index entries, which the script replies with (see scripts.SAVE).
+        if not objects:
+            return
+        versions = {}
+        with self._timed('serialize', len(objects)):
+            for obj in objects:
+                if self.version_field is not None:
+                    versions[obj.oid] = getattr(obj, self.version_field) or 0
+                    setattr(obj, self.version_field, versions[obj.oid] + 1)
+        replies = {}
+        extra_keys = {}
+        pending = objects
+        try:
+            for _ in range(self.conflict_retries):
+                calls = [self._script_call(obj, mode, versions.get(obj.oid), extra_keys.get(obj.oid, ()))
+                         for obj in pending]
+                replies.update(zip([obj.oid for obj in pending], self._run_saves(node, pending, calls)))
+                pending = [obj for obj in pending if replies[obj.oid][0] == b'KEYS']
+                if not pending:
+                    break
+                for obj in pending:
+                    extra_keys[obj.oid] = [key.decode('utf-8') for key in replies[obj.oid][1:]]
+        except Exception:
+            # The objects keep the versions they had if the scripts couldn't be run (a lost connection, say)
+            for obj in objects:
+                if obj.oid in versions:
+                    setattr(obj, self.version_field, versions[obj.oid])
+            raise
+        self._invalidate(obj.oid for obj in objects)
+        for obj in objects:
+            if replies[obj.oid][0] == b'OK':
+                obj.clear_dirty()
+                continue
+            if obj.oid in versions:
+                setattr(obj, self.version_field, versions[obj.oid])
+            errors[obj.oid] = self._script_error(obj.oid, replies[obj.oid], mode, versions.get(obj.oid))
+
+    def _script_error(self, oid, reply, mode, version):
+        # The exception for a save script reply other than 'OK' (see scripts.SAVE)
+        status = reply[0].decode('utf-8')
+        if status == 'KEYS':
+            return self._changing_error(oid, 'saved')
+        if status == 'CONFLICT':
+            return ConflictException("{} {} is at version {}, not {}".format(
+                self.key_prefix, oid, int(reply[1]), version))
+        if status == 'DUPLICATE':
+            return DuplicateException("{} {} already exists".format(reply[1].decode('utf-8'), reply[2].decode('utf-8')))
+        return self._mode_error(oid, mode)
+
+    def _run_saves(self, node, objects, calls):
+        # Run the save script calls for objects in one pipeline round trip, with their invalidations and the index
+        # trims, and return the script replies
+        def queue(pipe):
+            for keys, args in calls:
+                node.evalsha('save', keys, args, pipe)
+            for obj in objects:
+                self._publish_invalidation(pipe, obj.oid)
+            self.indexes.queue_trim(pipe)
+
+        return node.execute_scripts(queue)[:len(objects)]
+
+    def _script_call(self, obj, mode, version, extra_keys=()):
+        # The (keys, args) the save script is run with for obj (see scripts.SAVE), declaring extra_keys as well
+        keys = [self._key(obj.oid)]
+        if self.members_key is not None:
+            keys.append(self.members_key)
+        if self.change_stream is not None:
+            keys.append(self.change_stream)
+        values = self._indexed_values(obj) if self.indexes else {}
+        if self.indexes:
+            keys.extend(self.indexes.script_keys(values))
+        keys.extend(extra_keys)
+        pairs = []
+        empty = []
+        for name, value in obj.get_hash(dirty_only=True).items():
+            if value is None:
+                empty.append(name)
+            else:
+                pairs.extend((name, value))
+        names = pairs[::2] + empty
+        # As _write does, partial writes set oid too (see _oid_mapping)
+        for item in self._oid_mapping(obj, names).items():
+            pairs.extend(item)
+        args = [mode, str(obj.oid), self.version_field or '', '' if version is None else version,
+                self.members_key or '', len(pairs) // 2]
+        args.extend(pairs)
+        args.append(len(empty))
+        args.extend(empty)
+        args.extend(self.indexes.script_args(values) if self.indexes else [0])
+        if self.change_stream is not None:
+            event = self._change_event('save', obj, names)
+            args.extend([self.change_stream, self.change_stream_maxlen])
+            for item in event.items():
+                args.extend(item)
+        return keys, args
+
+# === MAIN ===
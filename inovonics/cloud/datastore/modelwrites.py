@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import redis
+
+from .exceptions import ConflictException, DuplicateException, ExistsException, NotExistsException
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class _ModelWritesMixin:
+    # The write helpers InoModelBase and AsyncInoModelBase share: the checks of a checked save against the stored
+    # values, and queueing the commands of writes, deletes, index changes, invalidations and change events on a
+    # pipeline.  None of them do I/O.
+    # pylint: disable=too-few-public-methods
+    def _indexed_values(self, obj, old_values=None):
+        # name -> value of obj's indexed fields.  Fields a projected load didn't include are taken from old_values (they
+        # can't have changed) or left out.
+        loaded = obj.get_loaded_fields()
+        values = {name: getattr(obj, name) for name in self.indexes.names if name in loaded}
+        if old_values is not None:
+            for name in self.indexes.names:
+                if name not in loaded:
+                    values[name] = old_values.get(name)
+        return values
+
+    def _queue_stored(self, pipe, oid, names):
+        # Queue the read of the named fields stored for oid on pipe
+        if self.serializer is not None:
+            return pipe.get(self._key(oid))
+        return pipe.hmget(self._key(oid), names)
+
+    def _decode_stored(self, oids, names, raws):
+        # oid -> {name: value} from the replies to _queue_stored for oids, for the ones that exist
+        decoders = self.object_class._schema.hash_decoders  # pylint: disable=protected-access
+        values = {}
+        for oid, raw in zip(oids, raws):
+            if self.serializer is not None:
+                if raw:
+                    obj = self.object_class.from_bytes(raw)
+                    values[oid] = {name: getattr(obj, name) for name in names}
+            elif any(value is not None for value in raw):
+                values[oid] = {name: None if value is None else decoders[name](value)
+                               for name, value in zip(names, raw)}
+        return values
+
+    def _changing_error(self, oid, action):
+        # The error for an object whose watched keys changed on every try
+        return ConflictException("{} {} kept changing while being {}".format(self.key_prefix, oid, action))
+
+    def _mode_error(self, oid, mode):
+        if mode == 'create':
+            return ExistsException("{} {} already exists".format(self.key_prefix, oid))
+        return NotExistsException("{} {} does not exist".format(self.key_prefix, oid))
+
+    def _checked_names(self, mode):
+        # The stored fields a checked save reads: the indexed ones, the version and, to tell whether the object exists,
+        # the oid for mode 'create' or 'update'
+        names = list(self.indexes.names if self.indexes else [])
+        if self.version_field is not None and self.version_field not in names:
+            names.append(self.version_field)
+        if mode != 'save' and 'oid' not in names:
+            # Every stored hash has an oid, so reading it tells whether the object exists
+            names.append('oid')
+        return names
+
+    def _queue_checked(self, pipe, checked):
+        # Queue the writes of the (object, stored values) pairs that passed the checks, with their index changes, on
+        # pipe.  The objects are given their new version; returns oid -> the version they had, to restore if the write
+        # doesn't go through.
+        versions = {}
+        with self._timed('serialize', len(checked)):
+            for obj, old_values in checked:
+                if self.version_field is not None:
+                    versions[obj.oid] = getattr(obj, self.version_field)
+                    setattr(obj, self.version_field, (old_values.get(self.version_field) or 0) + 1)
+                self._write(pipe, obj)
+                if self.indexes:
+                    self.indexes.queue_update(pipe, obj.oid, old_values, self._indexed_values(obj, old_values))
+                self._publish_invalidation(pipe, obj.oid)
+        if self.indexes:
+            self.indexes.queue_trim(pipe)
+        return versions
+
+    def _restore_versions(self, checked, versions):
+        for obj, _ in checked:
+            if obj.oid in versions:
+                setattr(obj, self.version_field, versions[obj.oid])
+
+    def _watch_keys(self, objects):
+        keys = [self._key(obj.oid) for obj in objects]
+        if self.indexes:
+            keys.extend(self.indexes.key(name) for name, kind, _ in self.indexes.fields if kind == 'unique')
+        return keys
+
+    def _unique_claims(self, objects):
+        # (object, name, index value) for the unique indexed values of objects, whose owners a checked save reads
+        if not self.indexes:
+            return []
+        return [(obj, name, value) for obj in objects
+                for name, value in self.indexes.unique_values(self._indexed_values(obj))]
+
+    def _check_stored(self, objects, stored, claims, owners):
+        # Check objects against stored (oid -> stored values, see _decode_stored) and the owners of their unique index
+        # values (the raw replies for claims, see _unique_claims).  Returns the (object, stored values) pairs that can
+        # be written and a dict of oid -> exception for the others.
+        errors = {}
+        if self.version_field is not None:
+            for obj in objects:
+                version = stored.get(obj.oid, {}).get(self.version_field) or 0
+                if version != getattr(obj, self.version_field):
+                    errors[obj.oid] = ConflictException("{} {} is at version {}, not {}".format(
+                        self.key_prefix, obj.oid, version, getattr(obj, self.version_field)))
+        # Check the unique indexes, including conflicts between the objects being saved
+        claimed = {}
+        for (obj, name, value), owner in zip(claims, owners):
+            if obj.oid in errors:
+                continue
+            owner = owner.decode('utf-8') if owner is not None else claimed.get((name, value))
+            if owner is not None and owner != str(obj.oid):
+                errors[obj.oid] = DuplicateException("{} {} already exists".format(name, value))
+            else:
+                claimed[(name, value)] = str(obj.oid)
+        return [(obj, stored.get(obj.oid, {})) for obj in objects if obj.oid not in errors], errors
+
+    def _check_mode(self, checked, errors, mode):
+        # Move the checked objects that don't exist (mode 'update') or do (mode 'create') to errors.  Stored objects
+        # have values for the names read, missing ones don't.
+        if mode != 'save':
+            for obj, old_values in checked:
+                if bool(old_values) != (mode == 'update'):
+                    errors[obj.oid] = self._mode_error(obj.oid, mode)
+            checked = [(obj, old_values) for obj, old_values in checked if obj.oid not in errors]
+        return checked, errors
+
+    def _queue_delete(self, pipe, oids, old_values=None):
+        # Queue the deletes of oids, with their index entries (from old_values, oid -> stored values) and change events,
+        # on pipe.  Returns what pipe returns for the deletes, which come first.
+        results = [pipe.delete(self._key(oid)) for oid in oids]
+        self._remove_members(pipe, oids)
+        for oid in oids:
+            if old_values and oid in old_values:
+                self.indexes.queue_remove(pipe, oid, old_values[oid])
+            self._publish_invalidation(pipe, oid)
+            self._queue_change(pipe, 'delete', oid)
+        return results
+
+    def _deleted(self, oids, counts):
+        # Once the deletes of oids have executed (counts being their replies): drop them from the local cache and return
+        # (oid, NotExistsException) for the ones whose delete removed no key
+        self._invalidate(oids)
+        return [(oid, NotExistsException("{} {} does not exist".format(self.key_prefix, oid)))
+                for oid, count in zip(oids, counts) if not count]
+
+    def _remove_members(self, pipe, oids):
+        if self.members_key is not None and oids:
+            pipe.srem(self.members_key, *[str(oid) for oid in oids])
+
+    def _publish_invalidation(self, pipe, oid):
+        # With a cache_channel, tell the other processes' caches to drop oid, in the pipeline writing it.  This doesn't
+        # depend on the model having a cache itself: a writer without one still has to invalidate the readers' caches.
+        if self.cache_channel is not None:
+            pipe.publish(self.cache_channel, str(oid))
+
+    def _written(self, objects):
+        # Once the writes of objects have executed: drop them from the local cache and mark them clean
+        self._invalidate(obj.oid for obj in objects)
+        for obj in objects:
+            obj.clear_dirty()
+
+    def _invalidate(self, oids):
+        # Drop oids from the local cache once their write has executed, so a read racing the write can't cache the old
+        # value after it
+        if self.cache is not None:
+            for oid in oids:
+                self.cache.invalidate(oid)
+
+    def _write(self, pipe, obj):
+        # Queue the commands that store obj on pipe, and its change event.  Fields set to None can't be stored in a
+        # hash, so they're removed.
+        if self.serializer is not None:
+            mapping = None
+        else:
+            # Objects that were loaded or saved before only write the fields that changed since, and nothing at all
+            # (not even a change event) if none did
+            mapping = obj.get_hash(dirty_only=True)
+            if not mapping:
+                return
+        if self.members_key is not None:
+            pipe.sadd(self.members_key, str(obj.oid))
+        if mapping is None:
+            pipe.set(self._key(obj.oid), obj.to_bytes(self.serializer))
+            self._queue_change(pipe, 'save', obj)
+            return
+        empty = [name for name, value in mapping.items() if value is None]
+        for name in empty:
+            del mapping[name]
+        names = list(mapping) + empty
+        # A partial write sets oid as well, so if another client deleted the object meanwhile the hash it recreates
+        # still loads with this oid instead of getting a new default one
+        mapping.update(self._oid_mapping(obj, names))
+        key = self._key(obj.oid)
+        pipe.hset(key, mapping=mapping)
+        if empty:
+            pipe.hdel(key, *empty)
+        self._queue_change(pipe, 'save', obj, names)
+
+    @staticmethod
+    def _oid_mapping(obj, names):
+        # The stored oid field to add to a partial write of obj's fields names (nothing if names has it already)
+        if 'oid' in names:
+            return {}
+        return obj.get_hash(fields=['oid'])
+
+    def _queue_change(self, pipe, op, target, names=None):
+        # Queue the change event for target (the object saved, or the oid deleted) on the change stream, if the model
+        # has one
+        if self.change_stream is not None:
+            pipe.xadd(self.change_stream, self._change_event(op, target, names), maxlen=self.change_stream_maxlen,
+                      approximate=True)
+
+    def _change_event(self, op, target, names=None):
+        # The entries of a change event (see change_stream).  A saved object already has the version being saved.
+        if op == 'delete':
+            return {'op': op, 'model': self.key_prefix, 'oid': str(target)}
+        event = {'op': op, 'model': self.key_prefix, 'oid': str(target.oid)}
+        if names is not None:
+            event['fields'] = ','.join(names)
+        if self.version_field is not None:
+            event['version'] = getattr(target, self.version_field)
+        return event
+
+
+class _CheckedWritesMixin:
+    # InoModelBase's WATCH/MULTI writes: the checked saves of models that don't use the save script (see scripted), and
+    # the deletes
+    # pylint: disable=too-few-public-methods
+    def _save_checked(self, node, objects, errors, mode='save'):
+        # The checked save path with WATCH/MULTI.  The object keys and unique index hashes are WATCHed, then the stored
+        # indexed values and versions and the unique index owners are read in one pipeline, and the objects that pass
+        # the checks are written with their index changes in a MULTI/EXEC.  If a watched key changed in between, nothing
+        # is written and the whole chunk is checked again.
+        if not objects:
+            return
+        names = self._checked_names(mode)
+        for _ in range(self.conflict_retries):
+            with node.redis.pipeline(transaction=True) as pipe:
+                pipe.watch(*self._watch_keys(objects))
+                checked, chunk_errors = self._check_mode(*self._check_chunk(node, objects, names), mode)
+                pipe.multi()
+                versions = self._queue_checked(pipe, checked)
+                try:
+                    pipe.execute()
+                except redis.WatchError:
+                    self._restore_versions(checked, versions)
+                    continue
+            self._written([obj for obj, _ in checked])
+            errors.update(chunk_errors)
+            return
+        for obj in objects:
+            errors[obj.oid] = self._changing_error(obj.oid, 'saved')
+
+    def _check_chunk(self, node, objects, names):
+        # Read what _save_checked needs from node and check the objects against it (see _check_stored)
+        oids = [obj.oid for obj in objects]
+        claims = self._unique_claims(objects)
+        with node.pipeline() as pipe:
+            results = [self._queue_stored(pipe, oid, names) for oid in oids]
+            owners = [pipe.hget(self.indexes.key(name), value) for _, name, value in claims]
+        stored = self._decode_stored(oids, names, [result.result for result in results])
+        return self._check_stored(objects, stored, claims, [owner.result for owner in owners])
+
+    def _get_stored_values(self, node, oids, names):
+        # oid -> {name: value} of the named fields currently stored on node for each existing oid
+        with node.pipeline() as pipe:
+            results = [self._queue_stored(pipe, oid, names) for oid in oids]
+        return self._decode_stored(oids, names, [result.result for result in results])
+
+    def _delete_oids(self, node, oids):
+        # Delete oids from node, with their index entries, in one pipeline round trip (two with indexes, which need the
+        # old indexed values first).  Returns (oid, exception) pairs for the oids that couldn't be deleted.  With
+        # indexes, the object keys are WATCHed while the old values are read and the deletes made in a MULTI/EXEC, so a
+        # save in between can't leave index entries behind; if one happens, the chunk is read again.
+        if not self.indexes:
+            with node.pipeline() as pipe:
+                results = self._queue_delete(pipe, oids)
+            return self._deleted(oids, [result.result for result in results])
+        for _ in range(self.conflict_retries):
+            with node.redis.pipeline(transaction=True) as pipe:
+                pipe.watch(*[self._key(oid) for oid in oids])
+                old_values = self._get_stored_values(node, oids, self.indexes.names)
+                pipe.multi()
+                self._queue_delete(pipe, oids, old_values)
+                try:
+                    counts = pipe.execute()[:len(oids)]
+                except redis.WatchError:
+                    continue
+            return self._deleted(oids, counts)
+        return [(oid, self._changing_error(oid, 'deleted')) for oid in oids]
+
+# === MAIN ===
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import collections
+import itertools
+import logging
+import threading
+import time
+
+import redis
+
+# === GLOBALS ===
+SELECTIONS = ('round_robin', 'latency')
+LATENCY_WEIGHT = 0.2  # Weight of the newest sample in a replica's average latency
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class InoReplica:
+    # One read replica of an InoRedis: its client, registered with redpipe under redpipe_name, and its health.
+    # pylint: disable=too-few-public-methods
+    def __init__(self, client, redpipe_name):
+        self.client = client
+        self.redpipe_name = redpipe_name
+        kwargs = client.connection_pool.connection_kwargs
+        self.address = "{}:{}/{}".format(kwargs.get('host'), kwargs.get('port'), kwargs.get('db', 0))
+        self.latency = None  # Average seconds an INFO takes, once checked
+        self.checked_at = None
+        self.down_until = 0
+
+    def check(self, required_offset):
+        # Measure the latency and return whether the replica is in sync: its link to the primary is up and, with
+        # required_offset, its replication offset has reached it.  Raises redis.ConnectionError/TimeoutError if it can't
+        # be reached.
+        start = time.perf_counter()
+        try:
+            info = self.client.info('replication')
+        except redis.ResponseError:
+            # Servers with INFO disabled (rename-command) can't report their lag and are taken to be in sync
+            info = None
+        elapsed = time.perf_counter() - start
+        self.latency = elapsed if self.latency is None else \
+            self.latency + LATENCY_WEIGHT * (elapsed - self.latency)
+        self.checked_at = time.monotonic()
+        if info is None or info.get('role') == 'master':
+            # A replica promoted to primary (or a server that isn't replicating) has everything written to it
+            return True
+        if info.get('master_link_status') != 'up':
+            return False
+        return required_offset is None or info.get('slave_repl_offset', 0) >= required_offset
+
+class InoReplicaSet:
+    # Picks the replica an InoRedis read goes to.  selection is 'round_robin' (take turns) or 'latency' (the one with
+    # the lowest average latency).  With max_lag or 'latency', each replica is checked (see InoReplica.check) at most
+    # every check_interval seconds when it's picked; otherwise replicas are only found to be down by failed reads.  A
+    # replica that's lagging more than max_lag seconds or can't be reached is left out for retry_interval seconds.  pick
+    # returns None when no replica is usable, and the read goes to the primary.
+    # The lag is measured with replication offsets: each check samples the primary's offset (on the primary client),
+    # and a replica is lagging once it hasn't reached the offset the primary had max_lag seconds ago.  Until a sample
+    # is that old, or without a primary, replicas aren't found to be lagging.
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
+    def __init__(self, replicas, selection='round_robin', max_lag=None, check_interval=1.0, retry_interval=5.0,
+                 primary=None):
+        if selection not in SELECTIONS:
+            raise ValueError("Unknown replica selection {}".format(selection))
+        self.logger = logging.getLogger(type(self).__name__)
+        self.replicas = replicas
+        self.selection = selection
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self.primary = primary
+        self._offsets = collections.deque()  # (time.monotonic(), offset) samples of the primary, oldest first
+        self._turns = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.replicas)
+
+    def pick(self):
+        now = time.monotonic()
+        usable = [replica for replica in self.replicas if self._usable(replica, now)]
+        if not usable:
+            return None
+        if self.selection == 'latency':
+            return min(usable, key=lambda replica: replica.latency or 0)
+        return usable[next(self._turns) % len(usable)]
+
+    def after_fork(self):
+        # A lock held by another thread at the fork would never be released in the child
+        self._lock = threading.Lock()
+
+    def mark_down(self, replica, reason):
+        self.logger.warning("Leaving out replica %s for %ss: %s", replica.address, self.retry_interval, reason)
+        replica.down_until = time.monotonic() + self.retry_interval
+
+    def _usable(self, replica, now):
+        if replica.down_until > now:
+            return False
+        if self.max_lag is None and self.selection != 'latency':
+            return True
+        if replica.checked_at is not None and now - replica.checked_at < self.check_interval:
+            return True
+        with self._lock:
+            # Another thread may have checked it while this one waited
+            if replica.checked_at is not None and time.monotonic() - replica.checked_at < self.check_interval:
+                return replica.down_until <= now
+            try:
+                in_sync = replica.check(self._required_offset())
+            except (redis.ConnectionError, redis.TimeoutError) as ex:
+                self.mark_down(replica, ex)
+                return False
+        if not in_sync:
+            self.mark_down(replica, "lagging behind the primary")
+        return in_sync
+
+    def _required_offset(self):
+        # The primary's replication offset max_lag seconds ago (the newest sample at least that old), or None
+        if self.max_lag is None or self.primary is None:
+            return None
+        try:
+            offset = self.primary.info('replication')['master_repl_offset']
+        except (redis.RedisError, KeyError):
+            # Servers with INFO disabled can't report their offset; neither can a primary that's down
+            return None
+        now = time.monotonic()
+        self._offsets.append((now, offset))
+        cutoff = now - self.max_lag
+        while len(self._offsets) > 1 and self._offsets[1][0] <= cutoff:
+            self._offsets.popleft()
+        sampled_at, required = self._offsets[0]
+        return required if sampled_at <= cutoff else None
+
+# === MAIN ===
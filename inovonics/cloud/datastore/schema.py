@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import copy
+import datetime
+import functools
+import itertools
+import json
+import uuid
+
+from . import fieldcodecs
+from . import indexes
+from . import validation
+
+# === GLOBALS ===
+# Per-type tables used by the schema compiler.  Each maps a field 'type' (see InoObjectBase.allowed_types) to the
+# callable used for that type.  A value of None means the value is passed through unchanged, which lets the hot loops
+# skip a function call for the plain types.
+TYPE_DEFAULT_FACTORIES = {
+    'bool': bool,
+    'datetime': datetime.datetime.utcnow,
+    'float': float,
+    'int': int,
+    'list': list,
+    'str': str,
+    'uuid': uuid.uuid4
+}
+
+TYPE_DECODERS = {
+    'bool': None,
+    'datetime': fieldcodecs.parse_datetime,
+    'float': None,
+    'int': None,
+    'list': None,
+    'str': None,
+    'uuid': fieldcodecs.parse_uuid
+}
+
+TYPE_ENCODERS = {
+    'bool': None,
+    'datetime': datetime.datetime.isoformat,
+    'float': None,
+    'int': None,
+    'list': None,
+    'str': None,
+    'uuid': str
+}
+
+# Per-type tables for the Redis hash representation.  Hash values come back from Redis as bytes, so every type needs a
+# decoder; the encoders only need to cover the types redis-py won't encode on its own.
+TYPE_HASH_DECODERS = {
+    'bool': lambda value: value in (b'1', b'True', '1', 'True'),
+    'datetime': fieldcodecs.parse_datetime,
+    'float': float,
+    'int': int,
+    'list': json.loads,
+    'str': lambda value: _to_str(value),
+    'uuid': fieldcodecs.parse_uuid
+}
+
+TYPE_HASH_ENCODERS = {
+    'bool': int,
+    'datetime': datetime.datetime.isoformat,
+    'float': None,
+    'int': None,
+    'list': json.dumps,
+    'str': None,
+    'uuid': str
+}
+
+# Optional compact storage encodings, selected per field with an 'encoding' entry, e.g.
+# {'name': 'created', 'type': 'datetime', 'encoding': 'epoch_us'}.  They replace the type's hash encoder and decoder;
+# the decoders read both forms, so fields can be switched over without rewriting existing data.
+ENCODING_HASH_ENCODERS = {
+    ('datetime', 'epoch_us'): fieldcodecs.datetime_to_epoch_us,
+    ('uuid', 'bytes'): fieldcodecs.uuid_to_bytes
+}
+
+ENCODING_HASH_DECODERS = {
+    ('datetime', 'epoch_us'): fieldcodecs.parse_epoch_us,
+    ('uuid', 'bytes'): fieldcodecs.parse_uuid
+}
+
+# === FUNCTIONS ===
+def default_factory(field):
+    # The callable making a field's default value.  A 'default' entry overrides the type's factory: a callable is called
+    # for each object, a list or dict is copied for each object and any other value (None for no default) is shared.
+    if 'default' not in field:
+        return TYPE_DEFAULT_FACTORIES[field['type']]
+    default = field['default']
+    if callable(default):
+        return default
+    if isinstance(default, (dict, list)):
+        return functools.partial(copy.deepcopy, default)
+    return itertools.repeat(default).__next__
+
+def _to_str(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+# === CLASSES ===
+class InoSchema:
+    # A compiled view of an InoObjectBase subclass's 'fields' list.  This is built once per class so the per-object
+    # paths (construction, set_fields, get_dict) can dispatch through flat tables instead of re-scanning 'fields' and
+    # re-checking the type strings for every value.
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    def __init__(self, fields):
+        self.fields = fields
+        # name -> field entry
+        self.index = {}
+        # Ordered (name, factory) pairs for the default values
+        self.defaults = []
+        # name -> decoder (or None for pass-through)
+        self.decoders = {}
+        # Ordered (name, encoder) pairs (encoder None for pass-through)
+        self.encoders = []
+        # The same two tables for the Redis hash representation
+        self.hash_decoders = {}
+        self.hash_encoders = []
+        # Ordered (name, check) pairs for the fields that declare constraints (see validation.CONSTRAINTS)
+        self.validators = []
+        for field in fields:
+            name = field['name']
+            field_type = field['type']
+            if field_type not in TYPE_DEFAULT_FACTORIES:
+                raise TypeError("Field {} has unsupported type {}".format(name, field_type))
+            if field.get('index') or 'retention' in field:
+                indexes.check_index(field)
+            self.index[name] = field
+            self.defaults.append((name, default_factory(field)))
+            self.decoders[name] = TYPE_DECODERS[field_type]
+            self.encoders.append((name, TYPE_ENCODERS[field_type]))
+            if 'encoding' in field:
+                encoding = (field_type, field['encoding'])
+                if encoding not in ENCODING_HASH_ENCODERS:
+                    raise TypeError("Field {} has unsupported encoding {}".format(name, field['encoding']))
+                self.hash_decoders[name] = ENCODING_HASH_DECODERS[encoding]
+                self.hash_encoders.append((name, ENCODING_HASH_ENCODERS[encoding]))
+            else:
+                self.hash_decoders[name] = TYPE_HASH_DECODERS[field_type]
+                self.hash_encoders.append((name, TYPE_HASH_ENCODERS[field_type]))
+            check = validation.compile_field(field)
+            if check is not None:
+                self.validators.append((name, check))
+        self.names = tuple(self.index)
+
+# === MAIN ===
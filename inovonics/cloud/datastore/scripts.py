@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+
+# === GLOBALS ===
+# Lua scripts InoRedis registers for the models (see InoRedis.register_script).  Each runs atomically on the server, so
+# the checks and the writes it makes can't be interleaved with other clients' commands and need no WATCH/MULTI retries.
+
+# Save one object hash with its index changes.  Replies {'OK'} or, without writing anything, {'EXISTS'} (mode 'create'
+# and the hash exists), {'NOTEXISTS'} (mode 'update' and it doesn't), {'CONFLICT', stored version},
+# {'DUPLICATE', field, value} (a unique index value is owned by another oid) or {'KEYS', key, ...} (keys it would write
+# weren't in KEYS: the 'hash' index entries of old values the caller couldn't know; run it again with them added).
+# KEYS: the object hash first, then every other key the script touches: the members set and change stream, if any, the
+# 'unique' and 'sorted' index keys and the 'hash' index keys of the new values (see InoIndexes.script_keys)
+# ARGV: mode ('create', 'update' or 'save'), oid, version field ('' for none), expected version, members set ('' for
+# none), number of fields to set, then name/value pairs, number of fields to delete, then their names,
+# number of indexed fields, then for each: name, kind ('hash', 'sorted' or 'unique'), '1' if it's a bool field, index
+# key (for 'hash' the key prefix the value is appended to), '1' if it has a new value, the new index value, the new
+# score (see InoIndexes.script_args),
+# optionally the change stream (see InoModelBase.change_stream), its maximum length and the event's name/value pairs
+# Old index values are the stored hash values, except bools, which are stored as 1/0 and indexed as True/False.
+SAVE = """
+local key, mode, oid = KEYS[1], ARGV[1], ARGV[2]
+local exists = redis.call('EXISTS', key) == 1
+if mode == 'create' and exists then
+    return {'EXISTS'}
+end
+if mode == 'update' and not exists then
+    return {'NOTEXISTS'}
+end
+if ARGV[3] ~= '' then
+    local stored = tonumber(redis.call('HGET', key, ARGV[3]) or '0') or 0
+    if stored ~= tonumber(ARGV[4]) then
+        return {'CONFLICT', tostring(stored)}
+    end
+end
+local declared = {}
+for _, name in ipairs(KEYS) do
+    declared[name] = true
+end
+local i = 6
+local set_count = tonumber(ARGV[i])
+local set_args = {unpack(ARGV, i + 1, i + set_count * 2)}
+i = i + set_count * 2 + 1
+local delete_count = tonumber(ARGV[i])
+local delete_args = {unpack(ARGV, i + 1, i + delete_count)}
+i = i + delete_count + 1
+local changes = {}
+local missing = {}
+for j = 1, tonumber(ARGV[i]) do
+    local name, kind, is_bool, index_key, has_new, value, score = unpack(ARGV, i + 1, i + 7)
+    i = i + 7
+    local old = false
+    if exists then
+        old = redis.call('HGET', key, name)
+    end
+    if old and is_bool == '1' then
+        old = (old == '1' or old == 'True') and 'True' or 'False'
+    end
+    local new = has_new == '1' and value
+    if kind == 'unique' and new then
+        local owner = redis.call('HGET', index_key, new)
+        if owner and owner ~= oid then
+            return {'DUPLICATE', name, new}
+        end
+    end
+    local old_key, new_key = index_key, index_key
+    if kind == 'hash' then
+        old_key = old and old ~= new and index_key .. old
+        new_key = new and index_key .. new
+    end
+    for _, name in ipairs({old_key, new_key}) do
+        if name and not declared[name] then
+            missing[#missing + 1] = name
+        end
+    end
+    changes[j] = {kind, old_key, new_key, old, new, score}
+end
+if #missing > 0 then
+    return {'KEYS', unpack(missing)}
+end
+if set_count > 0 then
+    redis.call('HSET', key, unpack(set_args))
+end
+if delete_count > 0 then
+    redis.call('HDEL', key, unpack(delete_args))
+end
+for _, change in ipairs(changes) do
+    local kind, old_key, new_key, old, new, score = unpack(change, 1, 6)
+    if kind == 'hash' then
+        if old_key then
+            redis.call('ZREM', old_key, oid)
+        end
+        if new_key then
+            redis.call('ZADD', new_key, 0, oid)
+        end
+    elseif kind == 'sorted' then
+        if new then
+            redis.call('ZADD', new_key, score, oid)
+        else
+            redis.call('ZREM', new_key, oid)
+        end
+    else
+        if old and old ~= new then
+            redis.call('HDEL', new_key, old)
+        end
+        if new then
+            redis.call('HSET', new_key, new, oid)
+        end
+    end
+end
+if ARGV[5] ~= '' then
+    redis.call('SADD', ARGV[5], oid)
+end
+local stream = ARGV[i + 1]
+if stream then
+    redis.call('XADD', stream, 'MAXLEN', '~', ARGV[i + 2], '*', unpack(ARGV, i + 3))
+end
+return {'OK'}
+"""
+
+# name -> source of the scripts every InoRedis registers
+SCRIPTS = {
+    'save': SAVE
+}
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+
+# === MAIN ===
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import json
+import struct
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+from .exceptions import InvalidDataException
+from . import fieldcodecs
+
+# === GLOBALS ===
+# Every encoding starts with a version byte naming the format, so objects written in different formats (or by
+# different versions of a format) can be read side by side while a change rolls out.  A leading '{' is read as the
+# JSON encoded get_dict() output that was stored before these formats existed.
+VERSION_MSGPACK_1 = 0x01
+VERSION_STRUCT_1 = 0x02
+VERSION_LEGACY_JSON = ord('{')
+
+FORMATS = {'msgpack': VERSION_MSGPACK_1, 'struct': VERSION_STRUCT_1}
+
+# Fixed width struct codes for the types that have one; str and list values are length prefixed.
+STRUCT_CODES = {'bool': '?', 'datetime': 'q', 'float': 'd', 'int': 'q', 'uuid': '16s'}
+LENGTH = struct.Struct('<I')
+
+# Per-type value conversions for the binary formats: datetimes as epoch microseconds and UUIDs as 16 bytes; the other
+# types are stored natively (msgpack) or packed directly (struct).
+BINARY_ENCODERS = {'datetime': fieldcodecs.datetime_to_epoch_us, 'uuid': fieldcodecs.uuid_to_bytes}
+
+# === FUNCTIONS ===
+def dumps(obj, fmt='msgpack'):
+    # Encode an InoObjectBase in the named format ('msgpack' or 'struct'), prefixed by its version byte.
+    if fmt not in FORMATS:
+        raise ValueError("Unknown serialization format {}".format(fmt))
+    if fmt == 'msgpack':
+        return bytes([VERSION_MSGPACK_1]) + _dumps_msgpack(obj)
+    return bytes([VERSION_STRUCT_1]) + _get_struct_schema(type(obj)).pack(obj)
+
+def loads(obj_class, data):
+    # Decode bytes written by dumps (in any format) into a new, validated instance of obj_class.
+    if not data:
+        raise InvalidDataException("No data to decode")
+    version = data[0]
+    if version == VERSION_MSGPACK_1:
+        values = _loads_msgpack(data[1:])
+    elif version == VERSION_STRUCT_1:
+        values = _get_struct_schema(obj_class).unpack(data[1:])
+    elif version == VERSION_LEGACY_JSON:
+        values = json.loads(data)
+    else:
+        raise InvalidDataException("Unknown serialization version {}".format(version))
+    obj = obj_class._new_loaded(values)  # pylint: disable=protected-access
+    obj.set_fields(values)
+    return obj
+
+def _dumps_msgpack(obj):
+    if msgpack is None:
+        raise ImportError("The msgpack format requires the msgpack package")
+    mapping = {}
+    for name, field in obj._schema.index.items():  # pylint: disable=protected-access
+        value = getattr(obj, name)
+        encoder = BINARY_ENCODERS.get(field['type'])
+        mapping[name] = value if encoder is None or value is None else encoder(value)
+    mapping.update(obj._custom_items())  # pylint: disable=protected-access
+    return msgpack.packb(mapping, use_bin_type=True)
+
+def _loads_msgpack(data):
+    if msgpack is None:
+        raise ImportError("The msgpack format requires the msgpack package")
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except (ValueError, msgpack.UnpackException) as ex:
+        raise InvalidDataException("Could not decode msgpack data: {}".format(ex)) from ex
+
+def _get_struct_schema(obj_class):
+    # StructSchemas are built on first use and cached on the class.
+    schema = obj_class.__dict__.get('_struct_schema')
+    if schema is None:
+        schema = StructSchema(obj_class._schema.fields)  # pylint: disable=protected-access
+        obj_class._struct_schema = schema  # pylint: disable=protected-access
+    return schema
+
+def _pack_str(value):
+    encoded = value.encode('utf-8')
+    return LENGTH.pack(len(encoded)) + encoded
+
+def _unpack_str(data, offset):
+    (length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    if offset + length > len(data):
+        raise ValueError("String runs past the end of the data")
+    return bytes(data[offset:offset + length]).decode('utf-8'), offset + length
+
+# === CLASSES ===
+class StructSchema:
+    # Positional struct packing derived from a 'fields' list:
+    #   fingerprint (uint32) | null bitmap | fixed width fields | length prefixed str/list fields | custom fields
+    # The fingerprint is a CRC of the field names and types, so data packed for a different field list is rejected
+    # instead of being misread.  Lists are stored as JSON; custom fields as length prefixed name/value pairs.
+    # pylint: disable=too-few-public-methods
+    def __init__(self, fields):
+        self.fixed = [(field['name'], field['type']) for field in fields if field['type'] in STRUCT_CODES]
+        self.variable = [(field['name'], field['type']) for field in fields if field['type'] not in STRUCT_CODES]
+        self.names = [name for name, _ in self.fixed + self.variable]
+        self.fingerprint = zlib.crc32(','.join('{}:{}'.format(field['name'], field['type'])
+                                               for field in fields).encode('utf-8'))
+        self.bitmap_size = (len(self.names) + 7) // 8
+        self.header = struct.Struct('<I{}s'.format(self.bitmap_size))
+        self.body = struct.Struct('<' + ''.join(STRUCT_CODES[field_type] for _, field_type in self.fixed))
+
+    def pack(self, obj):
+        nulls = 0
+        fixed_values = []
+        for i, (name, field_type) in enumerate(self.fixed):
+            value = getattr(obj, name)
+            if value is None:
+                nulls |= 1 << i
+                value = b'\0' * 16 if field_type == 'uuid' else 0
+            elif field_type in BINARY_ENCODERS:
+                value = BINARY_ENCODERS[field_type](value)
+            fixed_values.append(value)
+        parts = [None, self.body.pack(*fixed_values)]
+        for i, (name, field_type) in enumerate(self.variable, len(self.fixed)):
+            value = getattr(obj, name)
+            if value is None:
+                nulls |= 1 << i
+                value = ''
+            elif field_type == 'list':
+                value = json.dumps(value)
+            parts.append(_pack_str(value))
+        custom = obj._custom_items()  # pylint: disable=protected-access
+        parts.append(LENGTH.pack(len(custom)))
+        for name, value in custom:
+            parts.append(_pack_str(name))
+            parts.append(_pack_str(value))
+        parts[0] = self.header.pack(self.fingerprint, nulls.to_bytes(self.bitmap_size, 'little'))
+        return b''.join(parts)
+
+    def unpack(self, data):
+        try:
+            fingerprint, bitmap = self.header.unpack_from(data)
+            if fingerprint != self.fingerprint:
+                raise InvalidDataException("Packed data does not match the field list")
+            nulls = int.from_bytes(bitmap, 'little')
+            offset = self.header.size
+            values = {}
+            for i, ((name, _), value) in enumerate(zip(self.fixed, self.body.unpack_from(data, offset))):
+                values[name] = None if nulls & (1 << i) else value
+            offset += self.body.size
+            for i, (name, field_type) in enumerate(self.variable, len(self.fixed)):
+                value, offset = _unpack_str(data, offset)
+                if nulls & (1 << i):
+                    value = None
+                elif field_type == 'list':
+                    value = json.loads(value)
+                values[name] = value
+            (custom_count,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            for _ in range(custom_count):
+                name, offset = _unpack_str(data, offset)
+                values[name], offset = _unpack_str(data, offset)
+        except (struct.error, UnicodeDecodeError, ValueError) as ex:
+            raise InvalidDataException("Could not unpack data: {}".format(ex)) from ex
+        return values
+
+# === MAIN ===
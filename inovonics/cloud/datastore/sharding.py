@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import bisect
+import concurrent.futures
+import hashlib
+import logging
+import os
+
+from .inoredis import InoRedis
+
+# === GLOBALS ===
+# Points each node gets on the hash ring.  More points spread the keys more evenly between the nodes.
+RING_POINTS = 160
+
+# === FUNCTIONS ===
+def hash_tag(key):
+    # The part of key that decides its node: as in Redis Cluster, the text between the first '{' and the next '}' if
+    # that's not empty, otherwise the whole key
+    start = key.find('{')
+    if start != -1:
+        end = key.find('}', start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+def ring_hash(value):
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+# === CLASSES ===
+class InoShardedRedis:
+    # A datastore spread over several Redis servers with client-side consistent hashing.  Pass the nodes as
+    # (host, port, db) tuples, or as dicts of InoRedis arguments (e.g. to give each node its replicas); the other
+    # keyword arguments (pool settings, metrics) are used for every node's InoRedis.
+    # Models on a sharded datastore name their object keys with hash tags ('<prefix>:{<oid>}') and place each object on
+    # the node its oid hashes to.  Every node keeps the index entries, members set and scripts for its own objects, so
+    # an object and its index changes are still written atomically.  Bulk calls group their commands per node and run
+    # the nodes' pipelines in parallel; index queries and iter_all ask every node and merge the results.
+    # Adding or removing a node moves about 1/n of the oids to another node; existing data isn't migrated.  Unique
+    # indexes can't be enforced across nodes, so models with them need a single node.  Pub/sub is per server too, so
+    # cache_channel invalidations are published on the object's node.
+    # pylint: disable=too-many-instance-attributes
+    hash_tags = True
+
+    def __init__(self, nodes, max_workers=None, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.info("Initiallizing %s Redis nodes.", len(nodes))
+        if not nodes:
+            raise ValueError("At least one node is required")
+        self.metrics = kwargs.get('metrics')
+        self.nodes = [InoRedis(**dict(kwargs, **node)) if isinstance(node, dict) else InoRedis(*node, **kwargs)
+                      for node in nodes]
+        ring = []
+        for node in self.nodes:
+            name = "{}:{}/{}".format(node.redis_host, node.redis_port, node.redis_db)
+            ring.extend((ring_hash("{}#{}".format(name, point)), node) for point in range(RING_POINTS))
+        ring.sort(key=lambda entry: entry[0])
+        self._ring_hashes = [point for point, _ in ring]
+        self._ring_nodes = [node for _, node in ring]
+        self._max_workers = max_workers or len(self.nodes)
+        self._executor = None
+        self._pid = os.getpid()
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def node_for(self, key):
+        # The node (an InoRedis) that holds key
+        index = bisect.bisect(self._ring_hashes, ring_hash(hash_tag(key)))
+        return self._ring_nodes[index % len(self._ring_nodes)]
+
+    def map_nodes(self, func, items, key):
+        # Call func(node, items) for the items on each node (key maps an item to its Redis key), the nodes in parallel,
+        # and return the results
+        groups = {}
+        for item in items:
+            groups.setdefault(self.node_for(key(item)), []).append(item)
+        return self._run(func, list(groups.items()))
+
+    def map_all(self, func):
+        # Call func(node) for every node, in parallel, and return the results
+        return self._run(func, [(node,) for node in self.nodes])
+
+    def _run(self, func, calls):
+        # func(*args) for each args in calls, on the executor when there's more than one.  An exception from any call is
+        # raised once all of them have finished.
+        if len(calls) < 2:
+            return [func(*args) for args in calls]
+        if self._executor is None or self._pid != os.getpid():
+            # Made when first needed, and again in a forked child: the parent's worker threads don't exist there
+            self._executor = concurrent.futures.ThreadPoolExecutor(self._max_workers,
+                                                                   thread_name_prefix=type(self).__name__)
+            self._pid = os.getpid()
+        futures = [self._executor.submit(func, *args) for args in calls]
+        concurrent.futures.wait(futures)
+        return [future.result() for future in futures]
+
+    def close(self):
+        if self.closed:
+            return
+        self.logger.info("Closing Redis nodes.")
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown()
+        for node in self.nodes:
+            node.close()
+        self.closed = True
+
+# === MAIN ===
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import functools
+import re
+import sys
+import uuid
+
+# === GLOBALS ===
+# Patterns used by the 'email' and 'phone' constraints, compiled once at import instead of on every check.
+EMAIL_RE = re.compile(r'^[A-Za-z0-9\.\+_-]+@[A-Za-z0-9\._-]+\.[a-zA-Z]*$')
+PHONE_RE = re.compile(r'[0123456789.()#*wp \-+]*')
+
+# Message templates for FieldError codes.  They're only formatted when a message is read.
+MESSAGES = {
+    'type': "{field} not of type {expected} but type {type}, value {value}",
+    'length': "{field} must be between {min} and {max} chars",
+    'range': "{field} must be between {min} and {max}",
+    'items': "{field} should have at least {min} elements",
+    'email': "{field} must be a valid email",
+    'phone': "{field} has illegal chars, value {value}",
+    'regex': "{field} does not match {pattern}, value {value}",
+    'too_long': "Length of field {field} greater than {max}."
+}
+
+# The Python type each field type's values must have
+FIELD_TYPES = {
+    'bool': bool,
+    'datetime': datetime.datetime,
+    'float': float,
+    'int': int,
+    'list': list,
+    'str': str,
+    'uuid': uuid.UUID
+}
+
+# Declarative constraint keys a 'fields' entry can carry, and the field types each applies to
+CONSTRAINTS = {
+    'required': tuple(FIELD_TYPES),
+    'min': ('float', 'int', 'list', 'str'),
+    'max': ('float', 'int', 'str'),
+    'regex': ('str',),
+    'email': ('str',),
+    'phone': ('str',)
+}
+
+# Defaults for the constraints a field doesn't set, matching the _validate_* helpers' defaults
+DEFAULT_MIN = {'float': -sys.float_info.max, 'int': -sys.maxsize - 1, 'list': 1, 'str': 0}
+DEFAULT_MAX = {'float': sys.float_info.max, 'int': sys.maxsize, 'str': 4096}
+PHONE_MAX = 30
+
+# === FUNCTIONS ===
+def field_constraints(field):
+    # The constraint entries of a 'fields' entry (empty if it declares none)
+    constraints = {key: value for key, value in field.items() if key in CONSTRAINTS}
+    for key in constraints:
+        if field['type'] not in CONSTRAINTS[key]:
+            raise TypeError("Field {} of type {} can't have a {} constraint".format(field['name'], field['type'], key))
+    return constraints
+
+@functools.lru_cache(maxsize=None)
+def compile_check(name, field_type, min=None, max=None, required=True, regex=None, email=False, phone=False):
+    # Build the check function for one field: check(value) returns a FieldError, or None if the value is valid.  Each
+    # type gets its own closure so a check only tests what applies to it, and the error parameters are built here
+    # rather than on every failure.  Checks are cached, so the _validate_* helpers share the declared fields' checks.
+    # pylint: disable=redefined-builtin,too-many-arguments,too-many-locals
+    expected = FIELD_TYPES[field_type]
+    if min is None:
+        min = DEFAULT_MIN.get(field_type)
+    if max is None:
+        max = PHONE_MAX if phone else DEFAULT_MAX.get(field_type)
+    type_params = {'expected': field_type}
+    bounds = {'min': min, 'max': max}
+    # str format checks as (code, match function, params)
+    formats = []
+    if email:
+        formats.append(('email', EMAIL_RE.match, None))
+    if phone:
+        formats.append(('phone', PHONE_RE.fullmatch, None))
+    if regex is not None:
+        formats.append(('regex', re.compile(regex).fullmatch, {'pattern': regex}))
+
+    def check_str(value):
+        if not isinstance(value, str):
+            if value is None and not required:
+                return None
+            return FieldError(name, 'type', value, type_params)
+        if not value and not required:
+            return None
+        if not min <= len(value) <= max:
+            return FieldError(name, 'length', value, bounds)
+        for code, match, params in formats:
+            if match(value) is None:
+                return FieldError(name, code, value, params)
+        return None
+
+    def check_list(value):
+        if not isinstance(value, list):
+            if value is None and not required:
+                return None
+            return FieldError(name, 'type', value, type_params)
+        if len(value) < min and (value or required):
+            return FieldError(name, 'items', value, bounds)
+        return None
+
+    def check_number(value):
+        if not isinstance(value, expected):
+            if value is None and not required:
+                return None
+            return FieldError(name, 'type', value, type_params)
+        if not min <= value <= max:
+            return FieldError(name, 'range', value, bounds)
+        return None
+
+    def check_type(value):
+        if not isinstance(value, expected):
+            if value is None and not required:
+                return None
+            return FieldError(name, 'type', value, type_params)
+        return None
+
+    if field_type == 'str':
+        return check_str
+    if field_type == 'list':
+        return check_list
+    if field_type in ('float', 'int'):
+        return check_number
+    return check_type
+
+def compile_field(field):
+    # The check for a 'fields' entry, or None when it declares no constraints (undeclared fields aren't validated)
+    constraints = field_constraints(field)
+    if not constraints:
+        return None
+    return compile_check(field['name'], field['type'], **constraints)
+
+def check_message(check, value):
+    # Run a check for the InoObjectBase._validate_* helpers, which return the error message as a str like they always
+    # have rather than the FieldError
+    error = check(value)
+    return None if error is None else error.message
+
+# === CLASSES ===
+class FieldError:
+    # One validation failure: the field, an error code (see MESSAGES), the offending value and any parameters of the
+    # failed constraint.  The message is formatted on demand; str() and repr() give the same text the validators
+    # returned before they were structured, so existing error output is unchanged.
+    __slots__ = ('field', 'code', 'value', 'params')
+
+    def __init__(self, field, code, value=None, params=None):
+        self.field = field
+        self.code = code
+        self.value = value
+        self.params = params or {}
+
+    @property
+    def message(self):
+        return MESSAGES[self.code].format(field=self.field, value=self.value, type=type(self.value), **self.params)
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return repr(self.message)
+
+# === MAIN ===
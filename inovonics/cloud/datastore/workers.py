@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import concurrent.futures
+import logging
+
+# === GLOBALS ===
+DEFAULT_CHUNK_SIZE = 1000  # Rows or objects sent to a worker at a time
+
+# === FUNCTIONS ===
+def _hydrate_chunk(obj_class, rows, func):
+    objects, errors = obj_class.from_rows(rows)
+    if func is None:
+        return objects, errors
+    return func(objects, errors)
+
+def _validate_chunk(objects):
+    return objects[0].validate_many(objects)
+
+# === CLASSES ===
+class InoProcessPool:
+    # Worker processes for the CPU-heavy parts of bulk work on InoObjectBase batches: decoding and validating rows read
+    # from Redis (from_rows, map_rows) and validating objects (validate_many).  The batch is split into chunk_size
+    # pieces that are handled on all cores.  Rows, objects and results are pickled between the processes, so the object
+    # classes (and func for map_rows) have to be importable by the workers, and the work has to outweigh the pickling:
+    # map_rows, which only sends back what func returns, gains the most.  mp_context is a multiprocessing context
+    # (e.g. multiprocessing.get_context('spawn')) for the workers, the platform default if None.
+    def __init__(self, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, mp_context=None):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.chunk_size = chunk_size
+        self._executor = concurrent.futures.ProcessPoolExecutor(processes, mp_context=mp_context)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def from_rows(self, obj_class, rows):
+        # obj_class.from_rows(rows), in the workers: the objects and a dict of row index -> exception
+        rows = list(rows)
+        objects = []
+        errors = {}
+        for start, (chunk_objects, chunk_errors) in zip(range(0, len(rows), self.chunk_size),
+                                                          self._map(_hydrate_chunk, obj_class, rows, None)):
+            objects.extend(chunk_objects)
+            errors.update((start + index, ex) for index, ex in chunk_errors.items())
+        return objects, errors
+
+    def map_rows(self, func, obj_class, rows):
+        # Build objects from each chunk of rows with obj_class.from_rows in a worker and return the list of what
+        # func(objects, errors) returns for each chunk (row indexes in errors are within the chunk), e.g. aggregates
+        # that are much smaller than the objects
+        return list(self._map(_hydrate_chunk, obj_class, list(rows), func))
+
+    def validate_many(self, objects):
+        # InoObjectBase.validate_many(objects), in the workers: a dict of oid -> list of errors
+        invalid = {}
+        for chunk_invalid in self._executor.map(_validate_chunk, self._chunks(list(objects))):
+            invalid.update(chunk_invalid)
+        return invalid
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _map(self, func, obj_class, items, *args):
+        chunks = self._chunks(items)
+        count = len(chunks)
+        return self._executor.map(func, [obj_class] * count, chunks, *[[arg] * count for arg in args])
+
+    def _chunks(self, items):
+        return [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+
+# === MAIN ===
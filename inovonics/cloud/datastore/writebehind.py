@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import atexit
+import logging
+import queue
+import threading
+import time
+
+# === GLOBALS ===
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class InoWriteBehind:
+    # A write-behind buffer for an InoModelBase.  put() validates an object and queues a snapshot of it; a background
+    # thread saves the queued objects with model.save_many once max_batch objects are waiting or the oldest has waited
+    # max_delay seconds.  Puts for an oid that is already waiting replace the queued snapshot (keeping the fields either
+    # one changed), so an object updated many times between flushes is written once.
+    # - max_pending: puts of new oids block once this many are waiting, for up to put_timeout seconds (None to wait
+    # indefinitely) before raising queue.Full.
+    # - on_error: called with (oid, exception) for objects the model refused to save.
+    # Pending writes are flushed by flush(), close() and at interpreter exit.  A batch that fails with a Redis error is
+    # queued again and retried on the next flush.  Deleting an object through the model doesn't cancel its pending
+    # write; call discard(oid) first.  Models with a version_field can't be used: the version a flush stores would never
+    # reach the caller's object, so its next save would conflict.
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, model, max_batch=500, max_delay=0.1, max_pending=10000, put_timeout=None, on_error=None):
+        if model.version_field is not None:
+            raise ValueError("Write-behind can't save {} objects with a version_field".format(model.key_prefix))
+        self.logger = logging.getLogger(type(self).__name__)
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.on_error = on_error
+        self.queued = 0
+        self.coalesced = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self._pending = {}  # oid -> object snapshot, oldest first
+        self._put_at = {}  # oid -> time.monotonic() of its first pending put, in the same order
+        self._cond = threading.Condition()
+        # Held while a batch is written so two batches holding the same oid can't be written out of order
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='InoWriteBehind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, obj):
+        # Queue obj to be saved.  Raises ValidationException straight away if it doesn't validate.  The queue takes a
+        # copy and clears obj's dirty fields, so the caller can keep changing and putting the same object.
+        if self._closed:
+            raise RuntimeError("{} is closed".format(type(self).__name__))
+        obj.validate()
+        snapshot = obj.copy()
+        with self._cond:
+            if obj.oid not in self._pending and len(self._pending) >= self.max_pending:
+                if not self._cond.wait_for(lambda: len(self._pending) < self.max_pending or obj.oid in self._pending,
+                                           self.put_timeout):
+                    raise queue.Full("{} pending writes".format(len(self._pending)))
+            previous = self._pending.get(obj.oid)
+            if previous is None:
+                self._pending[obj.oid] = snapshot
+                self._put_at[obj.oid] = time.monotonic()
+                if len(self._pending) == 1:
+                    self._cond.notify_all()
+            else:
+                self._pending[obj.oid] = self._merge(previous, snapshot)
+                self.coalesced += 1
+            obj.clear_dirty()
+            self.queued += 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def discard(self, oid):
+        # Drop the pending write for oid, if there is one
+        with self._cond:
+            if self._pending.pop(oid, None) is not None:
+                del self._put_at[oid]
+                self._cond.notify_all()
+
+    def flush(self):
+        # Save everything pending now, from the calling thread
+        while self._flush_batch():
+            pass
+
+    def close(self):
+        # Stop the background thread and flush what's left.  Called at interpreter exit as well.
+        if self._closed:
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def get_stats(self):
+        return {
+            'pending': len(self._pending),
+            'queued': self.queued,
+            'coalesced': self.coalesced,
+            'written': self.written,
+            'failed': self.failed,
+            'flushes': self.flushes,
+            'flush_seconds': self.flush_seconds,
+            'max_flush_seconds': self.max_flush_seconds
+        }
+
+    def _run(self):
+        while self._wait_due():
+            try:
+                self._flush_batch()
+            except Exception:  # pylint: disable=broad-except
+                # The batch was queued again; back off before retrying
+                self.logger.exception("Write-behind flush failed")
+                time.sleep(self.max_delay)
+
+    def _wait_due(self):
+        # Wait until a batch is due: max_batch objects are pending or the oldest has waited max_delay seconds.  Returns
+        # False once closed.
+        with self._cond:
+            while not self._closed:
+                if len(self._pending) >= self.max_batch:
+                    return True
+                if not self._put_at:
+                    self._cond.wait()
+                    continue
+                remaining = next(iter(self._put_at.values())) + self.max_delay - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self._cond.wait(remaining)
+            return False
+
+    def _take(self):
+        # Remove and return up to max_batch pending objects, oldest first, and the times they were put.  What's left
+        # keeps its own put times, so it's still due max_delay after it was put.
+        with self._cond:
+            oids = list(self._pending)[:self.max_batch]
+            batch = [self._pending.pop(oid) for oid in oids]
+            put_at = [self._put_at.pop(oid) for oid in oids]
+            self._cond.notify_all()
+            return batch, put_at
+
+    def _flush_batch(self):
+        # Write one batch; returns whether there was anything to write
+        with self._flush_lock:
+            batch, put_at = self._take()
+            if not batch:
+                return False
+            start = time.perf_counter()
+            try:
+                errors = self.model.save_many(batch)
+            except Exception:
+                self._requeue(batch, put_at)
+                raise
+            elapsed = time.perf_counter() - start
+        with self._cond:
+            self.flushes += 1
+            self.written += len(batch) - len(errors)
+            self.failed += len(errors)
+            self.flush_seconds += elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        for oid, ex in errors.items():
+            self.logger.warning("Write-behind save of %s failed: %s", oid, ex)
+            if self.on_error is not None:
+                self.on_error(oid, ex)
+        return True
+
+    def _requeue(self, batch, put_at):
+        # Put a failed batch back at the front, with its original put times
+        with self._cond:
+            pending = {}
+            for obj, put_time in zip(batch, put_at):
+                newer = self._pending.pop(obj.oid, None)
+                pending[obj.oid] = obj if newer is None else self._merge(obj, newer)
+                self._put_at[obj.oid] = put_time
+            pending.update(self._pending)
+            self._pending = pending
+            self._put_at = {oid: self._put_at[oid] for oid in pending}
+
+    @staticmethod
+    def _merge(older, newer):
+        # The snapshot to keep when two are queued for the same oid: the newer one, also marked dirty for the fields
+        # only the older one changed (with the newer values).  An older full write (never stored) stays a full write.
+        # pylint: disable=protected-access
+        dirty = older._dirty_names()
+        if dirty is None:
+            object.__setattr__(newer, '_dirty', None)
+        else:
+            newer.mark_dirty(*dirty)
+        return newer
+
+# === MAIN ===
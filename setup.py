@@ -25,7 +25,9 @@ setup(
     author='Daniel Williams',
     author_email='dwilliams@inovonics.com',
     license='MIT',
+    python_requires='>=3.8',
     install_requires=[line.strip() for line in open('requirements.txt', 'r')],
+    extras_require={'msgpack': ['msgpack>=0.6'], 'numpy': ['numpy']},
     packages=['inovonics.cloud.datastore'],
     classifiers=[
         'Development Status :: 4 - Beta',
@@ -36,8 +38,10 @@ setup(
         'Operating System :: POSIX',
         'Operating System :: POSIX :: Linux',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
         'Topic :: Software Development :: Libraries :: Python Modules'
     ]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import logging
+import os
+import time
+import unittest
+import uuid
+
+from inovonics.cloud.datastore import AsyncInoRedis, AsyncInoModelBase, InoObjectBase
+from inovonics.cloud.datastore import ConflictException, DuplicateException, ExistsException, InvalidDataException, \
+    NotExistsException
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleAsync(InoObjectBase):
+    fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}, {'name': 'int1', 'type': 'int'}]
+
+class SampleAsyncModel(AsyncInoModelBase):
+    object_class = SampleAsync
+
+class SampleAsyncIndexed(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'email', 'type': 'str', 'index': 'unique'},
+        {'name': 'site', 'type': 'str', 'index': 'hash'},
+        {'name': 'level', 'type': 'int', 'index': 'sorted'},
+        {'name': 'seen', 'type': 'datetime', 'index': 'sorted', 'retention': 3600},
+        {'name': 'version', 'type': 'int'}
+    ]
+
+class SampleAsyncIndexedModel(AsyncInoModelBase):
+    object_class = SampleAsyncIndexed
+    version_field = 'version'
+
+class TestCasesAsyncInoRedis(unittest.IsolatedAsyncioTestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+
+    async def test_connect_to_db(self):
+        # Connect to the database
+        async with AsyncInoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db) as dstore:
+            # Flush the database
+            await dstore.redis.flushdb()
+            # Write a value to a key with a pipeline and read it back
+            pipe = dstore.pipeline()
+            pipe.set('TESTKEY', 'TESTVALUE')
+            pipe.get('TESTKEY')
+            results = await pipe.execute()
+            self.assertEqual(results[1].decode('utf-8'), 'TESTVALUE')
+            # Flush the database
+            await dstore.redis.flushdb()
+
+    async def test_model_bulk_operations(self):
+        # Connect to the database
+        async with AsyncInoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db) as dstore:
+            # Flush the database
+            await dstore.redis.flushdb()
+            model = SampleAsyncModel(dstore)
+            # Save a few objects plus an invalid one
+            objects = [SampleAsync({'str1': 'Test string {}'.format(i), 'int1': i}) for i in range(5)]
+            invalid = SampleAsync()
+            invalid.oid = 'not a uuid'
+            errors = await model.save_many(objects + [invalid], chunk_size=2)
+            self.assertIsInstance(errors['not a uuid'], InvalidDataException)
+            # Load them back along with an oid that doesn't exist
+            missing_oid = uuid.uuid4()
+            loaded, errors = await model.get_many([obj.oid for obj in objects] + [missing_oid], chunk_size=2)
+            self.assertEqual([obj.get_dict() for obj in loaded], [obj.get_dict() for obj in objects])
+            self.assertIsInstance(errors[missing_oid], NotExistsException)
+            # Delete one and make sure it's gone
+            await model.delete(objects[0].oid)
+            with self.assertRaises(NotExistsException):
+                await model.get(objects[0].oid)
+            self.assertEqual((await model.get(objects[1].oid)).int1, 1)
+            # The synchronous model's methods that have no async counterpart aren't inherited
+            self.assertFalse(hasattr(model, 'iter_batches'))
+            # Flush the database
+            await dstore.redis.flushdb()
+
+    async def test_model_walks(self):
+        async with AsyncInoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db) as dstore:
+            await dstore.redis.flushdb()
+            model = SampleAsyncModel(dstore)
+            objects = [SampleAsync({'str1': 'Test string {}'.format(i), 'int1': i}) for i in range(5)]
+            self.assertEqual(await model.save_many(objects), {})
+            # iter_all walks the objects a batch at a time
+            self.assertEqual(sorted([obj.int1 async for obj in model.iter_all(batch_size=2)]), [0, 1, 2, 3, 4])
+            projected = [obj async for obj in model.iter_all(fields=['int1'])]
+            self.assertEqual([obj.get_loaded_fields() for obj in projected], [['oid', 'int1']] * 5)
+            # get_columns reads the values by column, in the order requested
+            missing_oid = uuid.uuid4()
+            columns, errors = await model.get_columns([obj.oid for obj in reversed(objects)] + [missing_oid],
+                                                      fields=['int1'])
+            self.assertEqual(list(columns['int1']), [4, 3, 2, 1, 0])
+            self.assertIsInstance(errors[missing_oid], NotExistsException)
+            await dstore.redis.flushdb()
+
+    async def test_model_indexes_and_versions(self):
+        async with AsyncInoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db) as dstore:
+            await dstore.redis.flushdb()
+            model = SampleAsyncIndexedModel(dstore)
+            obj = SampleAsyncIndexed({'email': 'user@example.com', 'site': 'north'})
+            await model.save(obj)
+            self.assertEqual(obj.version, 1)
+            # Changing an indexed value moves its entry
+            obj.site = 'south'
+            await model.save(obj)
+            self.assertEqual(obj.version, 2)
+            self.assertEqual(await dstore.redis.zrange('sampleasyncindexed:_idx:site:north', 0, -1), [])
+            self.assertEqual(await dstore.redis.zrange('sampleasyncindexed:_idx:site:south', 0, -1),
+                             [str(obj.oid).encode('utf-8')])
+            # Stale copies and duplicate unique values are refused
+            stale = SampleAsyncIndexed(obj.get_dict())
+            stale.version = 1
+            with self.assertRaises(ConflictException):
+                await model.save(stale)
+            with self.assertRaises(DuplicateException):
+                await model.save(SampleAsyncIndexed({'email': 'user@example.com'}))
+            # Deleting removes the index entries with the object
+            await model.delete(obj.oid)
+            self.assertEqual(await dstore.redis.keys('*'), [])
+
+    async def test_model_queries(self):
+        async with AsyncInoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db) as dstore:
+            await dstore.redis.flushdb()
+            model = SampleAsyncIndexedModel(dstore)
+            objects = [SampleAsyncIndexed({'email': 'user{}@example.com'.format(i), 'site': 'site{}'.format(i % 2),
+                                           'level': i}) for i in range(5)]
+            self.assertEqual(await model.create_many(objects), {})
+            # create refuses stored objects and update missing ones
+            with self.assertRaises(ExistsException):
+                await model.create(SampleAsyncIndexed(objects[0].get_dict()))
+            with self.assertRaises(NotExistsException):
+                await model.update(SampleAsyncIndexed({'email': 'new@example.com'}))
+            objects[0].level = 10
+            await model.update(objects[0])
+            # Index queries
+            self.assertEqual([obj.oid for obj in await model.find_by('email', 'user1@example.com')], [objects[1].oid])
+            self.assertEqual(sorted(obj.level for obj in await model.find_by('site', 'site0')), [2, 4, 10])
+            # Pages of a 'hash' index are in oid order
+            page = await model.find_by('site', 'site0', offset=1, count=1)
+            self.assertEqual([obj.oid for obj in page], sorted([obj.oid for obj in objects[::2]], key=str)[1:2])
+            self.assertEqual([obj.level for obj in await model.find_by('level', 3)], [3])
+            self.assertEqual([obj.level for obj in await model.range_by('level', 2, reverse=True)], [10, 4, 3, 2])
+            self.assertEqual([obj.level for obj in await model.range_by('level', count=2)], [1, 2])
+            # Walking and reading by column
+            self.assertEqual(sorted([obj.level async for obj in model.iter_all(batch_size=2)]), [1, 2, 3, 4, 10])
+            columns, errors = await model.get_columns([obj.oid for obj in objects], fields=['level'])
+            self.assertEqual(list(columns['level']), [10, 1, 2, 3, 4])
+            self.assertEqual(errors, {})
+            # Saves trim the retention index as they go; entries that aged out since are trimmed on demand
+            old = SampleAsyncIndexed({'seen': datetime.datetime.utcnow() - datetime.timedelta(hours=2)})
+            await model.save(old)
+            self.assertIsNone(await dstore.redis.zscore(model.indexes.key('seen'), str(old.oid)))
+            await dstore.redis.zadd(model.indexes.key('seen'), {str(old.oid): time.time() - 7200})
+            self.assertEqual(await model.trim_indexes(), 1)
+            await dstore.redis.flushdb()
+
+    def tearDown(self):
+        pass
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
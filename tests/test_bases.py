@@ -7,7 +7,10 @@ import os
 import unittest
 import uuid
 
-from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase
+import redis
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, ConflictException, InvalidDataException, \
+    NotExistsException, NotLoadedException
 
 # === GLOBALS ===
 logging.basicConfig(level=logging.DEBUG)
@@ -41,6 +44,215 @@ class TestCasesInoRedis(unittest.TestCase):
         del model_base
         del dstore
 
+    def test_model_base_bulk_operations(self):
+        # Create a subclass and a model storing it
+        class TestBulk(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}, {'name': 'int1', 'type': 'int'},
+                      {'name': 'bool1', 'type': 'bool'}, {'name': 'list1', 'type': 'list'},
+                      {'name': 'datetime1', 'type': 'datetime'}]
+        class TestBulkModel(InoModelBase):
+            object_class = TestBulk
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        model = TestBulkModel(dstore)
+        # Save a few objects plus an invalid one, in chunks smaller than the batch
+        objects = [TestBulk({'str1': 'Test string {}'.format(i), 'int1': i, 'bool1': True, 'list1': ['a', 'b'],
+                             'custom_string': 'Custom test string'}) for i in range(5)]
+        invalid = TestBulk()
+        invalid.oid = 'not a uuid'
+        errors = model.save_many(objects + [invalid], chunk_size=2)
+        # Make sure only the invalid object was rejected
+        self.assertEqual(list(errors), ['not a uuid'])
+        self.assertIsInstance(errors['not a uuid'], InvalidDataException)
+        # Load them back along with an oid that doesn't exist
+        missing_oid = uuid.uuid4()
+        loaded, errors = model.get_many([obj.oid for obj in objects] + [missing_oid], chunk_size=2)
+        self.assertEqual([obj.get_dict() for obj in loaded], [obj.get_dict() for obj in objects])
+        self.assertIsInstance(errors[missing_oid], NotExistsException)
+        # Delete two of them along with the missing oid
+        errors = model.delete_many([objects[0].oid, objects[1].oid, missing_oid])
+        self.assertEqual(list(errors), [missing_oid])
+        with self.assertRaises(NotExistsException):
+            model.get(objects[0].oid)
+        self.assertEqual(model.get(objects[2].oid).str1, 'Test string 2')
+        # Flush the database
+        dstore.redis.flushdb()
+        del model
+        del dstore
+
+    def test_model_base_iter_all(self):
+        # Create a subclass with an index, so there are non-object keys under the prefix, and two models storing it
+        class TestIter(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'int1', 'type': 'int', 'index': 'sorted'}]
+        class TestIterModel(InoModelBase):
+            object_class = TestIter
+        class TestIterMembersModel(InoModelBase):
+            object_class = TestIter
+            key_prefix = 'testitermembers'
+            members_key = 'testitermembers:_all'
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        for model in (TestIterModel(dstore), TestIterMembersModel(dstore)):
+            objects = [TestIter({'int1': i}) for i in range(25)]
+            model.save_many(objects)
+            model.delete(objects[0].oid)
+            expected = sorted(range(1, 25))
+            self.assertEqual(sorted(obj.int1 for obj in model.iter_all(batch_size=4)), expected)
+            self.assertEqual(sorted(obj.int1 for obj in model.iter_all(batch_size=4, prefetch=True)), expected)
+            # Resume a walk from the cursor saved after its first batch
+            batches = model.iter_batches(batch_size=4)
+            cursor, first = next(batches)
+            batches.close()
+            rest = [obj.int1 for obj in model.iter_all(batch_size=4, cursor=cursor)]
+            self.assertEqual(sorted(set(rest + [obj.int1 for obj in first])), expected)
+            # Stopping a prefetching walk early stops its thread
+            walk = model.iter_all(batch_size=4, prefetch=True)
+            next(walk)
+            walk.close()
+        # Flush the database
+        dstore.redis.flushdb()
+        del dstore
+
+    def test_model_base_partial_saves(self):
+        # Create a subclass and a model storing it
+        class TestPartial(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}, {'name': 'int1', 'type': 'int'},
+                      {'name': 'bool1', 'type': 'bool'}]
+        class TestPartialModel(InoModelBase):
+            object_class = TestPartial
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        model = TestPartialModel(dstore)
+        obj = TestPartial({'str1': 'Test string', 'int1': 1})
+        model.save(obj)
+        # Two copies loaded separately each change a different field; a partial save keeps the other's change
+        first = model.get(obj.oid)
+        second = model.get(obj.oid)
+        self.assertEqual(first.get_dirty_dict(), {})
+        first.int1 = 2
+        second.bool1 = True
+        self.assertEqual(first.get_dirty_dict(), {'int1': 2})
+        model.save(first)
+        model.save(second)
+        loaded = model.get(obj.oid, lazy=True)
+        self.assertEqual((loaded.str1, loaded.int1, loaded.bool1), ('Test string', 2, True))
+        self.assertEqual(second.get_dirty_dict(), {})
+        # Setting a field to None removes it from the hash
+        second.str1 = None
+        model.save(second)
+        self.assertFalse(dstore.redis.hexists(model._key(obj.oid), 'str1'))  # pylint: disable=protected-access
+        # A partial save of an object deleted meanwhile recreates it with its own oid
+        stale = model.get(obj.oid)
+        model.delete(obj.oid)
+        stale.int1 = 3
+        model.save(stale)
+        self.assertEqual((model.get(obj.oid).oid, model.get(obj.oid).int1), (obj.oid, 3))
+        # Flush the database
+        dstore.redis.flushdb()
+        del dstore
+
+    def test_model_base_projected_reads(self):
+        # Create a subclass and a model storing it
+        class TestProjected(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'name', 'type': 'str', 'min': 1},
+                      {'name': 'updated', 'type': 'datetime'}, {'name': 'list1', 'type': 'list'},
+                      {'name': 'int1', 'type': 'int'}]
+        class TestProjectedModel(InoModelBase):
+            object_class = TestProjected
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        model = TestProjectedModel(dstore)
+        objects = [TestProjected({'name': 'Test {}'.format(i), 'list1': ['a'], 'int1': i}) for i in range(3)]
+        model.save_many(objects)
+        loaded, errors = model.get_many([obj.oid for obj in objects] + [uuid.uuid4()], fields=['name', 'updated'])
+        self.assertEqual(len(errors), 1)
+        for obj, original in zip(loaded, objects):
+            self.assertEqual((obj.oid, obj.name, obj.updated), (original.oid, original.name, original.updated))
+            self.assertEqual(obj.get_loaded_fields(), ['oid', 'name', 'updated'])
+            self.assertEqual(set(obj.get_dict()), {'oid', 'name', 'updated'})
+            with self.assertRaises(NotLoadedException):
+                obj.list1  # pylint: disable=pointless-statement
+            self.assertIsNone(getattr(obj, 'int1', None))
+        # Saving a projected object only writes what changed
+        obj = model.get(objects[0].oid, fields=['name'], lazy=True)
+        obj.name = 'Renamed'
+        obj.int1 = 10
+        model.save(obj)
+        self.assertEqual(model.get(objects[0].oid).get_dict(), dict(objects[0].get_dict(), name='Renamed', int1=10))
+        # Flush the database
+        dstore.redis.flushdb()
+        del dstore
+
+    def test_model_base_version_conflicts(self):
+        # Create a subclass with a version field and a model storing it
+        class TestVersioned(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'version', 'type': 'int'},
+                      {'name': 'str1', 'type': 'str'}]
+        class TestVersionedModel(InoModelBase):
+            object_class = TestVersioned
+            version_field = 'version'
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        model = TestVersionedModel(dstore)
+        obj = TestVersioned({'str1': 'Test string'})
+        model.save(obj)
+        self.assertEqual(obj.version, 1)
+        first = model.get(obj.oid)
+        second = model.get(obj.oid)
+        first.str1 = 'First update'
+        model.save(first)
+        self.assertEqual(first.version, 2)
+        # The second copy is now stale
+        second.str1 = 'Second update'
+        with self.assertRaises(ConflictException):
+            model.save(second)
+        self.assertEqual(second.version, 1)
+        self.assertEqual(model.get(obj.oid).str1, 'First update')
+        # A new object reusing a stored oid is stale too
+        with self.assertRaises(ConflictException):
+            model.save(TestVersioned({'oid': str(obj.oid), 'str1': 'Overwrite'}))
+        # Reloading picks up the current version
+        second = model.get(obj.oid)
+        second.str1 = 'Second update'
+        model.save(second)
+        self.assertEqual(model.get(obj.oid).get_dict(), second.get_dict())
+        # With WATCH/MULTI, a write landing between the checks and the write makes the save check again
+        class TestRacingModel(TestVersionedModel):
+            scripted = False
+            races = 1
+            def _check_chunk(self, node, objects, names):
+                result = super()._check_chunk(node, objects, names)
+                if self.races:
+                    self.races -= 1
+                    dstore.redis.hset(self._key(objects[0].oid), 'str1', 'Racing update')
+                return result
+        racing_model = TestRacingModel(dstore)
+        second.str1 = 'Third update'
+        racing_model.save(second)
+        self.assertEqual(racing_model.races, 0)
+        self.assertEqual((second.version, model.get(obj.oid).str1), (4, 'Third update'))
+        # A save script that can't be run leaves the version as it was
+        class TestFailingModel(TestVersionedModel):
+            def _run_saves(self, node, objects, calls):
+                raise redis.ConnectionError('Connection lost')
+        second.str1 = 'Lost update'
+        with self.assertRaises(redis.ConnectionError):
+            TestFailingModel(dstore).save(second)
+        self.assertEqual(second.version, 4)
+        # Flush the database
+        dstore.redis.flushdb()
+        del dstore
+
     def tearDown(self):
         pass
 
@@ -198,6 +410,208 @@ class TestCasesInoObjectBase(unittest.TestCase):
         # Make sure the string is correctly set
         self.assertEqual(dict_object_base['custom_string'], tmp_custom_str)
 
+    def test_object_base_schema_compiled(self):
+        # Create a subclass with a few fields
+        class TestSchema(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}, {'name': 'int1', 'type': 'int'}]
+        # Make sure the schema was compiled for the subclass and not shared with the base
+        self.assertEqual(TestSchema._schema.names, ('oid', 'str1', 'int1'))
+        self.assertEqual(InoObjectBase._schema.names, ('oid',))
+        # Make sure unknown, non-custom keys are ignored
+        test_schema_1 = TestSchema({'str1': 'Test string', 'unknown1': 'Ignored'})
+        self.assertEqual(test_schema_1.str1, 'Test string')
+        self.assertNotIn('unknown1', test_schema_1.get_dict())
+
+    def test_object_base_schema_bad_type(self):
+        # An unsupported field type should be rejected when the class is defined
+        with self.assertRaises(TypeError):
+            class TestBadType(InoObjectBase):  # pylint: disable=unused-variable
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'bad1', 'type': 'complex'}]
+
+    def test_make_compact_object_base(self):
+        # Create a string that we can use throughout the test
+        tmp_str = 'Test string'
+        # Create a compact subclass specifying a string field
+        class TestCompact(InoObjectBase, compact=True):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}]
+        # Create a TestCompact object with a custom field
+        test_compact_1 = TestCompact({'str1': tmp_str, 'custom_string': 'Custom test string'})
+        # Make sure the object doesn't carry a __dict__
+        self.assertFalse(hasattr(test_compact_1, '__dict__'))
+        self.assertEqual(TestCompact.__slots__, ('oid', 'str1'))
+        # Make sure the attributes read the same as a regular object
+        self.assertEqual(test_compact_1.str1, tmp_str)
+        self.assertEqual(test_compact_1.custom_string, 'Custom test string')
+        self.assertEqual(test_compact_1.fields_custom, ('custom_string',))
+        self.assertEqual(len(test_compact_1.validation_methods), 2)
+        # Make sure custom fields can be updated and show up in the dictionary
+        test_compact_1.custom_string = 'Updated string'
+        dict_test_compact_1 = test_compact_1.get_dict()
+        self.assertEqual(dict_test_compact_1['str1'], tmp_str)
+        self.assertEqual(dict_test_compact_1['custom_string'], 'Updated string')
+        # Make sure validation still runs
+        with self.assertRaises(InvalidDataException):
+            test_compact_1.set_fields({'custom_string': 147})
+
+    def test_compact_object_validators(self):
+        # Compact subclasses add validation methods through validators, as they have no per-instance list
+        class TestCompact(InoObjectBase, compact=True):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}]
+            validators = InoObjectBase.validators + ('_validate_str1',)
+
+            def _validate_str1(self):
+                return None if self.str1 else 'str1 is empty'
+        TestCompact({'str1': 'Test string'}).validate()
+        test_compact_1 = TestCompact()
+        self.assertEqual(len(test_compact_1.validation_methods), 3)
+        with self.assertRaises(InvalidDataException):
+            test_compact_1.validate()
+        self.assertEqual(TestCompact.validate_many([test_compact_1]), {test_compact_1.oid: ['str1 is empty']})
+        # Appending to the read-only lists fails instead of being silently dropped
+        with self.assertRaises(AttributeError):
+            test_compact_1.validation_methods.append(lambda: 'Always invalid')
+        with self.assertRaises(AttributeError):
+            test_compact_1.fields_custom.append('custom_string')
+
+    def test_object_base_dirty_tracking(self):
+        for compact in (False, True):
+            class TestDirty(InoObjectBase, compact=compact):
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'},
+                          {'name': 'list1', 'type': 'list'}]
+            # Objects that have never been stored are entirely dirty
+            obj = TestDirty({'str1': 'Test string'})
+            self.assertEqual(obj.get_dirty_dict(), obj.get_dict())
+            obj.clear_dirty()
+            self.assertEqual(obj.get_dirty_dict(), {})
+            # Assignments, set_fields and custom fields are tracked
+            obj.str1 = 'Changed'
+            obj.set_fields({'custom_note': 'Note'})
+            self.assertEqual(obj.get_dirty_dict(), {'str1': 'Changed', 'custom_note': 'Note'})
+            self.assertEqual(obj.get_hash(dirty_only=True), {'str1': 'Changed', 'custom_note': 'Note'})
+            # In place changes need mark_dirty on compact objects
+            obj.clear_dirty()
+            obj.list1.append('a')
+            obj.mark_dirty('list1')
+            self.assertEqual(obj.get_dirty_dict(), {'list1': ['a']})
+            # Copies track separately and loaded objects start clean
+            copy = obj.copy()
+            copy.str1 = 'Copy'
+            self.assertEqual(obj.get_dirty_dict(), {'list1': ['a']})
+            self.assertEqual(TestDirty.from_hash(obj.get_hash()).get_dirty_dict(), {})
+            if not compact:
+                # Plain objects find in place changes on their own, in lazily decoded fields too
+                for loaded in (copy, TestDirty.from_hash(obj.get_hash(), lazy=True)):
+                    loaded.clear_dirty()
+                    loaded.list1.append('b')
+                    self.assertEqual(loaded.get_dirty_dict(), {'list1': ['a', 'b']})
+
+    def test_object_base_plain_attributes(self):
+        # Plain objects, the base class's included, keep a __dict__ for attributes of their own
+        object_base = InoObjectBase()
+        object_base.note = 'Not a field'
+        object_base.validation_methods.append(lambda: 'Always invalid')
+        with self.assertRaises(InvalidDataException):
+            object_base.validate()
+        class TestCompact(InoObjectBase, compact=True):
+            pass
+        self.assertIsInstance(TestCompact(), InoObjectBase)
+        self.assertTrue(issubclass(TestCompact, InoObjectBase))
+
+    def test_object_base_dirty_assignments(self):
+        # Plain objects find their assigned fields by comparison, including over lazily loaded and projected ones
+        for compact in (False, True):
+            class TestAssigned(InoObjectBase, compact=compact):
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'},
+                          {'name': 'int1', 'type': 'int'}]
+            mapping = {key.encode('utf-8'): str(value).encode('utf-8')
+                       for key, value in TestAssigned({'str1': 'Stored', 'int1': 1}).get_hash().items()}
+            lazy = TestAssigned.from_hash(mapping, lazy=True)
+            lazy.str1 = 'Assigned'
+            self.assertEqual(lazy.int1, 1)
+            self.assertEqual(lazy.get_dirty_dict(), {'str1': 'Assigned'})
+            self.assertEqual(lazy.get_dict()['str1'], 'Assigned')
+            projected = TestAssigned.from_hash({b'oid': mapping[b'oid'], b'str1': b'Stored'}, fields=['oid', 'str1'])
+            projected.int1 = 2
+            self.assertEqual(projected.get_hash(dirty_only=True), {'int1': 2})
+            self.assertEqual(projected.get_loaded_fields(), ['oid', 'str1', 'int1'])
+            projected.clear_dirty()
+            self.assertEqual(projected.get_dirty_dict(), {})
+
+    def test_object_base_lazy_from_hash(self):
+        for compact in (False, True):
+            class TestLazy(InoObjectBase, compact=compact):
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'},
+                          {'name': 'datetime1', 'type': 'datetime'}, {'name': 'list1', 'type': 'list'},
+                          {'name': 'int1', 'type': 'int', 'min': 0}]
+            # A subclass overriding __init__ goes through it
+            class TestLazyInit(TestLazy):
+                def __init__(self, dictionary=None):
+                    super().__init__(dictionary)
+                    self.initialized = True
+            for obj_class in (TestLazy, TestLazyInit):
+                original = obj_class({'str1': 'Test string', 'list1': ['a'], 'custom_note': 'Note'})
+                mapping = {key.encode('utf-8'): str(value).encode('utf-8') if not isinstance(value, bytes) else value
+                           for key, value in original.get_hash().items()}
+                obj = obj_class.from_hash(mapping, lazy=True)
+                # Fields are decoded as they're read
+                self.assertEqual(obj.str1, 'Test string')
+                self.assertEqual(obj.custom_note, 'Note')
+                self.assertEqual(obj.get_dirty_dict(), {})
+                # Assigning a field that hasn't been read replaces the raw value
+                obj.int1 = 5
+                self.assertEqual(obj.get_dirty_dict(), {'int1': 5})
+                # Copies stay lazy and get_dict decodes everything
+                copy = obj.copy()
+                self.assertEqual(copy.get_dict(), dict(original.get_dict(), int1=5))
+                self.assertEqual(obj.get_dict(), copy.get_dict())
+            # Validation is deferred until asked for; bad data only fails when read
+            mapping[b'int1'] = b'-1'
+            obj = TestLazy.from_hash(mapping, lazy=True)
+            with self.assertRaises(InvalidDataException):
+                obj.validate()
+            mapping[b'int1'] = b'not a number'
+            obj = TestLazy.from_hash(mapping, lazy=True)
+            self.assertEqual(obj.str1, 'Test string')
+            with self.assertRaises(InvalidDataException):
+                obj.int1  # pylint: disable=pointless-statement
+
+    def test_object_base_field_defaults(self):
+        calls = []
+        def make_serial():
+            calls.append(1)
+            return len(calls)
+        for compact in (False, True):
+            class TestDefaults(InoObjectBase, compact=compact):
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'serial', 'type': 'int', 'default': make_serial},
+                          {'name': 'site', 'type': 'str', 'default': 'north'},
+                          {'name': 'list1', 'type': 'list', 'default': ['a']},
+                          {'name': 'seen', 'type': 'datetime', 'default': None}]
+            del calls[:]
+            first = TestDefaults()
+            second = TestDefaults()
+            self.assertEqual((first.serial, second.serial), (1, 2))
+            self.assertEqual(first.site, 'north')
+            self.assertIsNone(first.seen)
+            first.list1.append('b')
+            self.assertEqual(second.list1, ['a'])
+            # Loading skips the defaults of the fields it sets and starts clean
+            loaded = TestDefaults(second.get_dict(), load=True)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(loaded.get_dict(), second.get_dict())
+            self.assertEqual(loaded.get_dirty_dict(), {})
+            TestDefaults.from_hash({b'oid': str(first.oid).encode('utf-8'), b'serial': b'7'})
+            self.assertEqual(len(calls), 2)
+            # Fields the stored values don't have still get theirs
+            self.assertEqual(TestDefaults({'oid': first.oid}, load=True).serial, 3)
+
+    def test_compact_object_base_requires_slotted_bases(self):
+        # A compact class can't be derived from a class whose instances have a __dict__
+        class TestRegular(InoObjectBase):
+            pass
+        with self.assertRaises(TypeError):
+            class TestCompact(TestRegular, compact=True):  # pylint: disable=unused-variable
+                pass
+
     def tearDown(self):
         pass
 
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import os
+import time
+import unittest
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, InoObjectCache
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleCached(InoObjectBase):
+    fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}, {'name': 'list1', 'type': 'list'}]
+
+class SampleCachedModel(InoModelBase):
+    object_class = SampleCached
+    cache_channel = 'samplecached:invalidate'
+
+class TestCasesInoObjectCache(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+
+    def test_lru_eviction(self):
+        cache = InoObjectCache(max_size=2, ttl=None)
+        objects = [SampleCached({'str1': 'Test string {}'.format(i)}) for i in range(3)]
+        cache.put(objects[0])
+        cache.put(objects[1])
+        # Touch the first so the second becomes the least recently used
+        self.assertIsNotNone(cache.get(objects[0].oid))
+        cache.put(objects[2])
+        self.assertIsNone(cache.get(objects[1].oid))
+        self.assertEqual(cache.get(objects[2].oid).str1, 'Test string 2')
+        self.assertEqual(cache.get_stats(), {'size': 2, 'hits': 2, 'misses': 1, 'evictions': 1})
+
+    def test_ttl_expiry(self):
+        cache = InoObjectCache(ttl=0.01)
+        obj = SampleCached({'str1': 'Test string'})
+        cache.put(obj)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(obj.oid))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_returns_copies(self):
+        cache = InoObjectCache()
+        obj = SampleCached({'str1': 'Test string', 'list1': ['a']})
+        cache.put(obj)
+        # Changing the object or a returned copy must not change the cached entry
+        obj.list1.append('b')
+        cache.get(obj.oid).list1.append('c')
+        self.assertEqual(cache.get(obj.oid).list1, ['a'])
+
+    def test_invalidated_during_read(self):
+        cache = InoObjectCache(max_size=1)
+        objects = [SampleCached({'str1': 'Test string {}'.format(i)}) for i in range(2)]
+        # An object read before its invalidation isn't cached
+        since = cache.sequence()
+        cache.invalidate(objects[0].oid)
+        cache.put(objects[0], since)
+        self.assertIsNone(cache.get(objects[0].oid))
+        # Nor is one whose invalidation was forgotten since
+        cache.invalidate(objects[1].oid)
+        cache.put(objects[0], since)
+        self.assertIsNone(cache.get(objects[0].oid))
+        cache.put(objects[0], cache.sequence())
+        self.assertIsNotNone(cache.get(objects[0].oid))
+
+    def test_model_replica_reads(self):
+        # The next database stands in for a replica (see test_replicas)
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db,
+                          replicas=[(self.redis_host, self.redis_port, int(self.redis_db) + 1)])
+        dstore.redis.flushdb()
+        model = SampleCachedModel(dstore, cache=InoObjectCache())
+        obj = SampleCached({'str1': 'Test string'})
+        model.save(obj)
+        replica = InoRedis(host=self.redis_host, port=self.redis_port, db=int(self.redis_db) + 1)
+        SampleCachedModel(replica).save(SampleCached(obj.get_dict()))
+        # Replica reads may miss recent writes, so only the primary's are cached
+        model.get(obj.oid)
+        self.assertEqual(len(model.cache), 0)
+        model.get(obj.oid, primary=True)
+        self.assertEqual(len(model.cache), 1)
+        dstore.redis.flushdb()
+        replica.redis.flushdb()
+        replica.close()
+        dstore.close()
+
+    def test_model_read_through_and_invalidation(self):
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        # Two models with their own caches stand in for two processes
+        local_model = SampleCachedModel(dstore, cache=InoObjectCache())
+        remote_model = SampleCachedModel(dstore, cache=InoObjectCache())
+        remote_model.cache.subscribe(dstore, remote_model.cache_channel)
+        obj = SampleCached({'str1': 'Test string'})
+        local_model.save(obj)
+        # The first read misses and the second is served from the cache
+        self.assertEqual(remote_model.get(obj.oid).str1, 'Test string')
+        self.assertEqual(remote_model.get(obj.oid).str1, 'Test string')
+        self.assertEqual(remote_model.cache.get_stats()['hits'], 1)
+        # A save through the other model invalidates the entry through pub/sub
+        obj.str1 = 'Updated string'
+        local_model.save(obj)
+        for _ in range(50):
+            if not remote_model.cache:
+                break
+            time.sleep(0.05)
+        self.assertEqual(remote_model.get(obj.oid).str1, 'Updated string')
+        remote_model.cache.stop()
+        # Flush the database
+        dstore.redis.flushdb()
+        dstore.close()
+
+    def test_uncached_writer_invalidates(self):
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        # A process that only writes has no cache of its own but still has to invalidate the readers'
+        writer_model = SampleCachedModel(dstore)
+        reader_model = SampleCachedModel(dstore, cache=InoObjectCache())
+        reader_model.cache.subscribe(dstore, reader_model.cache_channel)
+        obj = SampleCached({'str1': 'Test string'})
+        writer_model.save(obj)
+        self.assertEqual(reader_model.get(obj.oid).str1, 'Test string')
+        obj.str1 = 'Updated string'
+        writer_model.save(obj)
+        for _ in range(50):
+            if not reader_model.cache:
+                break
+            time.sleep(0.05)
+        self.assertEqual(reader_model.get(obj.oid).str1, 'Updated string')
+        # Deletes are published as well
+        reader_model.get(obj.oid)
+        writer_model.delete(obj.oid)
+        for _ in range(50):
+            if not reader_model.cache:
+                break
+            time.sleep(0.05)
+        self.assertEqual(reader_model.get_many([obj.oid])[0], [])
+        reader_model.cache.stop()
+        # Flush the database
+        dstore.redis.flushdb()
+        dstore.close()
+
+    def tearDown(self):
+        pass
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
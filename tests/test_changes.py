@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import os
+import unittest
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, InoChangeStream
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleChanged(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'site', 'type': 'str', 'index': 'hash'},
+        {'name': 'level', 'type': 'int'},
+        {'name': 'version', 'type': 'int'}
+    ]
+
+class SampleChangedModel(InoModelBase):
+    object_class = SampleChanged
+    change_stream = 'changes'
+    version_field = 'version'
+
+class SamplePlainChanged(InoObjectBase):
+    fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'site', 'type': 'str'}, {'name': 'level', 'type': 'int'}]
+
+class SamplePlainChangedModel(InoModelBase):
+    # No indexes or version_field, so saves take the plain pipeline path
+    object_class = SamplePlainChanged
+    change_stream = 'changes'
+    scripted = False
+
+class TestCasesChanges(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        self.dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        self.dstore.redis.flushdb()
+
+    def events(self):
+        return [{key.decode('utf-8'): value.decode('utf-8') for key, value in entries.items()}
+                for _, entries in self.dstore.redis.xrange('changes')]
+
+    def test_save_delete_events(self):
+        # The script and WATCH/MULTI save paths
+        for scripted in (True, False):
+            self.dstore.redis.flushdb()
+            model = type('SampleModel', (SampleChangedModel,), {'scripted': scripted})(self.dstore)
+            prefix = model.key_prefix
+            obj = SampleChanged({'site': 'north'})
+            self.assertEqual(model.save_many([obj]), {})
+            obj.level = 5
+            model.save(obj)
+            model.delete(obj.oid)
+            events = self.events()
+            self.assertEqual([(event['op'], event['model'], event['oid']) for event in events],
+                             [('save', prefix, str(obj.oid))] * 2 + [('delete', prefix, str(obj.oid))])
+            self.assertEqual(sorted(events[0]['fields'].split(',')), ['level', 'oid', 'site', 'version'])
+            self.assertEqual(events[1]['fields'], 'level,version')
+            self.assertEqual([event['version'] for event in events[:2]], ['1', '2'])
+
+    def test_plain_save_events(self):
+        # The plain path, which writes each chunk in one pipeline without reading or checking anything first
+        model = SamplePlainChangedModel(self.dstore)
+        self.assertFalse(model.indexes)
+        obj = SamplePlainChanged({'site': 'north'})
+        self.assertEqual(model.save_many([obj]), {})
+        obj.level = 5
+        model.save(obj)
+        # Saving an object that hasn't changed writes nothing, so it adds no event
+        model.save(obj)
+        model.save_many([model.get(obj.oid)])
+        model.delete(obj.oid)
+        events = self.events()
+        self.assertEqual([(event['op'], event['model'], event['oid']) for event in events],
+                         [('save', 'sampleplainchanged', str(obj.oid))] * 2 +
+                         [('delete', 'sampleplainchanged', str(obj.oid))])
+        self.assertEqual(sorted(events[0]['fields'].split(',')), ['level', 'oid', 'site'])
+        self.assertEqual(events[1]['fields'], 'level')
+        self.assertNotIn('version', events[0])
+
+    def test_failed_saves(self):
+        model = SampleChangedModel(self.dstore)
+        obj = SampleChanged({'site': 'north'})
+        model.save(obj)
+        stale = SampleChanged(obj.get_dict())
+        stale.clear_dirty()
+        stale.version = 0
+        stale.level = 3
+        # Nothing is written for a conflict or create of an existing object, so no event is added
+        self.assertTrue(model.save_many([stale]))
+        self.assertTrue(model.create_many([SampleChanged(obj.get_dict())]))
+        self.assertEqual(len(self.events()), 1)
+
+    def test_consumer(self):
+        model = SampleChangedModel(self.dstore)
+        first = InoChangeStream(self.dstore, 'changes', 'caches', 'first', count=2)
+        objects = [SampleChanged({'site': 'north', 'level': i}) for i in range(3)]
+        model.save_many(objects)
+        changes = first.read()
+        self.assertEqual([change.oid for change in changes], [str(obj.oid) for obj in objects[:2]])
+        self.assertEqual(changes[0].version, 1)
+        self.assertIn('level', changes[0].fields)
+        # A restarted consumer gets back what it hadn't acknowledged, then the new events
+        restarted = InoChangeStream(self.dstore, 'changes', 'caches', 'first', count=2)
+        self.assertEqual([change.event_id for change in restarted.read()], [change.event_id for change in changes])
+        restarted.ack(changes[:1])
+        self.assertEqual([change.oid for change in restarted.read()], [str(objects[2].oid)])
+        self.assertEqual(restarted.read(block=10), [])
+        # Another consumer can take over the unacknowledged ones
+        second = InoChangeStream(self.dstore, 'changes', 'caches', 'second')
+        claimed = second.claim(0)
+        self.assertEqual([change.oid for change in claimed], [str(objects[1].oid), str(objects[2].oid)])
+        second.ack(claimed)
+        self.assertEqual(self.dstore.redis.xpending('changes', 'caches')['pending'], 0)
+
+    def tearDown(self):
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import logging
+import os
+import unittest
+import uuid
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, InvalidDataException, \
+    NotExistsException, ValidationException
+from inovonics.cloud.datastore import columns
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleReading(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'sensor', 'type': 'str', 'min': 1},
+        {'name': 'value', 'type': 'float'},
+        {'name': 'count', 'type': 'int'},
+        {'name': 'alarm', 'type': 'bool'},
+        {'name': 'taken', 'type': 'datetime'}
+    ]
+
+class SampleReadingModel(InoModelBase):
+    object_class = SampleReading
+
+class TestCasesColumns(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        self.dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        self.dstore.redis.flushdb()
+
+    def make_row(self, **values):
+        obj = SampleReading(dict({'sensor': 'north', 'value': 1.5, 'count': 3, 'alarm': True}, **values))
+        return {name.encode('utf-8'): str(value).encode('utf-8') for name, value in obj.get_hash().items()}
+
+    def test_from_rows(self):
+        rows = [self.make_row(count=index) for index in range(3)]
+        rows[1][b'custom_note'] = b'checked'
+        del rows[2][b'alarm']
+        objects, errors = SampleReading.from_rows(rows)
+        self.assertEqual(errors, {})
+        self.assertEqual([obj.get_dict() for obj in objects], [SampleReading.from_hash(row).get_dict() for row in rows])
+        self.assertEqual(objects[1].custom_note, 'checked')
+        # The missing field gets its default and nothing is dirty
+        self.assertIs(objects[2].alarm, False)
+        self.assertEqual(objects[0].get_dirty_dict(), {})
+
+    def test_bad_rows(self):
+        rows = [self.make_row(), self.make_row(), self.make_row(sensor='south')]
+        rows[0][b'count'] = b'many'
+        rows[1][b'sensor'] = b''
+        objects, errors = SampleReading.from_rows(rows)
+        self.assertEqual([obj.sensor for obj in objects], ['south'])
+        self.assertEqual(sorted(errors), [0, 1])
+        self.assertIsInstance(errors[0], InvalidDataException)
+        self.assertIsInstance(errors[1], ValidationException)
+
+    def test_columns_from_rows(self):
+        rows = [self.make_row(count=index, value=index / 2) for index in range(4)]
+        del rows[3][b'taken']
+        result = SampleReading.columns_from_rows(rows)
+        self.assertEqual(len(result), 4)
+        self.assertEqual(list(result['count']), [0, 1, 2, 3])
+        self.assertEqual(list(result['value']), [0.0, 0.5, 1.0, 1.5])
+        self.assertIsInstance(result['oid'][0], uuid.UUID)
+        self.assertIsInstance(result['taken'][0], datetime.datetime)
+        self.assertIsNone(result['taken'][3])
+        if columns.numpy is None:
+            self.assertIsInstance(result['count'], list)
+        else:
+            self.assertEqual(result['alarm'].dtype, columns.numpy.dtype('bool'))
+
+    def test_model(self):
+        model = SampleReadingModel(self.dstore)
+        saved = [SampleReading({'sensor': 'north', 'count': index}) for index in range(5)]
+        self.assertEqual(model.save_many(saved), {})
+        missing = uuid.uuid4()
+        oids = [obj.oid for obj in saved] + [missing]
+        objects, errors = model.get_many(oids)
+        self.assertEqual([obj.get_dict() for obj in objects], [obj.get_dict() for obj in saved])
+        self.assertIsInstance(errors[missing], NotExistsException)
+        result, errors = model.get_columns(reversed(oids), fields=['count'])
+        self.assertEqual(list(result['count']), [4, 3, 2, 1, 0])
+        self.assertEqual(list(result['oid']), [obj.oid for obj in reversed(saved)])
+        self.assertEqual(list(errors), [missing])
+
+    def tearDown(self):
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import logging
+import unittest
+import uuid
+
+from inovonics.cloud.datastore import InoObjectBase
+from inovonics.cloud.datastore.fieldcodecs import parse_datetime, parse_epoch_us, parse_uuid
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class TestCasesFieldCodecs(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        pass
+
+    def test_parse_datetime(self):
+        tmp_datetime = datetime.datetime(2017, 8, 9, 10, 11, 12, 131415)
+        # The isoformat output, as str and bytes
+        self.assertEqual(parse_datetime(tmp_datetime.isoformat()), tmp_datetime)
+        self.assertEqual(parse_datetime(tmp_datetime.isoformat().encode('utf-8')), tmp_datetime)
+        # Epoch microseconds, as int (the binary serializers' form)
+        self.assertEqual(parse_datetime(1502273472131415), tmp_datetime)
+        # Legacy formats only dateutil understands, including all-digit ones
+        self.assertEqual(parse_datetime('Aug 9 2017 10:11:12.131415'), tmp_datetime)
+        self.assertEqual(parse_datetime(b'20200102'), datetime.datetime(2020, 1, 2))
+        # Bad and out of range values raise ValueError
+        for value in ('not a datetime', b'1502273472131415', 10 ** 20):
+            with self.assertRaises(ValueError):
+                parse_datetime(value)
+
+    def test_parse_epoch_us(self):
+        tmp_datetime = datetime.datetime(2017, 8, 9, 10, 11, 12, 131415)
+        self.assertEqual(parse_epoch_us(b'1502273472131415'), tmp_datetime)
+        self.assertEqual(parse_epoch_us('1502273472131415'), tmp_datetime)
+        # Before the epoch
+        self.assertEqual(parse_epoch_us(b'-1'), datetime.datetime(1969, 12, 31, 23, 59, 59, 999999))
+        self.assertEqual(parse_epoch_us(-86400 * 10 ** 6), datetime.datetime(1969, 12, 31))
+        # Values written before the field used the encoding
+        self.assertEqual(parse_epoch_us(tmp_datetime.isoformat().encode('utf-8')), tmp_datetime)
+        with self.assertRaises(ValueError):
+            parse_epoch_us(b'-' + b'9' * 20)
+
+    def test_parse_uuid(self):
+        tmp_uuid = uuid.uuid4()
+        self.assertEqual(parse_uuid(str(tmp_uuid)), tmp_uuid)
+        self.assertEqual(parse_uuid(str(tmp_uuid).encode('utf-8')), tmp_uuid)
+        self.assertEqual(parse_uuid(tmp_uuid.bytes), tmp_uuid)
+        self.assertEqual(parse_uuid(tmp_uuid.hex), tmp_uuid)
+        self.assertEqual(parse_uuid(str(tmp_uuid)).version, 4)
+        with self.assertRaises(ValueError):
+            parse_uuid(str(tmp_uuid)[:-1] + 'x')
+        # The forms uuid.UUID allows are still accepted, but not what int() would take beyond hex digits
+        self.assertEqual(parse_uuid('urn:uuid:{' + str(tmp_uuid) + '}'), tmp_uuid)
+        digits = tmp_uuid.hex
+        for bad in ('0x' + digits[2:], '+' + digits[1:], ' ' + digits[1:], digits[:16] + '_' + digits[17:],
+                    '{0x' + digits[2:] + '}'):
+            with self.assertRaises(ValueError):
+                parse_uuid(bad)
+
+    def test_compact_encodings(self):
+        # Create a subclass with compact storage encodings
+        class TestEncoding(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid', 'encoding': 'bytes'},
+                      {'name': 'datetime1', 'type': 'datetime', 'encoding': 'epoch_us'}]
+        test_encoding_1 = TestEncoding()
+        mapping = test_encoding_1.get_hash()
+        # Make sure the compact forms are used for storage but not for the dict
+        self.assertEqual(mapping['oid'], test_encoding_1.oid.bytes)
+        self.assertIsInstance(mapping['datetime1'], int)
+        self.assertEqual(test_encoding_1.get_dict()['oid'], str(test_encoding_1.oid))
+        # Make sure both compact and legacy stored values decode
+        test_encoding_2 = TestEncoding.from_hash({b'oid': mapping['oid'], b'datetime1': str(mapping['datetime1'])})
+        self.assertEqual(test_encoding_2.get_dict(), test_encoding_1.get_dict())
+        test_encoding_3 = TestEncoding.from_hash(
+            {b'oid': str(test_encoding_1.oid), b'datetime1': test_encoding_1.datetime1.isoformat()})
+        self.assertEqual(test_encoding_3.get_dict(), test_encoding_1.get_dict())
+        # Pre-1970 values survive the round trip
+        test_encoding_1.datetime1 = datetime.datetime(1960, 5, 6, 7, 8, 9, 10)
+        mapping = test_encoding_1.get_hash()
+        self.assertLess(mapping['datetime1'], 0)
+        test_encoding_4 = TestEncoding.from_hash({b'oid': mapping['oid'], b'datetime1': str(mapping['datetime1'])})
+        self.assertEqual(test_encoding_4.datetime1, test_encoding_1.datetime1)
+
+    def test_legacy_digit_strings(self):
+        # Without the epoch_us encoding, digit strings are dates, not epoch microseconds
+        class TestLegacy(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'datetime1', 'type': 'datetime'}]
+        test_legacy = TestLegacy.from_hash({b'oid': str(uuid.uuid4()).encode('utf-8'), b'datetime1': b'20200102'})
+        self.assertEqual(test_legacy.datetime1, datetime.datetime(2020, 1, 2))
+
+    def test_unsupported_encoding(self):
+        with self.assertRaises(TypeError):
+            class TestBadEncoding(InoObjectBase):  # pylint: disable=unused-variable
+                fields = [{'name': 'oid', 'type': 'uuid', 'encoding': 'epoch_us'}]
+
+    def tearDown(self):
+        pass
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import logging
+import os
+import time
+import unittest
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, DuplicateException
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleIndexed(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'email', 'type': 'str', 'index': 'unique'},
+        {'name': 'site', 'type': 'str', 'index': 'hash'},
+        {'name': 'level', 'type': 'int', 'index': 'sorted'},
+        {'name': 'seen', 'type': 'datetime', 'index': 'sorted'}
+    ]
+
+class SampleIndexedModel(InoModelBase):
+    object_class = SampleIndexed
+
+class SampleIndexedSerializedModel(InoModelBase):
+    object_class = SampleIndexed
+    key_prefix = 'sampleindexedserialized'
+    serializer = 'struct'
+
+class SampleTimeline(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'modified', 'type': 'datetime', 'index': 'sorted', 'retention': 3600}
+    ]
+
+class SampleTimelineModel(InoModelBase):
+    object_class = SampleTimeline
+
+class TestCasesIndexes(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        # Connect to the database
+        self.dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        self.dstore.redis.flushdb()
+
+    def make_objects(self, count):
+        base = datetime.datetime(2020, 1, 1)
+        return [SampleIndexed({'email': 'user{}@example.com'.format(i), 'site': 'site{}'.format(i % 2), 'level': i,
+                               'seen': base + datetime.timedelta(days=i)}) for i in range(count)]
+
+    def test_bad_index_declarations(self):
+        with self.assertRaises(TypeError):
+            class SampleBadKind(InoObjectBase):  # pylint: disable=unused-variable
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str', 'index': 'fulltext'}]
+        with self.assertRaises(TypeError):
+            class SampleBadSorted(InoObjectBase):  # pylint: disable=unused-variable
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str', 'index': 'sorted'}]
+        with self.assertRaises(TypeError):
+            class SampleBadRetention(InoObjectBase):  # pylint: disable=unused-variable
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'int1', 'type': 'int', 'index': 'sorted',
+                                                            'retention': 60}]
+        with self.assertRaises(TypeError):
+            class SampleUnindexedRetention(InoObjectBase):  # pylint: disable=unused-variable
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'datetime1', 'type': 'datetime', 'retention': 60}]
+
+    def test_find_by(self):
+        model = SampleIndexedModel(self.dstore)
+        objects = self.make_objects(10)
+        self.assertEqual(model.save_many(objects), {})
+        self.assertEqual(model.find_by('email', 'user3@example.com')[0].oid, objects[3].oid)
+        self.assertEqual(model.find_by('email', 'nobody@example.com'), [])
+        site0 = sorted(str(obj.oid) for obj in objects if obj.site == 'site0')
+        self.assertEqual(sorted(str(obj.oid) for obj in model.find_by('site', 'site0')), site0)
+        # Hash index pages come back in a stable order
+        pages = model.find_by('site', 'site0', 0, 3) + model.find_by('site', 'site0', 3, 3)
+        self.assertEqual([str(obj.oid) for obj in pages], site0)
+        self.assertEqual(model.find_by('level', 4)[0].oid, objects[4].oid)
+
+    def test_range_by(self):
+        model = SampleIndexedModel(self.dstore)
+        objects = self.make_objects(10)
+        model.save_many(objects)
+        self.assertEqual([obj.level for obj in model.range_by('level', 2, 5)], [2, 3, 4, 5])
+        self.assertEqual([obj.level for obj in model.range_by('level', 2, None, offset=1, count=2)], [3, 4])
+        self.assertEqual([obj.level for obj in model.range_by('level', reverse=True, count=3)], [9, 8, 7])
+        self.assertEqual([obj.level for obj in model.range_by('seen', high=datetime.datetime(2020, 1, 3))], [0, 1, 2])
+        with self.assertRaises(TypeError):
+            model.range_by('site', 'a', 'b')
+
+    def test_retention(self):
+        now = datetime.datetime.utcnow()
+        for scripted in (True, False):
+            self.dstore.redis.flushdb()
+            model = type('SampleTimelineModel', (SampleTimelineModel,), {'scripted': scripted})(self.dstore)
+            stale = SampleTimeline({'modified': now - datetime.timedelta(hours=2)})
+            recent = [SampleTimeline({'modified': now - datetime.timedelta(minutes=i)}) for i in range(3)]
+            self.assertEqual(model.save_many([stale] + recent), {})
+            # Newest first, and the stale entry was trimmed as the chunk was saved
+            self.assertEqual([obj.oid for obj in model.range_by('modified', reverse=True)],
+                             [obj.oid for obj in recent])
+            self.assertEqual(self.dstore.redis.zcard(model.indexes.key('modified')), 3)
+            self.assertEqual(model.get(stale.oid).oid, stale.oid)
+            # Entries that aged out since are left out of queries until they're trimmed
+            self.dstore.redis.zadd(model.indexes.key('modified'), {str(stale.oid): time.time() - 7200})
+            self.assertEqual(len(model.range_by('modified', low=now - datetime.timedelta(days=1))), 3)
+            self.assertEqual(model.trim_indexes(), 1)
+            self.assertEqual(model.trim_indexes(), 0)
+
+    def test_maintenance(self):
+        for model in (SampleIndexedModel(self.dstore), SampleIndexedSerializedModel(self.dstore)):
+            obj = self.make_objects(1)[0]
+            model.save(obj)
+            # Changing a value moves the index entries
+            obj.site = 'other'
+            obj.email = 'changed@example.com'
+            obj.level = 42
+            model.save(obj)
+            self.assertEqual(model.find_by('site', 'site0'), [])
+            self.assertEqual(model.find_by('site', 'other')[0].oid, obj.oid)
+            self.assertEqual(model.find_by('email', 'user0@example.com'), [])
+            self.assertEqual(model.find_by('email', 'changed@example.com')[0].oid, obj.oid)
+            self.assertEqual([o.oid for o in model.range_by('level', 40, 50)], [obj.oid])
+            # Deleting removes them
+            model.delete(obj.oid)
+            self.assertEqual(model.find_by('site', 'other'), [])
+            self.assertEqual(model.find_by('email', 'changed@example.com'), [])
+            self.assertEqual(model.range_by('level'), [])
+        # Neither the objects nor any index entries are left behind
+        self.assertEqual(self.dstore.redis.keys('*'), [])
+
+    def test_racing_delete(self):
+        # A save landing between the read of the old index values and the delete makes the delete read them again
+        dstore = self.dstore
+
+        class TestRacingModel(SampleIndexedModel):
+            races = 1
+
+            def _get_stored_values(self, node, oids, names):
+                result = super()._get_stored_values(node, oids, names)
+                if self.races:
+                    self.races -= 1
+                    racing = SampleIndexedModel(dstore).get(oids[0])
+                    racing.site = 'racing'
+                    SampleIndexedModel(dstore).save(racing)
+                return result
+        model = TestRacingModel(self.dstore)
+        obj = self.make_objects(1)[0]
+        model.save(obj)
+        model.delete(obj.oid)
+        self.assertEqual(model.races, 0)
+        self.assertEqual(self.dstore.redis.keys('*'), [])
+
+    def test_projected_saves(self):
+        model = SampleIndexedModel(self.dstore)
+        obj = self.make_objects(1)[0]
+        model.save(obj)
+        # Index entries of the fields a projected load left out are kept
+        partial = model.get(obj.oid, fields=['level'])
+        partial.level = 7
+        model.save(partial)
+        self.assertEqual(model.find_by('email', obj.email)[0].oid, obj.oid)
+        self.assertEqual(model.find_by('site', obj.site)[0].oid, obj.oid)
+        self.assertEqual([o.level for o in model.range_by('level', 5, 10)], [7])
+
+    def test_unique_conflicts(self):
+        model = SampleIndexedModel(self.dstore)
+        first, second, third = self.make_objects(3)
+        model.save(first)
+        # Saving an object again with its own unique value is fine
+        model.save(first)
+        second.email = first.email
+        with self.assertRaises(DuplicateException):
+            model.save(second)
+        # Conflicts within one batch are caught too, and the rest of the batch is still written
+        third.email = 'shared@example.com'
+        fourth = SampleIndexed({'email': 'shared@example.com', 'site': 'site1', 'level': 4})
+        errors = model.save_many([third, fourth])
+        self.assertEqual(list(errors), [fourth.oid])
+        self.assertIsInstance(errors[fourth.oid], DuplicateException)
+        self.assertEqual(model.find_by('email', 'shared@example.com')[0].oid, third.oid)
+        self.assertEqual(model.get_many([second.oid, fourth.oid])[0], [])
+
+    def tearDown(self):
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
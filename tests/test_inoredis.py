@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 
 # === IMPORTS ===
+import concurrent.futures
+import json
 import logging
 import os
+import redis
 import redpipe
+import signal
 import unittest
 
-from inovonics.cloud.datastore import InoRedis
+from inovonics.cloud.datastore import InoRedis, InoShardedRedis
 
 # === GLOBALS ===
 logging.basicConfig(level=logging.DEBUG)
@@ -47,12 +51,12 @@ class TestCasesInoRedis(unittest.TestCase):
         dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
         # Flush the database
         dstore.redis.flushdb()
-        # Add an item with a redpipe pipeline
-        with redpipe.autoexec() as pipe:
+        # Add an item with a redpipe pipeline (registered under the datastore's own name)
+        with redpipe.autoexec(name=dstore.redpipe_name) as pipe:
             pipe.set('TESTKEY2', 'TESTVALUE2')
         # Get the item with without a pipeline
         test_value2 = None
-        with redpipe.autoexec() as pipe:
+        with dstore.pipeline() as pipe:
             test_value2 = pipe.get('TESTKEY2')
         test_value2 = test_value2.decode('utf-8')
         # Compare the values to make sure everything is happy
@@ -64,6 +68,87 @@ class TestCasesInoRedis(unittest.TestCase):
         # environment of instantiating the next test before the current test is garbage collected.
         del dstore
 
+    def test_shared_connection_pool(self):
+        # Build a blocking pool and share it between two datastores
+        pool = redis.BlockingConnectionPool(host=self.redis_host, port=self.redis_port, db=self.redis_db,
+                                            max_connections=4, socket_keepalive=True, health_check_interval=30)
+        with InoRedis(host=self.redis_host, connection_pool=pool) as dstore1, \
+                InoRedis(host=self.redis_host, connection_pool=pool) as dstore2:
+            # Make sure each has its own redpipe connection on the same pool
+            self.assertNotEqual(dstore1.redpipe_name, dstore2.redpipe_name)
+            self.assertIs(dstore1.redis.connection_pool, dstore2.redis.connection_pool)
+            dstore1.redis.flushdb()
+            with dstore1.pipeline() as pipe:
+                pipe.set('TESTKEY3', 'TESTVALUE3')
+            # Closing one datastore must not affect the other
+            dstore1.close()
+            with dstore2.pipeline() as pipe:
+                test_value3 = pipe.get('TESTKEY3')
+            self.assertEqual(test_value3.decode('utf-8'), 'TESTVALUE3')
+            dstore2.redis.flushdb()
+        pool.disconnect()
+
+    def test_concurrent_open_close(self):
+        # Open, use and close many datastores from several threads at once
+        registered = set(redpipe.connections.ConnectionManager.connections)
+        def worker(worker_id):
+            for i in range(20):
+                with InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db, max_connections=2,
+                              blocking=True, socket_timeout=5, socket_connect_timeout=5) as dstore:
+                    key = 'STRESSKEY:{}:{}'.format(worker_id, i)
+                    with dstore.pipeline() as pipe:
+                        pipe.set(key, i)
+                        value = pipe.get(key)
+                        pipe.delete(key)
+                    if int(value) != i:
+                        raise ValueError("{} read back {}".format(key, value))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [executor.submit(worker, worker_id) for worker_id in range(8)]:
+                future.result()
+        # Make sure no redpipe registrations were leaked
+        self.assertEqual(set(redpipe.connections.ConnectionManager.connections), registered)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs os.fork")
+    def test_fork(self):
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        sharded = InoShardedRedis([(self.redis_host, self.redis_port, self.redis_db),
+                                   (self.redis_host, self.redis_port, int(self.redis_db) + 1)])
+        parent_id = dstore.redis.client_id()
+        # Start the sharded datastore's worker threads before forking
+        sharded.map_all(lambda node: node.redis.ping())
+        reader, writer = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # The child reports the connection it used, or the error it got
+            signal.alarm(10)
+            try:
+                with dstore.pipeline() as pipe:
+                    pipe.set('FORKKEY', 'child')
+                    value = pipe.get('FORKKEY')
+                result = {'client_id': dstore.redis.client_id(), 'value': value.decode('utf-8'),
+                          'pings': sharded.map_all(lambda node: node.redis.ping())}
+                dstore.close()
+                sharded.close()
+            except Exception as ex:  # pylint: disable=broad-except
+                result = {'error': repr(ex)}
+            with os.fdopen(writer, 'w') as output:
+                json.dump(result, output)
+            os._exit(0)  # pylint: disable=protected-access
+        os.close(writer)
+        with os.fdopen(reader) as child_output:
+            result = json.load(child_output)
+        os.waitpid(pid, 0)
+        self.assertNotIn('error', result)
+        self.assertEqual(result['value'], 'child')
+        self.assertEqual(result['pings'], [True, True])
+        # The child had its own connection, and closing it left the parent's alone
+        self.assertNotEqual(result['client_id'], parent_id)
+        self.assertEqual(dstore.redis.client_id(), parent_id)
+        self.assertEqual(dstore.redis.get('FORKKEY'), b'child')
+        dstore.redis.delete('FORKKEY')
+        dstore.close()
+        sharded.close()
+
     def tearDown(self):
         pass
 
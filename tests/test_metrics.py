@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import os
+import unittest
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, InoMetrics
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleMetered(InoObjectBase):
+    fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'str1', 'type': 'str'}]
+
+class SampleMeteredModel(InoModelBase):
+    object_class = SampleMetered
+
+class TestCasesInoMetrics(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        self.metrics = InoMetrics()
+        # Connect to the database
+        self.dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db, metrics=self.metrics)
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.metrics.reset()
+
+    def test_model_metrics(self):
+        model = SampleMeteredModel(self.dstore)
+        objects = [SampleMetered({'str1': 'Test string {}'.format(i)}) for i in range(5)]
+        model.save_many(objects)
+        model.get_many([obj.oid for obj in objects])
+        stats = self.metrics.get_stats()
+        self.assertEqual(stats['redis_commands_total{command="HSET"}'], 5)
+        self.assertEqual(stats['redis_commands_total{command="HGETALL"}'], 5)
+        self.assertEqual(stats['redis_pipeline_size']['count'], 2)
+        self.assertEqual(stats['redis_pipeline_size']['buckets'][5], 2)
+        self.assertEqual(stats['redis_seconds{command="PIPELINE"}']['count'], 2)
+        for stage in ('validate', 'serialize', 'hydrate'):
+            self.assertEqual(stats['{}_objects_total{{class="SampleMetered"}}'.format(stage)], 5)
+            self.assertEqual(stats['{}_seconds{{class="SampleMetered"}}'.format(stage)]['count'], 1)
+        self.assertEqual(stats['operation_seconds{class="SampleMetered",operation="get_many"}']['count'], 1)
+
+    def test_exporters_and_callbacks(self):
+        seen = []
+        self.metrics.add_callback(lambda name, labels, value: seen.append((name, labels, value)))
+        self.dstore.redis.get('missing')
+        self.assertEqual(seen[0], ('redis_commands_total', (('command', 'GET'),), 1))
+        self.assertEqual(seen[1][:2], ('redis_seconds', (('command', 'GET'),)))
+        text = self.metrics.to_prometheus()
+        self.assertIn('# TYPE inodatastore_redis_commands_total counter\n', text)
+        self.assertIn('inodatastore_redis_commands_total{command="GET"} 1\n', text)
+        self.assertIn('inodatastore_redis_seconds_bucket{command="GET",le="+Inf"} 1\n', text)
+        self.assertIn('inodatastore_redis_seconds_count{command="GET"} 1\n', text)
+        # Label values that don't compare still sort, and values are escaped
+        self.metrics.incr('labelled_total', (('note', None),))
+        self.metrics.incr('labelled_total', (('note', 'a "quoted"\\path\n'),))
+        text = self.metrics.to_prometheus()
+        self.assertIn('inodatastore_labelled_total{note="None"} 1\n', text)
+        self.assertIn('inodatastore_labelled_total{note="a \\"quoted\\"\\\\path\\n"} 1\n', text)
+
+    def test_disabled(self):
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        model = SampleMeteredModel(dstore)
+        self.assertIsNone(model.metrics)
+        model.save(SampleMetered({'str1': 'Test string'}))
+        self.assertEqual(self.metrics.get_stats(), {})
+        dstore.close()
+
+    def tearDown(self):
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import os
+import socket
+import time
+import unittest
+
+import redis
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, NotExistsException
+from inovonics.cloud.datastore.replicas import InoReplica, InoReplicaSet
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+def closed_port():
+    # A local port nothing listens on
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+# === CLASSES ===
+class SampleReplicated(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'site', 'type': 'str', 'index': 'hash'}
+    ]
+
+class SampleReplicatedModel(InoModelBase):
+    object_class = SampleReplicated
+
+class SampleInfoClient(redis.StrictRedis):
+    # A client whose INFO replication reply is set by the test, for replication states one server can't be put in
+    def __init__(self, replication):
+        super().__init__(host='127.0.0.1', port=closed_port())
+        self.replication = replication
+
+    def info(self, section=None, *args, **kwargs):  # pylint: disable=keyword-arg-before-vararg,unused-argument
+        return self.replication
+
+class TestCasesReplicas(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        # The next database stands in for a replica, so reads can be told apart from the primary's
+        self.replica_db = int(self.redis_db) + 1
+        self.dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db,
+                               replicas=[(self.redis_host, self.redis_port, self.replica_db)])
+        # Flush the databases
+        self.dstore.redis.flushdb()
+        self.dstore.replicas.replicas[0].client.flushdb()
+
+    def test_read_routing(self):
+        model = SampleReplicatedModel(self.dstore)
+        obj = SampleReplicated({'site': 'north'})
+        model.save(obj)
+        # Writes go to the primary and reads to the replica, unless asked for the primary
+        with self.assertRaises(NotExistsException):
+            model.get(obj.oid)
+        self.assertEqual(model.get(obj.oid, primary=True).site, 'north')
+        self.assertEqual(model.find_by('site', 'north'), [])
+        self.assertEqual(model.find_by('site', 'north', primary=True)[0].oid, obj.oid)
+        self.assertEqual(list(model.iter_all()), [])
+        self.assertEqual([o.oid for o in model.iter_all(primary=True)], [obj.oid])
+        # Once "replicated", the replica serves it
+        with InoRedis(host=self.redis_host, port=self.redis_port, db=self.replica_db) as replica:
+            SampleReplicatedModel(replica).save(SampleReplicated(obj.get_dict()))
+        self.assertEqual(model.get(obj.oid).oid, obj.oid)
+
+    def test_selection(self):
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db,
+                          replicas=[(self.redis_host, self.redis_port, self.replica_db)] * 2)
+        first, second = dstore.replicas.replicas
+        self.assertEqual([dstore.replicas.pick() for _ in range(4)], [first, second, first, second])
+        dstore.replicas.selection = 'latency'
+        first.latency, second.latency = 0.002, 0.001
+        first.checked_at = second.checked_at = time.monotonic()
+        self.assertIs(dstore.replicas.pick(), second)
+        dstore.close()
+
+    def test_lag(self):
+        primary = SampleInfoClient({'role': 'master', 'master_repl_offset': 100})
+        client = SampleInfoClient({'role': 'slave', 'master_link_status': 'up', 'slave_repl_offset': 100,
+                                   'master_last_io_seconds_ago': 9})
+        replica = InoReplica(client, 'replica-lag')
+        replicas = InoReplicaSet([replica], max_lag=0.05, check_interval=0, retry_interval=0, primary=primary)
+        # Up to date, however long ago it last heard from the primary
+        self.assertIs(replicas.pick(), replica)
+        # Behind, but not yet for max_lag
+        primary.replication['master_repl_offset'] = 200
+        self.assertIs(replicas.pick(), replica)
+        time.sleep(0.06)
+        self.assertIsNone(replicas.pick())
+        client.replication['slave_repl_offset'] = 200
+        self.assertIs(replicas.pick(), replica)
+        client.replication['master_link_status'] = 'down'
+        self.assertIsNone(replicas.pick())
+
+    def test_fallback(self):
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db,
+                          replicas=[('127.0.0.1', closed_port())], replica_retry_interval=60)
+        model = SampleReplicatedModel(dstore)
+        obj = SampleReplicated({'site': 'north'})
+        model.save(obj)
+        # The replica can't be reached, so it's left out and the primary answers
+        self.assertEqual(model.get(obj.oid).oid, obj.oid)
+        self.assertIsNone(dstore.replicas.pick())
+        self.assertEqual(model.find_by('site', 'north')[0].oid, obj.oid)
+        dstore.close()
+
+    def tearDown(self):
+        # Flush the databases
+        self.dstore.redis.flushdb()
+        self.dstore.replicas.replicas[0].client.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
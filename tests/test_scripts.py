@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import os
+import unittest
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, DuplicateException, ExistsException, \
+    NotExistsException
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleScripted(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'email', 'type': 'str', 'index': 'unique'},
+        {'name': 'site', 'type': 'str', 'index': 'hash'},
+        {'name': 'active', 'type': 'bool', 'index': 'hash'},
+        {'name': 'level', 'type': 'int', 'index': 'sorted'},
+        {'name': 'note', 'type': 'str'}
+    ]
+
+class SampleScriptedModel(InoModelBase):
+    object_class = SampleScripted
+
+class SampleWatchedModel(InoModelBase):
+    object_class = SampleScripted
+    key_prefix = 'samplewatched'
+    scripted = False
+
+class TestCasesScripts(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        # Connect to the database
+        self.dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        self.dstore.redis.flushdb()
+
+    def test_create_update(self):
+        # Both save paths give the same results
+        for model in (SampleScriptedModel(self.dstore), SampleWatchedModel(self.dstore)):
+            obj = SampleScripted({'email': 'a@example.com', 'site': 'north', 'active': True, 'level': 1})
+            with self.assertRaises(NotExistsException):
+                model.update(obj)
+            self.assertEqual(model.get_many([obj.oid])[0], [])
+            model.create(obj)
+            with self.assertRaises(ExistsException):
+                model.create(SampleScripted({'oid': obj.oid, 'email': 'b@example.com'}))
+            self.assertEqual(model.get(obj.oid).email, 'a@example.com')
+            obj.note = 'updated'
+            model.update(obj)
+            self.assertEqual(model.get(obj.oid).note, 'updated')
+            # The bulk calls report the objects they skipped
+            other = SampleScripted({'email': 'c@example.com'})
+            errors = model.create_many([obj, other])
+            self.assertEqual(list(errors), [obj.oid])
+            self.assertIsInstance(errors[obj.oid], ExistsException)
+            self.assertEqual(model.update_many([obj, other]), {})
+
+    def test_deleted_partial_save(self):
+        # Both save paths recreate an object deleted since it was loaded with its own oid
+        for model in (SampleScriptedModel(self.dstore), SampleWatchedModel(self.dstore)):
+            obj = SampleScripted({'email': 'a@example.com', 'site': 'north', 'level': 1})
+            model.save(obj)
+            stale = model.get(obj.oid)
+            model.delete(obj.oid)
+            stale.note = 'stale'
+            model.save(stale)
+            loaded = model.get(obj.oid)
+            self.assertEqual((loaded.oid, loaded.note), (obj.oid, 'stale'))
+
+    def test_scripted_indexes(self):
+        for model in (SampleScriptedModel(self.dstore), SampleWatchedModel(self.dstore)):
+            obj = SampleScripted({'email': 'a@example.com', 'site': 'north', 'active': True, 'level': 1})
+            model.save(obj)
+            obj.site = 'south'
+            obj.active = False
+            obj.email = 'z@example.com'
+            obj.level = None
+            model.save(obj)
+            self.assertEqual(model.find_by('site', 'north'), [])
+            self.assertEqual(model.find_by('site', 'south')[0].oid, obj.oid)
+            self.assertEqual(model.find_by('active', True), [])
+            self.assertEqual(model.find_by('active', False)[0].oid, obj.oid)
+            self.assertEqual(model.find_by('email', 'a@example.com'), [])
+            self.assertEqual(model.find_by('email', 'z@example.com')[0].oid, obj.oid)
+            self.assertEqual(model.range_by('level'), [])
+            with self.assertRaises(DuplicateException):
+                model.create(SampleScripted({'email': 'z@example.com'}))
+            model.delete(obj.oid)
+        self.assertEqual(self.dstore.redis.keys('*'), [])
+
+    def test_noscript_reload(self):
+        self.dstore.register_script('exists', "return redis.call('EXISTS', KEYS[1])")
+        self.assertEqual(self.dstore.evalsha('exists', ['scripted']), 0)
+        self.dstore.redis.set('scripted', 1)
+        # Scripts lost by Redis (a restart, SCRIPT FLUSH) are loaded again, when run alone or in a pipeline
+        self.dstore.redis.script_flush()
+        self.assertEqual(self.dstore.evalsha('exists', ['scripted']), 1)
+        model = SampleScriptedModel(self.dstore)
+        objects = [SampleScripted({'email': '{}@example.com'.format(i), 'site': 'north'}) for i in range(3)]
+        self.dstore.redis.script_flush()
+        self.assertEqual(model.save_many(objects), {})
+        self.assertEqual(len(model.find_by('site', 'north')), 3)
+
+    def test_script_keys(self):
+        # Every key the save script writes is declared in its KEYS.  The keys of old 'hash' index entries can't be
+        # known beforehand, so the script replies with them and the object is sent again.
+        model = type('SampleStreamedModel', (SampleScriptedModel,), {'members_key': 'scripted:members',
+                                                                     'change_stream': 'scripted:changes'})(self.dstore)
+        obj = SampleScripted({'email': 'a@example.com', 'site': 'north', 'level': 1})
+        model.save(obj)
+        obj.site = 'south'
+        keys, args = model._script_call(obj, 'save', None)  # pylint: disable=protected-access
+        self.assertLessEqual({'scripted:members', 'scripted:changes', 'samplescripted:_unique:email',
+                              'samplescripted:_sorted:level', 'samplescripted:_idx:site:south'}, set(keys))
+        self.assertNotIn('samplescripted:_idx:site:north', keys)
+        self.assertEqual(self.dstore.evalsha('save', keys, args), [b'KEYS', b'samplescripted:_idx:site:north'])
+        model.save(obj)
+        self.assertEqual(model.find_by('site', 'north'), [])
+        self.assertEqual(model.find_by('site', 'south')[0].oid, obj.oid)
+        self.assertEqual(self.dstore.redis.smembers('scripted:members'), {str(obj.oid).encode('utf-8')})
+
+    def tearDown(self):
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
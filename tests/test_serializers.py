@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import json
+import logging
+import os
+import unittest
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, InvalidDataException
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleSerialized(InoObjectBase):
+    fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'bool1', 'type': 'bool'},
+              {'name': 'datetime1', 'type': 'datetime'}, {'name': 'float1', 'type': 'float'},
+              {'name': 'int1', 'type': 'int'}, {'name': 'list1', 'type': 'list'}, {'name': 'str1', 'type': 'str'}]
+
+class SampleSerializedModel(InoModelBase):
+    object_class = SampleSerialized
+    serializer = 'struct'
+
+class TestCasesSerializers(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        self.sample = SampleSerialized({
+            'bool1': True, 'datetime1': datetime.datetime(2017, 8, 9, 10, 11, 12, 131415).isoformat(),
+            'float1': 0.123, 'int1': 147, 'list1': ['Test string one', 2], 'str1': 'Test string',
+            'custom_string': 'Custom test string'})
+
+    def test_round_trips(self):
+        for fmt in ('msgpack', 'struct'):
+            data = self.sample.to_bytes(fmt)
+            # Make sure the version byte distinguishes the formats
+            self.assertEqual(data[0], {'msgpack': 0x01, 'struct': 0x02}[fmt])
+            loaded = SampleSerialized.from_bytes(data)
+            self.assertEqual(loaded.get_dict(), self.sample.get_dict())
+            # Lists are stored natively, not as strings
+            self.assertEqual(loaded.list1, ['Test string one', 2])
+
+    def test_none_values(self):
+        self.sample.str1 = None
+        self.sample.int1 = None
+        for fmt in ('msgpack', 'struct'):
+            loaded = SampleSerialized.from_bytes(self.sample.to_bytes(fmt))
+            self.assertIsNone(loaded.str1)
+            self.assertIsNone(loaded.int1)
+
+    def test_legacy_json(self):
+        loaded = SampleSerialized.from_bytes(json.dumps(self.sample.get_dict()).encode('utf-8'))
+        self.assertEqual(loaded.get_dict(), self.sample.get_dict())
+
+    def test_invalid_data(self):
+        with self.assertRaises(InvalidDataException):
+            SampleSerialized.from_bytes(b'\x7f')
+        # Struct data packed for a different field list is rejected
+        with self.assertRaises(InvalidDataException):
+            InoObjectBase.from_bytes(self.sample.to_bytes('struct'))
+        # Truncated data is rejected
+        with self.assertRaises(InvalidDataException):
+            SampleSerialized.from_bytes(self.sample.to_bytes('struct')[:-3])
+        with self.assertRaises(ValueError):
+            self.sample.to_bytes('pickle')
+
+    def test_model_serializer(self):
+        # Connect to the database
+        dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        dstore.redis.flushdb()
+        model = SampleSerializedModel(dstore)
+        model.save(self.sample)
+        # Make sure the object was stored as a single string and reads back
+        self.assertEqual(dstore.redis.type(model._key(self.sample.oid)), b'string')  # pylint: disable=W0212
+        self.assertEqual(model.get(self.sample.oid).get_dict(), self.sample.get_dict())
+        # Flush the database
+        dstore.redis.flushdb()
+        dstore.close()
+
+    def tearDown(self):
+        pass
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
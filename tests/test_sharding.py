@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import datetime
+import logging
+import os
+import unittest
+
+from inovonics.cloud.datastore import InoShardedRedis, InoModelBase, InoObjectBase
+from inovonics.cloud.datastore.sharding import hash_tag
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleSharded(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'site', 'type': 'str', 'index': 'hash'},
+        {'name': 'level', 'type': 'int', 'index': 'sorted'},
+        {'name': 'version', 'type': 'int', 'required': False}
+    ]
+
+class SampleShardedModel(InoModelBase):
+    object_class = SampleSharded
+
+class SampleShardedMembersModel(InoModelBase):
+    object_class = SampleSharded
+    key_prefix = 'sampleshardedmembers'
+    members_key = 'sampleshardedmembers:_members'
+
+class TestCasesSharding(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        # Two nodes: the test database and the next one, standing in for separate servers
+        self.dstore = InoShardedRedis([(self.redis_host, self.redis_port, int(self.redis_db)),
+                                       (self.redis_host, self.redis_port, int(self.redis_db) + 1)])
+        # Flush the databases
+        for node in self.dstore.nodes:
+            node.redis.flushdb()
+
+    def make_objects(self, count):
+        return [SampleSharded({'site': 'site{}'.format(i % 2), 'level': i}) for i in range(count)]
+
+    def test_placement(self):
+        self.assertEqual(hash_tag('prefix:{abc}'), 'abc')
+        self.assertEqual(hash_tag('prefix:{}:abc'), 'prefix:{}:abc')
+        self.assertIs(self.dstore.node_for('a:{abc}'), self.dstore.node_for('b:{abc}:c'))
+        model = SampleShardedModel(self.dstore)
+        objects = self.make_objects(40)
+        self.assertEqual(model.save_many(objects), {})
+        # Every node holds some of the objects, each with its index entries next to it
+        for node in self.dstore.nodes:
+            oids = [obj.oid for obj in objects if self.dstore.node_for(model._key(obj.oid)) is node]  # pylint: disable=W0212
+            self.assertTrue(oids)
+            self.assertTrue(all(node.redis.exists(model._key(oid)) for oid in oids))  # pylint: disable=W0212
+            self.assertEqual(node.redis.zcard(model.indexes.key('level')), len(oids))
+
+    def test_bulk(self):
+        model = SampleShardedModel(self.dstore)
+        objects = self.make_objects(30)
+        model.save_many(objects, chunk_size=7)
+        oids = [obj.oid for obj in objects]
+        found, errors = model.get_many(oids + ['missing'])
+        self.assertEqual([obj.oid for obj in found], oids)
+        self.assertEqual(list(errors), ['missing'])
+        self.assertEqual(model.delete_many(oids[:10] + ['missing']).keys(), {'missing'})
+        self.assertEqual(len(model.get_many(oids)[0]), 20)
+
+    def test_index_queries(self):
+        model = SampleShardedModel(self.dstore)
+        objects = self.make_objects(20)
+        model.save_many(objects)
+        site0 = sorted(str(obj.oid) for obj in objects if obj.site == 'site0')
+        pages = model.find_by('site', 'site0', 0, 4) + model.find_by('site', 'site0', 4, 4) + \
+            model.find_by('site', 'site0', 8)
+        self.assertEqual([str(obj.oid) for obj in pages], site0)
+        self.assertEqual([obj.level for obj in model.range_by('level', 3, 8, offset=2, count=3)], [5, 6, 7])
+        self.assertEqual([obj.level for obj in model.range_by('level', reverse=True, count=4)], [19, 18, 17, 16])
+        self.assertEqual(model.find_by('level', 12)[0].oid, objects[12].oid)
+
+    def test_iter_all(self):
+        for model in (SampleShardedModel(self.dstore), SampleShardedMembersModel(self.dstore)):
+            objects = self.make_objects(25)
+            model.save_many(objects)
+            self.assertEqual(sorted(str(obj.oid) for obj in model.iter_all(batch_size=4)),
+                             sorted(str(obj.oid) for obj in objects))
+            # Resuming from a batch's cursor walks the rest of the nodes
+            seen = []
+            for cursor, batch in model.iter_batches(batch_size=4):
+                seen.extend(obj.oid for obj in batch)
+                if len(seen) >= 10:
+                    break
+            for _, batch in model.iter_batches(batch_size=4, cursor=cursor):
+                seen.extend(obj.oid for obj in batch)
+            self.assertEqual({str(oid) for oid in seen}, {str(obj.oid) for obj in objects})
+
+    def test_checked_saves(self):
+        # The save script and WATCH/MULTI both run per node
+        for scripted in (True, False):
+            model_class = type('TestVersionedModel', (SampleShardedModel,), {
+                'key_prefix': 'sampleversioned{}'.format(scripted), 'version_field': 'version', 'scripted': scripted})
+            model = model_class(self.dstore)
+            objects = self.make_objects(10)
+            self.assertEqual(model.create_many(objects), {})
+            self.assertEqual({obj.version for obj in objects}, {1})
+            self.assertEqual(len(model.create_many(objects[:4])), 4)
+            stale = model.get(objects[0].oid)
+            model.save(objects[0])
+            self.assertEqual(list(model.save_many([stale, objects[1]])), [stale.oid])
+
+    def test_unique_indexes(self):
+        class TestUnique(InoObjectBase):
+            fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'email', 'type': 'str', 'index': 'unique'}]
+
+        with self.assertRaises(ValueError):
+            type('TestUniqueModel', (InoModelBase,), {'object_class': TestUnique})(self.dstore)
+
+    def tearDown(self):
+        # Flush the databases
+        for node in self.dstore.nodes:
+            node.redis.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import unittest
+
+from inovonics.cloud.datastore import InoObjectBase, InvalidDataException, ValidationException, FieldError
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleDeclared(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'name', 'type': 'str', 'min': 1, 'max': 10},
+        {'name': 'email', 'type': 'str', 'email': True, 'required': False},
+        {'name': 'phone', 'type': 'str', 'phone': True, 'required': False},
+        {'name': 'code', 'type': 'str', 'regex': '[A-Z]{3}', 'required': False},
+        {'name': 'count', 'type': 'int', 'min': 0, 'max': 5},
+        {'name': 'tags', 'type': 'list', 'min': 1},
+        {'name': 'notes', 'type': 'str'}
+    ]
+
+class SampleLegacy(InoObjectBase):
+    fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'email', 'type': 'str'}, {'name': 'count', 'type': 'int'}]
+
+    def __init__(self, dictionary=None):
+        super().__init__()
+        self.validation_methods.append(lambda: self._validate_email('email'))
+        self.validation_methods.append(lambda: self._validate_int('count', 0, 5))
+        if dictionary:
+            self.set_fields(dictionary)
+
+class TestCasesValidation(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        pass
+
+    def make_valid(self):
+        return SampleDeclared({'name': 'Test', 'count': 3, 'tags': ['a']})
+
+    def test_declared_constraints(self):
+        obj = self.make_valid()
+        self.assertEqual(SampleDeclared.validate_many([obj]), {})
+        # Each declared constraint is enforced
+        for field, value, code in (('name', '', 'length'), ('name', 'x' * 11, 'length'), ('name', None, 'type'),
+                                   ('email', 'not an email', 'email'), ('phone', '555-CALL', 'phone'),
+                                   ('code', 'ABCD', 'regex'), ('count', 6, 'range'), ('count', 1.5, 'type'),
+                                   ('tags', [], 'items')):
+            obj = self.make_valid()
+            setattr(obj, field, value)
+            errors = SampleDeclared.validate_many([obj])[obj.oid]
+            self.assertEqual([(error.field, error.code) for error in errors], [(field, code)])
+        # Optional fields accept None and empty strings, and fields without constraints aren't checked
+        obj = self.make_valid()
+        obj.email = None
+        obj.phone = ''
+        obj.notes = None
+        self.assertEqual(SampleDeclared.validate_many([obj]), {})
+
+    def test_bad_constraints(self):
+        with self.assertRaises(TypeError):
+            class SampleBadConstraint(InoObjectBase):  # pylint: disable=unused-variable
+                fields = [{'name': 'oid', 'type': 'uuid'}, {'name': 'flag', 'type': 'bool', 'regex': '.*'}]
+
+    def test_validate_many(self):
+        objects = [self.make_valid() for _ in range(3)]
+        objects[0].count = -1
+        objects[2].name = ''
+        objects[2].tags = []
+        invalid = SampleDeclared.validate_many(objects)
+        self.assertEqual(list(invalid), [objects[0].oid, objects[2].oid])
+        self.assertEqual([error.code for error in invalid[objects[2].oid]], ['length', 'items'])
+        self.assertEqual(str(invalid[objects[0].oid][0]), "count must be between 0 and 5")
+
+    def test_exception_and_messages(self):
+        obj = self.make_valid()
+        obj.count = 9
+        with self.assertRaises(InvalidDataException) as context:
+            obj._validate_fields()  # pylint: disable=protected-access
+        self.assertIsInstance(context.exception, ValidationException)
+        self.assertIsInstance(context.exception.errors[0], FieldError)
+        self.assertEqual(str(context.exception), "Validation Error List: ['count must be between 0 and 5']")
+
+    def test_legacy_helpers(self):
+        obj = SampleLegacy({'email': 'user@example.com', 'count': 2})
+        self.assertEqual(obj.email, 'user@example.com')
+        with self.assertRaises(InvalidDataException):
+            SampleLegacy({'email': 'user@', 'count': 2})
+        with self.assertRaises(InvalidDataException):
+            SampleLegacy({'email': 'user@example.com', 'count': 7})
+        # The helpers still return the old messages, as strings
+        obj.oid = 'not a uuid'
+        self.assertEqual(obj._validate_oid(),  # pylint: disable=protected-access
+                         "oid not of type uuid.UUID but type <class 'str'>, value not a uuid")
+        obj.phone = '(555) 123-4567'
+        self.assertIsNone(obj._validate_phone('phone'))  # pylint: disable=protected-access
+        obj.phone = '555 HELP'
+        self.assertIs(type(obj._validate_phone('phone')), str)  # pylint: disable=protected-access
+        self.assertEqual(obj._validate_phone('phone'),  # pylint: disable=protected-access
+                         "phone has illegal chars, value 555 HELP")
+
+    def test_legacy_helpers_projected(self):
+        # A validation method reading a field a projected load left out is skipped; the loaded fields are checked
+        obj = SampleLegacy({'email': 'user@example.com', 'count': 2})
+        mapping = {'oid': str(obj.oid).encode('utf-8'), 'email': b'user@example.com'}
+        projected = SampleLegacy.from_hash(mapping, fields=['oid', 'email'])
+        self.assertEqual(SampleLegacy.validate_many([projected]), {})
+        projected.email = 'other@example.com'
+        projected.validate()
+        projected.email = 'user@'
+        self.assertEqual(len(SampleLegacy.validate_many([projected])[projected.oid]), 1)
+        projected.email = 'user@example.com'
+        with self.assertRaises(InvalidDataException):
+            projected.set_fields({'count': 7})
+
+    def tearDown(self):
+        pass
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import unittest
+
+from inovonics.cloud.datastore import InoObjectBase, InoProcessPool, ValidationException
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+def total_level(objects, errors):
+    # map_rows function: the sum of the chunk's levels and its number of bad rows
+    return sum(obj.level for obj in objects), len(errors)
+
+# === CLASSES ===
+class SampleWorked(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'level', 'type': 'int', 'min': 0},
+        {'name': 'seen', 'type': 'datetime'}
+    ]
+
+class TestCasesWorkers(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.objects = [SampleWorked({'level': i}) for i in range(25)]
+        self.rows = [{name.encode('utf-8'): str(value).encode('utf-8') for name, value in obj.get_hash().items()}
+                     for obj in self.objects]
+        # Two bad rows, in different chunks
+        self.rows[3][b'level'] = b'-1'
+        self.rows[17][b'seen'] = b'not a date'
+        self.pool = InoProcessPool(processes=2, chunk_size=10)
+
+    def test_from_rows(self):
+        objects, errors = self.pool.from_rows(SampleWorked, self.rows)
+        expected, expected_errors = SampleWorked.from_rows(self.rows)
+        self.assertEqual([obj.get_dict() for obj in objects], [obj.get_dict() for obj in expected])
+        self.assertEqual(sorted(errors), sorted(expected_errors))
+        self.assertEqual(sorted(errors), [3, 17])
+        self.assertIsInstance(errors[3], ValidationException)
+        self.assertEqual(objects[0].get_dirty_dict(), {})
+
+    def test_map_rows(self):
+        results = self.pool.map_rows(total_level, SampleWorked, self.rows)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sum(total for total, _ in results), sum(range(25)) - 3 - 17)
+        self.assertEqual([bad for _, bad in results], [1, 1, 0])
+
+    def test_validate_many(self):
+        self.objects[5].level = -5
+        invalid = self.pool.validate_many(self.objects)
+        self.assertEqual(list(invalid), [self.objects[5].oid])
+
+    def tearDown(self):
+        self.pool.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass
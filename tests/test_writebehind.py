@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+# === IMPORTS ===
+import logging
+import os
+import queue
+import time
+import unittest
+
+from inovonics.cloud.datastore import InoRedis, InoModelBase, InoObjectBase, InoWriteBehind, InvalidDataException
+
+# === GLOBALS ===
+logging.basicConfig(level=logging.DEBUG)
+
+# === FUNCTIONS ===
+
+# === CLASSES ===
+class SampleDevice(InoObjectBase):
+    fields = [
+        {'name': 'oid', 'type': 'uuid'},
+        {'name': 'name', 'type': 'str'},
+        {'name': 'level', 'type': 'int', 'min': 0, 'max': 100}
+    ]
+
+class SampleDeviceModel(InoModelBase):
+    object_class = SampleDevice
+
+class TestCasesInoWriteBehind(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+    def setUp(self):
+        self.redis_host = os.getenv('REDIS_HOST', 'localhost')
+        self.redis_port = os.getenv('REDIS_PORT', 6379)
+        self.redis_db = os.getenv('REDIS_DB', 0)
+        # Connect to the database
+        self.dstore = InoRedis(host=self.redis_host, port=self.redis_port, db=self.redis_db)
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.model = SampleDeviceModel(self.dstore)
+
+    def test_coalesce_and_flush(self):
+        writer = InoWriteBehind(self.model, max_delay=60)
+        obj = SampleDevice({'name': 'Device', 'level': 1})
+        for level in range(1, 6):
+            obj.level = level
+            writer.put(obj)
+        # A separately loaded copy's changes merge into the pending write
+        other = obj.copy()
+        other.name = 'Renamed'
+        writer.put(other)
+        self.assertEqual(len(writer), 1)
+        self.assertEqual(self.model.get_many([obj.oid])[0], [])
+        writer.flush()
+        stored = self.model.get(obj.oid)
+        self.assertEqual((stored.name, stored.level), ('Renamed', 5))
+        stats = writer.get_stats()
+        self.assertEqual((stats['pending'], stats['queued'], stats['coalesced'], stats['written'], stats['flushes']),
+                         (0, 6, 5, 1, 1))
+        # Later puts only write the changed fields
+        obj.level = 9
+        writer.put(obj)
+        self.dstore.redis.hset(self.model._key(obj.oid), 'name', 'Changed elsewhere')  # pylint: disable=protected-access
+        writer.close()
+        stored = self.model.get(obj.oid)
+        self.assertEqual((stored.name, stored.level), ('Changed elsewhere', 9))
+        with self.assertRaises(RuntimeError):
+            writer.put(obj)
+
+    def test_background_flush(self):
+        with InoWriteBehind(self.model, max_batch=10, max_delay=0.05) as writer:
+            objects = [SampleDevice({'name': 'Device {}'.format(i), 'level': i}) for i in range(25)]
+            for obj in objects:
+                writer.put(obj)
+            deadline = time.monotonic() + 5
+            while writer.get_stats()['written'] < len(objects) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(writer.get_stats()['written'], len(objects))
+        found, errors = self.model.get_many([obj.oid for obj in objects])
+        self.assertEqual((len(found), errors), (len(objects), {}))
+
+    def test_partial_batch_delay(self):
+        # Objects left behind by a full batch are still written max_delay after they were put
+        with InoWriteBehind(self.model, max_batch=2, max_delay=0.5) as writer:
+            objects = [SampleDevice({'name': 'Device', 'level': i}) for i in range(3)]
+            start = time.monotonic()
+            with writer._flush_lock:  # pylint: disable=protected-access
+                for obj in objects:
+                    writer.put(obj)
+                time.sleep(0.4)
+            while writer.get_stats()['written'] < len(objects) and time.monotonic() < start + 5:
+                time.sleep(0.01)
+            self.assertEqual(writer.get_stats()['written'], len(objects))
+            self.assertLess(time.monotonic() - start, 0.8)
+
+    def test_backpressure_and_errors(self):
+        writer = InoWriteBehind(self.model, max_delay=60, max_pending=2, put_timeout=0.01)
+        objects = [SampleDevice({'name': 'Device', 'level': i}) for i in range(3)]
+        writer.put(objects[0])
+        writer.put(objects[1])
+        with self.assertRaises(queue.Full):
+            writer.put(objects[2])
+        # Puts for a pending oid don't need a free slot
+        writer.put(objects[1])
+        writer.discard(objects[0].oid)
+        writer.put(objects[2])
+        with self.assertRaises(InvalidDataException):
+            objects[0].level = 500
+            writer.put(objects[0])
+        writer.close()
+        self.assertEqual(len(self.model.get_many([obj.oid for obj in objects])[0]), 2)
+
+    def tearDown(self):
+        # Flush the database
+        self.dstore.redis.flushdb()
+        self.dstore.close()
+
+# === MAIN ===
+if __name__ == '__main__':
+    # THIS SCRIPT SHOULD NEVER BE CALLED DIRECTLY
+    # Call from the base directory of the package with the following command:
+    # python3 -m unittest tests.<name_of_module>.<name_of_class>
+    pass